@@ -0,0 +1,262 @@
+# Offline benchmarks for the code that parses Steam's responses. Run from the
+# root of the repository:
+#
+#   python -m benchmarks.bench_parsers --save results.json
+#   python -m benchmarks.bench_parsers --compare results.json
+#
+# Every benchmark is timed `--repeat` times on fresh input, then run once more
+# under `tracemalloc` to get its peak memory (tracing slows the code down, so it
+# isn't part of the timings). `--compare` exits with 1 if a benchmark got slower
+# or more memory hungry than `--threshold` times its baseline.
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+from pysaw.market import SteamMarket
+from pysaw.models import Inventory, InventoryFrame
+from pysaw.store import Store
+from pysaw.market import _INVENTORY_STREAM_KEYS
+from pysaw.utils import (
+    formatted_to_float,
+    iter_json_members,
+    json_loads,
+    STREAM_CHUNK_SIZE,
+)
+
+from . import fixtures
+
+# name -> (setup(scale) -> (args, n_items), benchmarked function). Setups run
+# before every repetition since some parsers modify their input.
+BENCHMARKS: Dict[str, Tuple[Callable, Callable]] = {}
+
+
+def benchmark(name: str, setup: Callable[[float], Tuple[tuple, int]]):
+    def decorator(func):
+        BENCHMARKS[name] = (setup, func)
+        return func
+
+    return decorator
+
+
+_cache = {}
+
+
+def _cached_fixture(key: str, factory: Callable[[], Any]) -> Any:
+    # Building the fixtures is slower than parsing them, build each one once and
+    # hand out copies (decoding JSON is the fastest way to deep copy them)
+    if key not in _cache:
+        _cache[key] = json.dumps(factory())
+    return json.loads(_cache[key])
+
+
+def _inventory_page(scale: float) -> dict:
+    return fixtures.inventory_page(int(100_000 * scale), int(5_000 * scale) or 1)
+
+
+def _inventory_setup(scale: float) -> Tuple[tuple, int]:
+    page = _cached_fixture(f"inventory-{scale}", lambda: _inventory_page(scale))
+    return (page,), len(page["assets"])
+
+
+def _inventory_json_setup(scale: float) -> Tuple[tuple, int]:
+    page = _cached_fixture(f"inventory-{scale}", lambda: _inventory_page(scale))
+    return (json.dumps(page, separators=(",", ":")),), len(page["assets"])
+
+
+def _inventory_chunks_setup(scale: float) -> Tuple[tuple, int]:
+    page = _cached_fixture(f"inventory-{scale}", lambda: _inventory_page(scale))
+    raw = json.dumps(page, separators=(",", ":")).encode()
+    chunks = [
+        raw[i : i + STREAM_CHUNK_SIZE] for i in range(0, len(raw), STREAM_CHUNK_SIZE)
+    ]
+    return (chunks,), len(page["assets"])
+
+
+def _items_setup(scale: float) -> Tuple[tuple, int]:
+    page = _cached_fixture(f"inventory-{scale}", lambda: _inventory_page(scale))
+    items, _ = SteamMarket._parse_inventory_page(page)
+    return (items,), len(items)
+
+
+def _listings_setup(scale: float) -> Tuple[tuple, int]:
+    n = int(10_000 * scale) or 1
+    listings = _cached_fixture(f"listings-{scale}", lambda: fixtures.my_listings(n))
+    return (listings,), n
+
+
+def _search_setup(scale: float) -> Tuple[tuple, int]:
+    n = int(10_000 * scale) or 1
+    results = _cached_fixture(f"search-{scale}", lambda: fixtures.search_results(n))
+    return (results,), n
+
+
+def _prices_setup(scale: float) -> Tuple[tuple, int]:
+    n = int(10_000 * scale) or 1
+    prices = _cached_fixture(f"prices-{scale}", lambda: fixtures.app_prices(n))
+    return (prices,), n
+
+
+def _price_overviews_setup(scale: float) -> Tuple[tuple, int]:
+    n = int(10_000 * scale) or 1
+    overviews = _cached_fixture(
+        f"overviews-{scale}", lambda: fixtures.price_overviews(n)
+    )
+    return (overviews,), n
+
+
+def _formatted_prices_setup(scale: float) -> Tuple[tuple, int]:
+    n = int(100_000 * scale) or 1
+    prices = _cached_fixture(f"formatted-{scale}", lambda: fixtures.formatted_prices(n))
+    return (prices,), n
+
+
+@benchmark("json_decode_inventory_page", _inventory_json_setup)
+def bench_json_decode_inventory_page(text: str) -> Any:
+    return json.loads(text)
+
+
+@benchmark("backend_decode_inventory_page", _inventory_json_setup)
+def bench_backend_decode_inventory_page(text: str) -> Any:
+    return json_loads(text)
+
+
+@benchmark("stream_parse_inventory_page", _inventory_chunks_setup)
+def bench_stream_parse_inventory_page(chunks: list) -> Any:
+    members = iter_json_members(chunks, _INVENTORY_STREAM_KEYS)
+    return SteamMarket._parse_inventory_members(members)
+
+
+@benchmark("parse_inventory_page", _inventory_setup)
+def bench_parse_inventory_page(page: dict) -> Any:
+    return SteamMarket._parse_inventory_page(page)
+
+
+@benchmark("build_inventory", _items_setup)
+def bench_build_inventory(items: list) -> Any:
+    return Inventory(items)
+
+
+@benchmark("build_inventory_frame", _items_setup)
+def bench_build_inventory_frame(items: list) -> Any:
+    return InventoryFrame(items)
+
+
+@benchmark("parse_my_listings", _listings_setup)
+def bench_parse_my_listings(listings: dict) -> Any:
+    return SteamMarket._parse_my_listings(listings)
+
+
+@benchmark("parse_search", _search_setup)
+def bench_parse_search(results: dict) -> Any:
+    return Store._parse_search(results)
+
+
+@benchmark("parse_prices", _prices_setup)
+def bench_parse_prices(prices: dict) -> Any:
+    return Store._parse_prices(prices)
+
+
+@benchmark("parse_price", _price_overviews_setup)
+def bench_parse_price(overviews: list) -> Any:
+    return [SteamMarket._parse_price(overview) for overview in overviews]
+
+
+@benchmark("formatted_to_float", _formatted_prices_setup)
+def bench_formatted_to_float(prices: list) -> Any:
+    return [formatted_to_float(price) for price in prices]
+
+
+def run(name: str, scale: float, repeat: int) -> Dict[str, Any]:
+    setup, func = BENCHMARKS[name]
+    timings = []
+    for _ in range(repeat):
+        args, n_items = setup(scale)
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+        del result
+
+    # The result is kept alive until the peak is read, so memory that the parser
+    # hands back to the caller is counted too
+    args, n_items = setup(scale)
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    best = min(timings)
+    return {
+        "items": n_items,
+        "best": best,
+        "median": statistics.median(timings),
+        "items_per_second": n_items / best if best else None,
+        "peak_bytes": peak,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    regressed = False
+    print(f"\n{'benchmark':<28} {'time':>8} {'memory':>8}")
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or base["items"] != result["items"]:
+            print(f"{name:<28} {'n/a':>8} {'n/a':>8}")
+            continue
+        time_ratio = result["best"] / base["best"]
+        memory_ratio = result["peak_bytes"] / max(1, base["peak_bytes"])
+        flag = ""
+        if time_ratio > threshold or memory_ratio > threshold:
+            regressed = True
+            flag = "  REGRESSION"
+        print(f"{name:<28} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x{flag}")
+    return regressed
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", dest="only", help="only run benchmarks containing this")
+    parser.add_argument("--scale", type=float, default=1.0, help="fixture size factor")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "results": {},
+    }
+    print(f"{'benchmark':<28} {'items':>8} {'best':>10} {'items/s':>12} {'peak':>10}")
+    for name in BENCHMARKS:
+        if args.only and args.only not in name:
+            continue
+        result = results["results"][name] = run(name, args.scale, args.repeat)
+        print(
+            f"{name:<28} {result['items']:>8} {result['best'] * 1000:>8.1f}ms "
+            f"{result['items_per_second']:>12,.0f} "
+            f"{result['peak_bytes'] / 2**20:>8.1f}MB"
+        )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        return 1 if compare(results, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# Synthetic responses shaped like the ones Steam returns, scaled to sizes that
+# real accounts reach. Everything is generated from a seed so that two runs (and
+# two machines) benchmark the exact same data.
+import random
+from typing import Dict, List
+
+WEAPONS = ["AK-47", "M4A4", "AWP", "USP-S", "Glock-18", "Desert Eagle", "P250"]
+SKINS = ["Redline", "Asiimov", "Vulcan", "Hyper Beast", "Neo-Noir", "Fade", "Slate"]
+WEARS = [
+    "Factory New",
+    "Minimal Wear",
+    "Field-Tested",
+    "Well-Worn",
+    "Battle-Scarred",
+]
+
+
+def market_hash_names(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < n:
+        stattrak = "StatTrak™ " if rng.random() < 0.2 else ""
+        weapon, skin, wear = rng.choice(WEAPONS), rng.choice(SKINS), rng.choice(WEARS)
+        names.add(f"{stattrak}{weapon} | {skin} ({wear}) #{len(names)}")
+    return list(names)
+
+
+def _description(classid: str, instanceid: str, name: str) -> dict:
+    return {
+        "appid": 730,
+        "classid": classid,
+        "instanceid": instanceid,
+        "currency": 0,
+        "background_color": "",
+        "icon_url": "-9a81dlWLwJ2UUGcVs_nsVtzdOEdtWwKGZZLQHTxDZ7I56KU0Zwwo4NUX4oFJZEHLbXH5ApeO4YmlhxYQknCRvCo04DEVlxkKgpot7HxfDhjxszJemkV09-5lpKKqPrxN7LEmyVQ7MEpiLuSrYmnjQO3-UdsZGHyd4_Bd1RvNQ7T_FDrw-_ng5Pu75iY1zI97bhLsvQz",
+        "descriptions": [
+            {"type": "html", "value": "Exterior: Field-Tested"},
+            {"type": "html", "value": " "},
+            {"type": "html", "value": "It has been painted in a red and black design."},
+        ],
+        "tradable": 1,
+        "name": name.split(" (")[0],
+        "name_color": "D2D2D2",
+        "type": "Classified Rifle",
+        "market_name": name,
+        "market_hash_name": name,
+        "commodity": 0,
+        "market_tradable_restriction": 7,
+        "marketable": 1,
+        "tags": [
+            {"category": "Type", "internal_name": "CSGO_Type_Rifle"},
+            {"category": "Quality", "internal_name": "normal"},
+            {"category": "Rarity", "internal_name": "Rarity_Legendary_Weapon"},
+        ],
+    }
+
+
+def inventory_page(n_assets: int, n_descriptions: int, seed: int = 0) -> dict:
+    # One `inventory/{steamid}/{appid}/{contextid}` page. Big inventories are
+    # mostly duplicates, hence far fewer descriptions than assets.
+    rng = random.Random(seed)
+    names = market_hash_names(n_descriptions, seed)
+    classes = [
+        (str(rng.randrange(10**9, 10**10)), str(rng.choice([0, 0, 188530139])))
+        for _ in range(n_descriptions)
+    ]
+    assets = []
+    for i in range(n_assets):
+        classid, instanceid = classes[rng.randrange(n_descriptions)]
+        assets.append(
+            {
+                "appid": 730,
+                "contextid": "2",
+                "assetid": str(30_000_000_000 + i),
+                "classid": classid,
+                "instanceid": instanceid,
+                "amount": "1",
+            }
+        )
+    descriptions = [
+        _description(classid, instanceid, name)
+        for (classid, instanceid), name in zip(classes, names)
+    ]
+    return {
+        "assets": assets,
+        "descriptions": descriptions,
+        "total_inventory_count": n_assets,
+        "success": 1,
+        "rwgrsn": -2,
+    }
+
+
+def _listing(i: int, name: str, rng: random.Random) -> dict:
+    price = rng.randrange(3, 500_000)
+    return {
+        "listingid": str(4_000_000_000_000_000_000 + i),
+        "time_created": 1_700_000_000 + i,
+        "asset": {
+            "currency": 0,
+            "appid": 730,
+            "contextid": "2",
+            "id": str(30_000_000_000 + i),
+            "classid": str(rng.randrange(10**9, 10**10)),
+            "instanceid": "0",
+            "amount": "1",
+            "status": 2,
+            "original_amount": "1",
+            "unowned_id": str(30_000_000_000 + i),
+            "unowned_contextid": "2",
+            "market_hash_name": name,
+            "marketable": 1,
+        },
+        "steamid_lister": "76561198000000000",
+        "price": price,
+        "original_price": price,
+        "fee": max(2, price // 10),
+        "currencyid": "2034",
+        "cancel_reason": 0,
+        "item_expired": 0,
+        "original_amount_listed": 1,
+        "original_price_per_unit": price,
+        "fee_per_unit": max(2, price // 10),
+        "steam_fee_per_unit": max(1, price // 20),
+        "publisher_fee_per_unit": max(1, price // 20),
+        "converted_price": price,
+        "converted_fee": max(2, price // 10),
+        "converted_currencyid": "2034",
+        "status": 2,
+        "active": 1,
+    }
+
+
+def my_listings(n_listings: int, seed: int = 0) -> dict:
+    # `market/mylistings/?norender=1`, most listings are active, a few are on hold
+    # or waiting for a confirmation
+    rng = random.Random(seed)
+    names = market_hash_names(max(1, n_listings // 10), seed)
+    listings = [_listing(i, rng.choice(names), rng) for i in range(n_listings)]
+    n_on_hold = n_listings // 20
+    n_to_confirm = n_listings // 20
+    return {
+        "success": True,
+        "pagesize": n_listings,
+        "total_count": n_listings,
+        "assets": {},
+        "start": 0,
+        "num_active_listings": n_listings - n_on_hold - n_to_confirm,
+        "listings": listings[n_on_hold + n_to_confirm :],
+        "listings_on_hold": listings[:n_on_hold],
+        "listings_to_confirm": listings[n_on_hold : n_on_hold + n_to_confirm],
+        "buy_orders": [],
+    }
+
+
+def search_results(n_items: int, seed: int = 0) -> dict:
+    # `store.steampowered.com/search/results/?json=1`, bundles don't have an appid
+    # in their logo
+    rng = random.Random(seed)
+    items = []
+    for i in range(n_items):
+        if rng.random() < 0.05:
+            logo = f"https://shared.akamai.steamstatic.com/store_item_assets/steam/bundles/{i}/capsule_sm_120.jpg"
+        else:
+            appid = 10 + i * 10
+            logo = f"https://shared.akamai.steamstatic.com/store_item_assets/steam/apps/{appid}/capsule_sm_120.jpg?t={rng.randrange(10**9, 2 * 10**9)}"
+        items.append({"name": f"Game {i}", "logo": logo})
+    return {"desc": "", "items": items, "total_count": n_items}
+
+
+def app_prices(n_apps: int, seed: int = 0) -> Dict[str, dict]:
+    # `api/appdetails/?filters=price_overview`, free and region locked apps have
+    # an empty `data` or no success
+    rng = random.Random(seed)
+    prices = {}
+    for i in range(n_apps):
+        appid = str(10 + i * 10)
+        roll = rng.random()
+        if roll < 0.05:
+            prices[appid] = {"success": False}
+        elif roll < 0.15:
+            prices[appid] = {"success": True, "data": []}
+        else:
+            initial = rng.randrange(100, 10_000_000)
+            discount = rng.choice([0, 0, 0, 10, 25, 50, 75, 90])
+            final = initial * (100 - discount) // 100
+            prices[appid] = {
+                "success": True,
+                "data": {
+                    "price_overview": {
+                        "currency": "ARS",
+                        "initial": initial,
+                        "final": final,
+                        "discount_percent": discount,
+                        "initial_formatted": f"ARS$ {initial / 100:,.2f}",
+                        "final_formatted": f"ARS$ {final / 100:,.2f}",
+                    }
+                },
+            }
+    return prices
+
+
+def formatted_prices(n: int, seed: int = 0) -> List[str]:
+    # Prices formatted the way the market and the store show them
+    rng = random.Random(seed)
+    formats = ["${:,.2f}", "ARS$ {:,.2f}", "{:,.2f}€", "R$ {:,.2f}", "CDN$ {:,.2f}"]
+    return [rng.choice(formats).format(rng.randrange(1, 10**7) / 100) for _ in range(n)]
+
+
+def price_overviews(n: int, seed: int = 0) -> List[dict]:
+    # `market/priceoverview` responses, some items have no median or volume
+    rng = random.Random(seed)
+    overviews = []
+    for _ in range(n):
+        overview = {
+            "success": True,
+            "lowest_price": f"${rng.randrange(3, 10**6) / 100:,.2f}",
+        }
+        if rng.random() < 0.8:
+            overview["volume"] = f"{rng.randrange(1, 100_000):,}"
+            overview["median_price"] = f"${rng.randrange(3, 10**6) / 100:,.2f}"
+        overviews.append(overview)
+    return overviews
@@ -1,4 +1,9 @@
 from .constants import *
 from .exceptions import *
 from .models import *
-from .steam import Steam
+from .cache import ResponseCache
+from .history import PriceHistory, PriceHistoryStore
+from .metrics import Metrics
+from .ratelimit import RateLimiter
+from .steam import Steam, AsyncSteam
+from .pool import SteamPool, AsyncSteamPool
@@ -0,0 +1,216 @@
+import collections.abc
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+from .constants import DEFAULT_CACHE_TTLS
+from . import utils
+
+_bypass = contextvars.ContextVar("pysaw_cache_bypass", default=False)
+# endpoint -> how `cached()` turns the arguments of a call into its key, so that
+# `ResponseCache.invalidate()` finds the entry of a call the same way
+_key_makers: Dict[str, Callable[[tuple, dict], str]] = {}
+
+
+class ResponseCache:
+    # TTL + LRU cache for the results of read-only endpoints. `ttls` maps an endpoint
+    # (the name of the method, e.g. "fetch_price") to how many seconds its results
+    # are kept, endpoints that aren't in `ttls` aren't cached at all.
+    #
+    # Values are stored as JSON, which gives us their size for the `max_bytes` limit
+    # and makes every hit return a fresh copy the caller is free to modify. When
+    # `path` is given, entries are also written to a SQLite file so that a restarted
+    # process starts with a warm cache.
+    def __init__(
+        self,
+        ttls: Dict[str, float] = None,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 2**20,
+        path: str = None,
+    ):
+        self.ttls = DEFAULT_CACHE_TTLS if ttls is None else ttls
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, value as JSON)
+        self._bytes = 0
+        self._hits = {}
+        self._misses = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def get(self, endpoint: str, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                entry = self._db.execute(
+                    "SELECT expires_at, value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if entry is not None:
+                    self._store(key, *entry)
+
+            if entry is None or entry[0] < time.time() or _bypass.get():
+                self._misses[endpoint] = self._misses.get(endpoint, 0) + 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._hits[endpoint] = self._hits.get(endpoint, 0) + 1
+            return True, utils.json_loads(entry[1])
+
+    def set(self, endpoint: str, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttls[endpoint]
+        value = utils.json_dumps(value)
+        with self._lock:
+            self._store(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                    (key, expires_at, value),
+                )
+                self._db.commit()
+
+    def invalidate(self, endpoint: str = None, *args, **kwargs) -> None:
+        # Without arguments the whole cache is dropped, with just an endpoint all of
+        # its entries, and with the endpoint and the arguments of a call only the
+        # entry for that call
+        if endpoint is None:
+            prefix = ""
+        elif args or kwargs:
+            make_key = _key_makers.get(endpoint)
+            if make_key is None:
+                prefix = self.make_key(endpoint, args, kwargs)
+            else:
+                prefix = make_key(args, kwargs)
+        else:
+            prefix = endpoint + ":"
+
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._bytes -= len(self._entries.pop(key)[1])
+            if self._db is not None:
+                self._db.execute(
+                    "DELETE FROM entries WHERE substr(key, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+                self._db.commit()
+
+    @contextlib.contextmanager
+    def bypass(self) -> Iterator[None]:
+        # Calls made inside this block go to Steam, and their results replace the
+        # cached ones
+        token = _bypass.set(True)
+        try:
+            yield
+        finally:
+            _bypass.reset(token)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": dict(self._hits),
+                "misses": dict(self._misses),
+            }
+
+    @staticmethod
+    def make_key(endpoint: str, args: tuple, kwargs: dict) -> str:
+        # Always the standard library, keys have to be the same whatever the backend
+        return endpoint + ":" + json.dumps([args, kwargs], sort_keys=True, default=str)
+
+    def _store(self, key: str, expires_at: float, value: str) -> None:
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key)[1])
+        self._entries[key] = (expires_at, value)
+        self._bytes += len(value)
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+
+def cached(endpoint: str, ignore: Tuple[str, ...] = ()):
+    # Caches the result of a `PysawBase` method in `steam.cache`. Does nothing if
+    # the `Steam` instance doesn't have a cache or the endpoint has no TTL. The
+    # arguments in `ignore` (e.g. `max_workers`) don't change the result, so
+    # they're left out of the key.
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def bind(self, args: tuple, kwargs: dict) -> inspect.BoundArguments:
+            # Arguments passed by keyword, by position or left to their defaults
+            # give the same key. Iterators (e.g. a generator of appids) are read
+            # into tuples, which key by their contents and can still be passed on.
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            for name, value in bound.arguments.items():
+                if isinstance(value, collections.abc.Iterator):
+                    bound.arguments[name] = tuple(value)
+            return bound
+
+        def make_key(bound: inspect.BoundArguments) -> str:
+            arguments = list(bound.arguments.items())[1:]  # without `self`
+            kwargs = {name: value for name, value in arguments if name not in ignore}
+            return ResponseCache.make_key(endpoint, (), kwargs)
+
+        _key_makers[endpoint] = lambda args, kwargs: make_key(bind(None, args, kwargs))
+
+        def lookup(
+            self, args: tuple, kwargs: dict
+        ) -> Tuple[inspect.BoundArguments, ResponseCache, str, bool, Any]:
+            bound = bind(self, args, kwargs)
+            cache = self._steam.cache
+            if cache is None or endpoint not in cache.ttls:
+                return bound, None, None, False, None
+            key = make_key(bound)
+            return bound, cache, key, *cache.get(endpoint, key)
+
+        def store(cache: ResponseCache, key: str, value: Any) -> None:
+            # Steam reports some errors as `{"success": false}` with a 200, don't
+            # keep those around
+            if not (isinstance(value, dict) and value.get("success") is False):
+                cache.set(endpoint, key, value)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                bound, cache, key, found, value = lookup(self, args, kwargs)
+                if found:
+                    return value
+                value = await func(*bound.args, **bound.kwargs)
+                if cache is not None:
+                    store(cache, key, value)
+                return value
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            bound, cache, key, found, value = lookup(self, args, kwargs)
+            if found:
+                return value
+            value = func(*bound.args, **bound.kwargs)
+            if cache is not None:
+                store(cache, key, value)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -1,22 +1,80 @@
-import time
-from typing import List, Dict
+from typing import Iterable, List, Dict, TYPE_CHECKING
 
-from .utils import login_required
+from .metrics import instrumented
+from .utils import decode_response, login_required, n_elements_per_call
 from .constants import ConfirmationTag
-from .models import Confirmation, PysawBase
+from .models import Confirmation, PysawBase, Request
+
+if TYPE_CHECKING:
+    import httpx
+    import pysaw
+    import requests
 
 
 class ConfirmationExecutor(PysawBase):
     @login_required
+    @instrumented("fetch_confirmations")
     def fetch_confirmations(self) -> List[Confirmation]:
-        tag = ConfirmationTag.CONF.value
+        response = self._send(self._fetch_confirmations_request())
+
+        return self._parse_confirmations(decode_response(response))
+
+    @login_required
+    @instrumented("send_confirmation")
+    def send_confirmation(self, confirmation: Confirmation, allow: bool = True) -> dict:
+        request = self._send_confirmation_request(confirmation, allow)
+        return decode_response(self._send(request))
+
+    @login_required
+    @instrumented("send_confirmations")
+    def send_confirmations(
+        self,
+        confirmations: Iterable[Confirmation],
+        allow: bool = True,
+        chunk_size: int = 50,
+    ) -> Dict[str, bool]:
+        # Accepts/cancels `chunk_size` confirmations per request, returns whether
+        # each confirmation (by id) went through. Steam reports a single result for
+        # the whole request, so every confirmation in a request gets that result.
+        results = {}
+        for chunk in n_elements_per_call(confirmations, chunk_size):
+            response = self._send(self._send_confirmations_request(chunk, allow))
+            success = self._was_successful(response)
+            for confirmation in chunk:
+                results[confirmation.id] = success
+
+        return results
+
+    def _fetch_confirmations_request(self) -> Request:
         url = "https://steamcommunity.com/mobileconf/getlist"
-        params = self._create_confirmation_params(tag)
-        response = self._steam._session.get(url, params=params)
+        tag = ConfirmationTag.CONF.value
+        params = self._create_confirmation_params(self._steam, tag)
+        return Request("GET", url, params=params)
 
-        confirmations = []
-        response_json = response.json()
+    def _send_confirmation_request(
+        self, confirmation: Confirmation, allow: bool
+    ) -> Request:
+        url = "https://steamcommunity.com/mobileconf/ajaxop"
+        params = self._send_confirmation_params(self._steam, confirmation, allow)
+        return Request("GET", url, params=params)
 
+    def _send_confirmations_request(
+        self, confirmations: List[Confirmation], allow: bool
+    ) -> Request:
+        url = "https://steamcommunity.com/mobileconf/multiajaxop"
+        data = self._send_confirmations_data(self._steam, confirmations, allow)
+        return Request("POST", url, data=data)
+
+    @staticmethod
+    def _was_successful(response: "requests.Response | httpx.Response") -> bool:
+        try:
+            return decode_response(response).get("success") is True
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _parse_confirmations(response_json: dict) -> List[Confirmation]:
+        confirmations = []
         for conf in response_json["conf"]:
             confirmation = Confirmation(
                 conf["id"],
@@ -30,29 +88,83 @@ class ConfirmationExecutor(PysawBase):
 
         return confirmations
 
-    @login_required
-    def send_confirmation(self, confirmation: Confirmation, allow: bool = True) -> dict:
+    @classmethod
+    def _send_confirmation_params(
+        cls, steam: "pysaw.Steam", confirmation: Confirmation, allow: bool
+    ) -> Dict[str, str]:
         tag = ConfirmationTag.ALLOW.value if allow else ConfirmationTag.CANCEL.value
-        params = self._create_confirmation_params(tag)
+        params = cls._create_confirmation_params(steam, tag)
         params |= {
             "op": tag,
             "ck": confirmation.nonce,
             "cid": confirmation.id,
         }
-        url = "https://steamcommunity.com/mobileconf/ajaxop"
-        return self._steam._session.get(url, params=params).json()
-
-    def _create_confirmation_params(self, tag_string: str) -> Dict[str, str]:
-        timestamp = int(time.time())
-        android_id = self._steam.guard.generate_device_id()
-        confirmation_key = self._steam.guard.generate_confirmation_key(
-            tag_string, timestamp
-        )
+        return params
+
+    @classmethod
+    def _send_confirmations_data(
+        cls, steam: "pysaw.Steam", confirmations: List[Confirmation], allow: bool
+    ) -> Dict[str, str | List[str]]:
+        tag = ConfirmationTag.ALLOW.value if allow else ConfirmationTag.CANCEL.value
+        data = cls._create_confirmation_params(steam, tag)
+        data |= {
+            "op": tag,
+            "cid[]": [confirmation.id for confirmation in confirmations],
+            "ck[]": [confirmation.nonce for confirmation in confirmations],
+        }
+        return data
+
+    @staticmethod
+    def _create_confirmation_params(
+        steam: "pysaw.Steam", tag_string: str
+    ) -> Dict[str, str]:
+        timestamp = steam.guard.server_time()
+        android_id = steam.guard.device_id
+        confirmation_key = steam.guard.generate_confirmation_key(tag_string, timestamp)
         return {
             "p": android_id,
-            "a": self._steam.steamid,
+            "a": steam.steamid,
             "k": confirmation_key,
             "t": timestamp,
             "m": "android",
             "tag": tag_string,
         }
+
+
+class AsyncConfirmationExecutor(ConfirmationExecutor):
+    # Requests are built and parsed by `ConfirmationExecutor`, only sending them
+    # (after syncing the clock if it's stale) differs
+    @login_required
+    @instrumented("fetch_confirmations")
+    async def fetch_confirmations(self) -> List[Confirmation]:
+        await self._steam.guard.sync_time_if_stale()
+        response = await self._send(self._fetch_confirmations_request())
+
+        return self._parse_confirmations(decode_response(response))
+
+    @login_required
+    @instrumented("send_confirmation")
+    async def send_confirmation(
+        self, confirmation: Confirmation, allow: bool = True
+    ) -> dict:
+        await self._steam.guard.sync_time_if_stale()
+        request = self._send_confirmation_request(confirmation, allow)
+        return decode_response(await self._send(request))
+
+    @login_required
+    @instrumented("send_confirmations")
+    async def send_confirmations(
+        self,
+        confirmations: Iterable[Confirmation],
+        allow: bool = True,
+        chunk_size: int = 50,
+    ) -> Dict[str, bool]:
+        results = {}
+        for chunk in n_elements_per_call(confirmations, chunk_size):
+            await self._steam.guard.sync_time_if_stale()
+            response = await self._send(self._send_confirmations_request(chunk, allow))
+            success = self._was_successful(response)
+            for confirmation in chunk:
+                results[confirmation.id] = success
+
+        return results
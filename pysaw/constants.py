@@ -73,3 +73,31 @@ class ConfirmationTag(enum.StrEnum):
 # integer instead of a float (for example when creating a sell order on the market), so
 # multiplying the price by 100 will give us the price Steam wants.
 STEAM_FACTOR = 100
+
+# Most apps `appdetails` is asked for at once, Steam tends to error out above this
+MAX_APPDETAILS_CHUNK_SIZE = 500
+
+
+# `RateLimiter` rules to opt into, "host/path" prefix -> (requests per second, burst).
+# Steam doesn't publish its limits, these are on the safe side of what has been
+# observed to trigger 429s from a single IP.
+DEFAULT_RATE_LIMITS = {
+    "steamcommunity.com/market/priceoverview": (20 / 60, 5),
+    "steamcommunity.com/market/pricehistory": (20 / 60, 5),
+    "steamcommunity.com/inventory/": (15 / 60, 3),
+    "steamcommunity.com/market/sellitem/": (1, 3),
+    "steamcommunity.com/mobileconf/": (1, 5),
+}
+
+
+# Default `ResponseCache` TTLs in seconds, endpoints that aren't listed aren't cached
+DEFAULT_CACHE_TTLS = {
+    "fetch_price": 5 * 60,
+    "fetch_price_history": 60 * 60,
+    "fetch_app_price_many": 60 * 60,
+    "fetch_app_packages": 24 * 60 * 60,
+    "fetch_app_trading_cards": 7 * 24 * 60 * 60,
+}
+
+# Upper bounds (in seconds) of the request latency histogram kept by `Metrics`
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
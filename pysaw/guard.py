@@ -8,25 +8,48 @@ from hashlib import sha1
 from typing import TYPE_CHECKING
 
 from . import models
-
+from .utils import decode_response
 
 if TYPE_CHECKING:
     import pysaw
 
 
 class SteamGuard(models.PysawBase):
-    def __init__(self, steam: "pysaw.Steam", steam_guard_path: str | None) -> None:
+    def __init__(
+        self,
+        steam: "pysaw.Steam",
+        steam_guard_path: str | None,
+        time_sync_interval: float | None = None,
+    ) -> None:
         super().__init__(steam)
         self.guard = self._load_steam_guard_file(steam_guard_path)
+        self._device_id = self.guard.get("device_id")
+        self._shared_hmac = None
+        self._identity_hmac = None
+        self._code_cache = (None, "")  # (30 seconds window, code)
+
+        # Codes and confirmation keys are only valid for Steam's clock. When
+        # `time_sync_interval` is set, the offset between our clock and Steam's is
+        # refreshed every `time_sync_interval` seconds.
+        self.time_sync_interval = time_sync_interval
+        self.time_offset = 0.0
+        self._last_time_sync = None
 
     def generate_one_time_code(self, timestamp: int = None) -> str:
         if timestamp is None:
-            timestamp = int(time.time())
-        shared_secret = self.guard["shared_secret"]
-        time_buffer = struct.pack(">Q", timestamp // 30)  # pack as Big endian, uint64
-        time_hmac = hmac.new(
-            base64.b64decode(shared_secret), time_buffer, digestmod=sha1
-        ).digest()
+            timestamp = self.server_time()
+
+        window = timestamp // 30
+        cached_window, cached_code = self._code_cache
+        if window == cached_window:
+            return cached_code
+
+        if self._shared_hmac is None:
+            shared_secret = base64.b64decode(self.guard["shared_secret"])
+            self._shared_hmac = hmac.new(shared_secret, digestmod=sha1)
+        time_hmac = self._shared_hmac.copy()
+        time_hmac.update(struct.pack(">Q", window))  # pack as Big endian, uint64
+        time_hmac = time_hmac.digest()
         begin = ord(time_hmac[19:20]) & 0xF
         full_code = (
             struct.unpack(">I", time_hmac[begin : begin + 4])[0] & 0x7FFFFFFF
@@ -38,24 +61,85 @@ class SteamGuard(models.PysawBase):
             full_code, i = divmod(full_code, len(chars))
             code += chars[i]
 
+        self._code_cache = (window, code)
         return code
 
     def generate_confirmation_key(self, tag: str, timestamp: int = None) -> str:
         if timestamp is None:
-            timestamp = int(time.time())
-        identity_secret = self.guard["identity_secret"]
-        buffer = struct.pack(">Q", timestamp) + tag.encode("ascii")
-        return base64.b64encode(
-            hmac.new(base64.b64decode(identity_secret), buffer, digestmod=sha1).digest()
-        ).decode("ascii")
+            timestamp = self.server_time()
+        if self._identity_hmac is None:
+            identity_secret = base64.b64decode(self.guard["identity_secret"])
+            self._identity_hmac = hmac.new(identity_secret, digestmod=sha1)
+        key_hmac = self._identity_hmac.copy()
+        key_hmac.update(struct.pack(">Q", timestamp) + tag.encode("ascii"))
+        return base64.b64encode(key_hmac.digest()).decode("ascii")
+
+    def server_time(self) -> int:
+        self.sync_time_if_stale()
+        return int(time.time() + self.time_offset)
+
+    def sync_time(self) -> float:
+        sent_at = time.time()
+        response = self._send(self._query_time_request())
+        return self._set_time_offset(decode_response(response), sent_at)
+
+    def sync_time_if_stale(self) -> None:
+        if self._is_time_stale():
+            self.sync_time()
+
+    @property
+    def device_id(self) -> str:
+        # Steam expects the same device id on every confirmation request, use the
+        # one from the maFile if there is one, otherwise generate one and stick to it
+        if self._device_id is None:
+            self._device_id = self.generate_device_id()
+        return self._device_id
 
     @staticmethod
     def generate_device_id() -> str:
         return "android:" + str(uuid.uuid4())
 
+    @staticmethod
+    def _query_time_request() -> models.Request:
+        url = "https://api.steampowered.com/ITwoFactorService/QueryTime/v1/"
+        return models.Request("POST", url)
+
+    def _is_time_stale(self) -> bool:
+        if self.time_sync_interval is None:
+            return False
+        return (
+            self._last_time_sync is None
+            or time.time() - self._last_time_sync > self.time_sync_interval
+        )
+
+    def _set_time_offset(self, response_json: dict, sent_at: float) -> float:
+        # Assume Steam read its clock halfway through the round trip
+        received_at = time.time()
+        server_time = int(response_json["response"]["server_time"])
+        self.time_offset = server_time - (sent_at + received_at) / 2
+        self._last_time_sync = received_at
+        return self.time_offset
+
     @staticmethod
     def _load_steam_guard_file(steam_guard_path: str | None) -> dict:
         if steam_guard_path is None:
             return {}
         with open(steam_guard_path, "r") as f:
             return json.load(f)
+
+
+class AsyncSteamGuard(SteamGuard):
+    # The clock can't be synced from `server_time()` without blocking the event
+    # loop, `AsyncSteam` awaits `sync_time_if_stale()` before the calls that need
+    # the server's time instead.
+    def server_time(self) -> int:
+        return int(time.time() + self.time_offset)
+
+    async def sync_time(self) -> float:
+        sent_at = time.time()
+        response = await self._send(self._query_time_request())
+        return self._set_time_offset(decode_response(response), sent_at)
+
+    async def sync_time_if_stale(self) -> None:
+        if self._is_time_stale():
+            await self.sync_time()
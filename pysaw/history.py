@@ -0,0 +1,242 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .utils import run_concurrently
+
+if TYPE_CHECKING:
+    import pysaw
+
+_MONTHS = {
+    "Jan": "01",
+    "Feb": "02",
+    "Mar": "03",
+    "Apr": "04",
+    "May": "05",
+    "Jun": "06",
+    "Jul": "07",
+    "Aug": "08",
+    "Sep": "09",
+    "Oct": "10",
+    "Nov": "11",
+    "Dec": "12",
+}
+
+
+class PriceHistory:
+    # Price history of a market item as NumPy arrays: hourly `timestamps`
+    # (datetime64[h], UTC), `prices` (float64, median sale price of that hour/day)
+    # and `volumes` (int64, units sold). Steam gives hourly points for the last
+    # month and daily points before that.
+    def __init__(self, timestamps: np.ndarray, prices: np.ndarray, volumes: np.ndarray):
+        self.timestamps = timestamps
+        self.prices = prices
+        self.volumes = volumes
+
+    @classmethod
+    def from_json(cls, response_json: dict) -> "PriceHistory":
+        # Every point looks like ["Jul 02 2014 01: +0", 417.777, "40"]
+        points = response_json.get("prices") or []
+        isoformat = []
+        for date, _, _ in points:
+            month, day, year, hour = date.split(" ", 4)[:4]
+            isoformat.append(f"{year}-{_MONTHS[month]}-{day}T{hour[:2]}")
+
+        return cls(
+            np.array(isoformat, dtype="datetime64[h]"),
+            np.array([p[1] for p in points], dtype=np.float64),
+            np.array([p[2] for p in points]).astype(np.int64),
+        )
+
+    def between(
+        self, start: str | np.datetime64 = None, end: str | np.datetime64 = None
+    ) -> "PriceHistory":
+        # Points in [start, end), either end can be left open
+        lo = (
+            0
+            if start is None
+            else np.searchsorted(self.timestamps, np.datetime64(start, "h"))
+        )
+        hi = (
+            len(self)
+            if end is None
+            else np.searchsorted(self.timestamps, np.datetime64(end, "h"))
+        )
+        return PriceHistory(
+            self.timestamps[lo:hi], self.prices[lo:hi], self.volumes[lo:hi]
+        )
+
+    def resample(self, unit: str = "D") -> "PriceHistory":
+        # One point per `unit` ("h", "D", "W", "M", ...) with the volume weighted
+        # price and the total volume of the points that fall in it
+        buckets, inverse = np.unique(
+            self.timestamps.astype(f"datetime64[{unit}]"), return_inverse=True
+        )
+        volumes = np.bincount(inverse, weights=self.volumes, minlength=len(buckets))
+        turnover = np.bincount(
+            inverse, weights=self.prices * self.volumes, minlength=len(buckets)
+        )
+        means = np.bincount(
+            inverse, weights=self.prices, minlength=len(buckets)
+        ) / np.bincount(inverse, minlength=len(buckets))
+        # Buckets without sales fall back to the plain mean of their prices
+        prices = np.divide(turnover, volumes, out=means, where=volumes > 0)
+        return PriceHistory(
+            buckets.astype("datetime64[h]"), prices, volumes.astype(np.int64)
+        )
+
+    def vwap(self) -> float:
+        total = self.volumes.sum()
+        if not total:
+            return float("nan")
+        return float((self.prices * self.volumes).sum() / total)
+
+    def rolling_median(self, window: int) -> np.ndarray:
+        # Median of every `window` consecutive points, aligned with the last point
+        # of each window (so it has `window - 1` fewer elements)
+        return np.median(self._windows(window), axis=1)
+
+    def percentile_bands(
+        self, window: int, q: Tuple[float, float] = (10, 90)
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        lower, upper = np.percentile(self._windows(window), q, axis=1)
+        return lower, upper
+
+    def _windows(self, window: int) -> np.ndarray:
+        if len(self) < window:
+            return np.empty((0, window))
+        return np.lib.stride_tricks.sliding_window_view(self.prices, window)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "%s(num_points=0)" % self.__class__.__name__
+        return "%s(num_points=%d, start=%s, end=%s)" % (
+            self.__class__.__name__,
+            len(self),
+            self.timestamps[0],
+            self.timestamps[-1],
+        )
+
+
+class PriceHistoryStore:
+    # Price histories stored in a SQLite file, keyed by (appid, market_hash_name),
+    # so they can be queried without going through the network. Steam always sends
+    # the whole history, refreshing an item only writes the points that are newer
+    # than the last stored one (which is rewritten, as it could have been partial).
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            "appid TEXT NOT NULL, market_hash_name TEXT NOT NULL, "
+            "hour INTEGER NOT NULL, price REAL NOT NULL, volume INTEGER NOT NULL, "
+            "PRIMARY KEY (appid, market_hash_name, hour)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def update(self, appid: str, market_hash_name: str, history: PriceHistory) -> int:
+        # Merges `history` into the store, returns how many points were written
+        hours = history.timestamps.astype(np.int64)
+        with self._lock:
+            (last_hour,) = self._db.execute(
+                "SELECT MAX(hour) FROM points WHERE appid = ? AND market_hash_name = ?",
+                (appid, market_hash_name),
+            ).fetchone()
+            new = slice(None) if last_hour is None else hours >= last_hour
+            rows = zip(
+                hours[new].tolist(),
+                history.prices[new].tolist(),
+                history.volumes[new].tolist(),
+            )
+            cursor = self._db.executemany(
+                "INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?, ?)",
+                ((appid, market_hash_name, *row) for row in rows),
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+    def refresh(
+        self, market: "pysaw.market.SteamMarket", appid: str, market_hash_name: str
+    ) -> int:
+        history = market.fetch_parsed_price_history(appid, market_hash_name)
+        return self.update(appid, market_hash_name, history)
+
+    def refresh_many(
+        self,
+        market: "pysaw.market.SteamMarket",
+        appid: str,
+        market_hash_names: Iterable[str],
+        max_workers: int = 4,
+    ) -> Dict[str, int | Exception]:
+        # Returns how many points were written per item, or the exception raised
+        # while refreshing it
+        def refresh(market_hash_name: str) -> int:
+            return self.refresh(market, appid, market_hash_name)
+
+        return dict(run_concurrently(refresh, market_hash_names, max_workers))
+
+    def load(
+        self,
+        appid: str,
+        market_hash_name: str,
+        start: str | np.datetime64 = None,
+        end: str | np.datetime64 = None,
+    ) -> PriceHistory:
+        return self.load_many(appid, [market_hash_name], start, end)[market_hash_name]
+
+    def load_many(
+        self,
+        appid: str,
+        market_hash_names: Iterable[str],
+        start: str | np.datetime64 = None,
+        end: str | np.datetime64 = None,
+    ) -> Dict[str, PriceHistory]:
+        # Points in [start, end) of every item, items that aren't stored get an
+        # empty history
+        market_hash_names = list(market_hash_names)
+        lo = (
+            -(2**63)
+            if start is None
+            else int(np.datetime64(start, "h").astype(np.int64))
+        )
+        hi = 2**63 - 1 if end is None else int(np.datetime64(end, "h").astype(np.int64))
+        with self._lock:
+            self._db.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (name TEXT)")
+            self._db.execute("DELETE FROM wanted")
+            self._db.executemany(
+                "INSERT INTO wanted VALUES (?)", ((n,) for n in market_hash_names)
+            )
+            rows = self._db.execute(
+                "SELECT market_hash_name, hour, price, volume FROM points "
+                "WHERE appid = ? AND market_hash_name IN (SELECT name FROM wanted) "
+                "AND hour >= ? AND hour < ? ORDER BY market_hash_name, hour",
+                (appid, lo, hi),
+            ).fetchall()
+
+        histories = {}
+        empty = np.empty(0, dtype=np.int64)
+        for name in market_hash_names:
+            histories[name] = PriceHistory(
+                empty.astype("datetime64[h]"), empty.astype(np.float64), empty
+            )
+        if not rows:
+            return histories
+
+        names, hours, prices, volumes = zip(*rows)
+        names = np.array(names, dtype=object)
+        # Rows are sorted by name, split them wherever the name changes
+        bounds = np.flatnonzero(names[1:] != names[:-1]) + 1
+        hours = np.array(hours, dtype=np.int64).astype("datetime64[h]")
+        prices = np.array(prices, dtype=np.float64)
+        volumes = np.array(volumes, dtype=np.int64)
+        for lo, hi in zip([0, *bounds], [*bounds, len(names)]):
+            histories[names[lo]] = PriceHistory(
+                hours[lo:hi], prices[lo:hi], volumes[lo:hi]
+            )
+
+        return histories
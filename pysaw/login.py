@@ -1,12 +1,17 @@
 import base64
-from typing import Tuple, TYPE_CHECKING
+import asyncio
+import json
+import os
+import urllib.parse
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
 import rsa
 
-from .models import PysawBase
-
+from .models import PysawBase, Request
+from .utils import decode_response
 
 if TYPE_CHECKING:
+    import httpx
     import pysaw
     import requests
 
@@ -31,24 +36,95 @@ class LoginExecutor(PysawBase):
         self._set_tokens(finalize_login_response)
         self._set_sessionid_cookies()
 
+    def refresh(self) -> bool:
+        # Gets new access tokens (and cookies) from the refresh token, skipping the
+        # credentials and steam guard steps. Returns False if the refresh token was
+        # rejected, only a full `login()` works then.
+        if not self.refresh_token:
+            return False
+
+        response = self._send(self._refresh_request())
+        access_token = self._parse_refreshed_access_token(response)
+        if access_token is None:
+            return False
+
+        response_json = decode_response(self._finalize_login(self.refresh_token))
+        if "transfer_info" not in response_json:
+            return False
+
+        self.access_token = access_token
+        for request in self._transfer_requests(response_json):
+            self._send(request)
+        self._set_sessionid_cookies()
+        self._steam._sessionid = ""
+        return True
+
+    def _refresh_request(self) -> Request:
+        url = "https://api.steampowered.com/IAuthenticationService/GenerateAccessTokenForApp/v1"
+        data = {"refresh_token": self.refresh_token, "steamid": self._steam.steamid}
+        return Request("POST", url, data=data)
+
+    @staticmethod
+    def _parse_refreshed_access_token(response) -> Optional[str]:
+        if response.status_code != 200:
+            return None
+        try:
+            return decode_response(response)["response"]["access_token"]
+        except (ValueError, KeyError):
+            return None
+
+    def session_expiry(self) -> Optional[float]:
+        # Unix time at which the first of the tokens we hold stops working, None if
+        # we don't know (e.g. no session yet, or tokens that aren't JWTs)
+        cookie = self._steam._session.cookies.get(
+            "steamLoginSecure", domain="steamcommunity.com"
+        )
+        _, _, cookie_token = urllib.parse.unquote(cookie or "").partition("||")
+        expiries = [
+            expiry
+            for expiry in map(self._token_expiry, (self.access_token, cookie_token))
+            if expiry is not None
+        ]
+        return min(expiries, default=None)
+
+    @staticmethod
+    def _token_expiry(token: str) -> Optional[float]:
+        # Steam's tokens are JWTs, the expiry is the "exp" field of the payload
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+        except (IndexError, ValueError, KeyError, TypeError):
+            return None
+
     def _begin_auth_session(self) -> "requests.Response":
         rsa_key, rsa_timestamp = self._get_rsa_public_key()
-        encrypted_password = self._encrypt_password(rsa_key)
+        return self._send(self._begin_auth_session_request(rsa_key, rsa_timestamp))
+
+    def _begin_auth_session_request(
+        self, rsa_key: rsa.PublicKey, rsa_timestamp: int
+    ) -> Request:
         request_data = {
             "persistence": 1,
-            "encrypted_password": encrypted_password,
+            "encrypted_password": self._encrypt_password(rsa_key),
             "encryption_timestamp": rsa_timestamp,
             "account_name": self._steam._username,
         }
         url = "https://api.steampowered.com/IAuthenticationService/BeginAuthSessionViaCredentials/v1"
-        return self._steam._session.post(url, data=request_data)
+        return Request("POST", url, data=request_data)
 
     def _get_rsa_public_key(self) -> Tuple[rsa.PublicKey, int]:
+        response = self._send(self._rsa_public_key_request())
+
+        return self._parse_rsa_public_key(decode_response(response))
+
+    def _rsa_public_key_request(self) -> Request:
         params = {"account_name": self._steam._username}
         url = "https://api.steampowered.com/IAuthenticationService/GetPasswordRSAPublicKey/v1"
-        response = self._steam._session.get(url, params=params)
-        response_json = response.json()
+        return Request("GET", url, params=params)
 
+    @staticmethod
+    def _parse_rsa_public_key(response_json: dict) -> Tuple[rsa.PublicKey, int]:
         rsa_mod = int(response_json["response"]["publickey_mod"], 16)
         rsa_exp = int(response_json["response"]["publickey_exp"], 16)
         rsa_timestamp = response_json["response"]["timestamp"]
@@ -59,10 +135,14 @@ class LoginExecutor(PysawBase):
     def _update_auth_session_with_guard_code(
         self, begin_auth_session_response: "requests.Response"
     ) -> str:
-        response_json = begin_auth_session_response.json()
+        response_json = decode_response(begin_auth_session_response)
+        self._send(self._guard_code_request(response_json))
+
         client_id = response_json["response"]["client_id"]
-        steamid = response_json["response"]["steamid"]
         request_id = response_json["response"]["request_id"]
+        return self._poll_auth_session(client_id, request_id)
+
+    def _guard_code_request(self, response_json: dict) -> Request:
         code_type = response_json["response"]["allowed_confirmations"][0][
             "confirmation_type"
         ]
@@ -71,49 +151,63 @@ class LoginExecutor(PysawBase):
         # TODO: what happens if we enter wrong credentials?
         code = self._steam.guard.generate_one_time_code()
         data = {
-            "client_id": client_id,
-            "steamid": steamid,
+            "client_id": response_json["response"]["client_id"],
+            "steamid": response_json["response"]["steamid"],
             "code_type": code_type,
             "code": code,
         }
-        self._steam._session.post(
-            "https://api.steampowered.com/IAuthenticationService/UpdateAuthSessionWithSteamGuardCode/v1",
-            data=data,
-        )
-
-        return self._poll_auth_session(client_id, request_id)
+        url = "https://api.steampowered.com/IAuthenticationService/UpdateAuthSessionWithSteamGuardCode/v1"
+        return Request("POST", url, data=data)
 
     def _poll_auth_session(self, client_id: str, request_id: str) -> None:
+        response = self._send(self._poll_auth_session_request(client_id, request_id))
+        self._set_auth_tokens(decode_response(response))
+
+    @staticmethod
+    def _poll_auth_session_request(client_id: str, request_id: str) -> Request:
         data = {"client_id": client_id, "request_id": request_id}
-        response = self._steam._session.post(
-            "https://api.steampowered.com/IAuthenticationService/PollAuthSessionStatus/v1",
-            data=data,
-        )
-        response_json = response.json()
+        url = "https://api.steampowered.com/IAuthenticationService/PollAuthSessionStatus/v1"
+        return Request("POST", url, data=data)
+
+    def _set_auth_tokens(self, response_json: dict) -> None:
         self.refresh_token = response_json["response"]["refresh_token"]
         self.access_token = response_json["response"]["access_token"]
 
     def _finalize_login(self, refresh_token: str) -> "requests.Response":
+        return self._send(self._finalize_login_request(refresh_token))
+
+    @staticmethod
+    def _finalize_login_request(refresh_token: str) -> Request:
         redir_url = "https://steamcommunity.com/login/home?goto="
         data = {"nonce": refresh_token, "redir": redir_url}
-        response = self._steam._session.post(
-            "https://login.steampowered.com/jwt/finalizelogin", data=data
+        return Request(
+            "POST", "https://login.steampowered.com/jwt/finalizelogin", data=data
         )
-        return response
 
-    def _encrypt_password(self, rsa_key: rsa.PublicKey) -> bytes:
+    def _encrypt_password(self, rsa_key: rsa.PublicKey) -> str:
+        # A str and not bytes, since `httpx` sends bytes form values as their repr
+        # (e.g. "b'...'") instead of their contents
         password = self._steam._password
-        return base64.b64encode(rsa.encrypt(password.encode("utf-8"), rsa_key))
+        encrypted = rsa.encrypt(password.encode("utf-8"), rsa_key)
+        return base64.b64encode(encrypted).decode()
 
     def _set_tokens(self, finalize_login_response: "requests.Response") -> None:
-        response_json = finalize_login_response.json()
-        data = {"steamID": response_json["steamID"], "nonce": None, "auth": None}
+        response_json = decode_response(finalize_login_response)
+        for request in self._transfer_requests(response_json):
+            self._send(request)
 
+    @staticmethod
+    def _transfer_requests(response_json: dict) -> List[Request]:
+        transfers = []
         for site in response_json["transfer_info"]:
-            url = site["url"]
-            data["nonce"] = site["params"]["nonce"]
-            data["auth"] = site["params"]["auth"]
-            self._steam._session.post(url, data=data)
+            data = {
+                "steamID": response_json["steamID"],
+                "nonce": site["params"]["nonce"],
+                "auth": site["params"]["auth"],
+            }
+            transfers.append(Request("POST", site["url"], data=data))
+
+        return transfers
 
     def _set_sessionid_cookies(self) -> None:
         # After calling `self._set_tokens()`, only help.steampowered.com gives
@@ -130,3 +224,120 @@ class LoginExecutor(PysawBase):
         )
         for domain in domains:
             self._steam._session.cookies.set("sessionid", sessionid, domain=domain)
+
+    def save_session(self, path: str) -> None:
+        # Everything needed to skip `login()` on the next start. The file gives full
+        # access to the account, so it's only readable by its owner.
+        cookies = self._steam._session.cookies
+        session = {
+            "steamid": self._steam.steamid,
+            "refresh_token": self.refresh_token,
+            "access_token": self.access_token,
+            "cookies": [
+                {
+                    "name": cookie.name,
+                    "value": cookie.value,
+                    "domain": cookie.domain,
+                    "path": cookie.path,
+                }
+                # `httpx` wraps its `http.cookiejar.CookieJar`, `requests` extends it
+                for cookie in getattr(cookies, "jar", cookies)
+            ],
+        }
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # The mode above only applies to new files, existing ones are made private too
+        os.fchmod(fd, 0o600)
+        with open(fd, "w") as f:
+            json.dump(session, f)
+
+    def load_session(self, path: str) -> bool:
+        # Returns False if there's no usable session stored at `path` (missing,
+        # corrupt or not what `save_session()` writes), leaving the client untouched
+        try:
+            with open(path, "r") as f:
+                session = json.load(f)
+            refresh_token = session["refresh_token"]
+            access_token = session["access_token"]
+            steamid = session["steamid"]
+            cookies = [
+                (cookie["name"], cookie["value"], cookie["domain"], cookie["path"])
+                for cookie in session["cookies"]
+            ]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        self.refresh_token = refresh_token
+        self.access_token = access_token
+        self._steam._steamid = steamid
+        self._steam._sessionid = ""
+        for name, value, domain, cookie_path in cookies:
+            self._steam._session.cookies.set(
+                name, value, domain=domain, path=cookie_path
+            )
+        return True
+
+
+class AsyncLoginExecutor(LoginExecutor):
+    # Only the methods that go through the network are redefined, cookie handling
+    # works the same way on `httpx` and `requests` sessions.
+    async def login(self) -> None:
+        await self._steam.guard.sync_time_if_stale()
+        begin_auth_session_response = await self._begin_auth_session()
+        await self._update_auth_session_with_guard_code(begin_auth_session_response)
+        finalize_login_response = await self._finalize_login(self.refresh_token)
+        await self._set_tokens(finalize_login_response)
+        self._set_sessionid_cookies()
+
+    async def refresh(self) -> bool:
+        if not self.refresh_token:
+            return False
+
+        response = await self._send(self._refresh_request())
+        access_token = self._parse_refreshed_access_token(response)
+        if access_token is None:
+            return False
+
+        response_json = decode_response(await self._finalize_login(self.refresh_token))
+        if "transfer_info" not in response_json:
+            return False
+
+        self.access_token = access_token
+        transfers = self._transfer_requests(response_json)
+        await asyncio.gather(*map(self._send, transfers))
+        self._set_sessionid_cookies()
+        self._steam._sessionid = ""
+        return True
+
+    async def _begin_auth_session(self) -> "httpx.Response":
+        rsa_key, rsa_timestamp = await self._get_rsa_public_key()
+        return await self._send(
+            self._begin_auth_session_request(rsa_key, rsa_timestamp)
+        )
+
+    async def _get_rsa_public_key(self) -> Tuple[rsa.PublicKey, int]:
+        response = await self._send(self._rsa_public_key_request())
+
+        return self._parse_rsa_public_key(decode_response(response))
+
+    async def _update_auth_session_with_guard_code(
+        self, begin_auth_session_response: "httpx.Response"
+    ) -> None:
+        response_json = decode_response(begin_auth_session_response)
+        await self._send(self._guard_code_request(response_json))
+
+        client_id = response_json["response"]["client_id"]
+        request_id = response_json["response"]["request_id"]
+        await self._poll_auth_session(client_id, request_id)
+
+    async def _poll_auth_session(self, client_id: str, request_id: str) -> None:
+        response = await self._send(
+            self._poll_auth_session_request(client_id, request_id)
+        )
+        self._set_auth_tokens(decode_response(response))
+
+    async def _finalize_login(self, refresh_token: str) -> "httpx.Response":
+        return await self._send(self._finalize_login_request(refresh_token))
+
+    async def _set_tokens(self, finalize_login_response: "httpx.Response") -> None:
+        transfers = self._transfer_requests(decode_response(finalize_login_response))
+        await asyncio.gather(*map(self._send, transfers))
@@ -1,92 +1,415 @@
-from typing import Tuple, List, Dict, TYPE_CHECKING
+import asyncio
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    Tuple,
+    List,
+    Dict,
+)
 
-from .models import MarketListing, Inventory, Item, PysawBase
-from .utils import formatted_to_float, login_required
+import httpx
+import requests
+
+from .exceptions import TransactionError
+from .models import (
+    MarketListing,
+    Inventory,
+    Confirmation,
+    Item,
+    PysawBase,
+    Request,
+    SellOrderResult,
+)
+from .cache import cached
+from .metrics import instrumented
+from .history import PriceHistory
+from .utils import (
+    formatted_to_float,
+    login_required,
+    run_concurrently,
+    arun_concurrently,
+    decode_response,
+    iter_json_members,
+    aiter_json_members,
+    STREAM_CHUNK_SIZE,
+)
 from .constants import MarketListingStatus, CountryCurrency, STEAM_FACTOR
 
+# Inventory page members that are parsed one element at a time
+_INVENTORY_STREAM_KEYS = ("assets", "descriptions")
+
+
+class _InventoryPage:
+    # Builds the items of an inventory page from its members, as `JsonStream` gives
+    # them with "assets" and "descriptions" streamed. Descriptions come after the
+    # assets, so items get their market_hash_name once the whole page has been read.
+    # Empty pages don't have "assets" nor "descriptions".
+    def __init__(self):
+        self.items = []
+        self.description_to_mkth_map = {}
+        self.more_items = False
+        self.last_assetid = None
+
+    def add(self, key: str, value: Any) -> None:
+        if key == "assets":
+            item = Item(
+                appid=value["appid"],
+                contextid=value["contextid"],
+                assetid=value["assetid"],
+                classid=value["classid"],
+                instanceid=value["instanceid"],
+            )
+            self.items.append(item)
+        elif key == "descriptions":
+            desc_key = value["classid"] + "_" + value["instanceid"]
+            self.description_to_mkth_map[desc_key] = value["market_hash_name"]
+        elif key == "more_items":
+            self.more_items = bool(value)
+        elif key == "last_assetid":
+            self.last_assetid = value
 
-if TYPE_CHECKING:
-    import requests
+    def finish(self) -> Tuple[List[Item], str | None]:
+        # The items and the assetid the next page starts from, None if this is the
+        # last page
+        for item in self.items:
+            key = item.classid + "_" + item.instanceid
+            item.market_hash_name = self.description_to_mkth_map[key]
+        return self.items, self.last_assetid if self.more_items else None
 
 
 class SteamMarket(PysawBase):
+    # What a failed connection raises, sell orders that hit it are sent again
+    _network_errors = requests.RequestException
+
     @login_required
-    def fetch_my_market_listings(self, start=0) -> Tuple[List[MarketListing]]:
-        url = "https://steamcommunity.com/market/mylistings/"
-        params = {"count": 100, "norender": 1, "start": start}
-        response = self._steam._session.get(url, params=params)
-        response_json = response.json()
+    @instrumented("fetch_my_market_listings")
+    def fetch_my_market_listings(
+        self, start: int = 0, max_workers: int = 1
+    ) -> Tuple[List[MarketListing]]:
+        listings, listings_on_hold, listings_to_confirm = [], [], []
+        by_status = {
+            MarketListingStatus.ACTIVE: listings,
+            MarketListingStatus.ON_HOLD: listings_on_hold,
+            MarketListingStatus.TO_CONFIRM: listings_to_confirm,
+        }
+        for listing in self.iter_my_market_listings(start, max_workers):
+            by_status[listing.status].append(listing)
 
-        listings = self._parse_listings(
-            response_json["listings"], MarketListingStatus.ACTIVE
-        )
-        listings_on_hold = self._parse_listings(
-            response_json["listings_on_hold"], MarketListingStatus.ON_HOLD
+        return listings, listings_on_hold, listings_to_confirm
+
+    @login_required
+    def iter_my_market_listings(
+        self, start: int = 0, max_workers: int = 1
+    ) -> Iterator[MarketListing]:
+        # Listings come in pages of 100. With `max_workers` > 1, the first page tells
+        # us how many listings there are and the rest of the pages are requested
+        # concurrently (yielded in the order they arrive).
+        response_json = self._fetch_my_listings_page(start)
+        seen = set()
+        yield from self._new_listings(response_json, seen)
+
+        if max_workers > 1:
+            starts = range(start + 100, response_json["num_active_listings"], 100)
+            pages = run_concurrently(self._fetch_my_listings_page, starts, max_workers)
+            for _, response_json in pages:
+                if isinstance(response_json, Exception):
+                    raise response_json
+                yield from self._new_listings(response_json, seen)
+            return
+
+        while start + 100 < response_json["num_active_listings"]:
+            start += 100
+            response_json = self._fetch_my_listings_page(start)
+            yield from self._new_listings(response_json, seen)
+
+    @login_required
+    @instrumented("create_sell_order")
+    def create_sell_order(self, item: Item, buyer_pays: float) -> "requests.Response":
+        return self._send(self._sell_order_request(item, buyer_pays))
+
+    @login_required
+    @instrumented("create_sell_orders")
+    def create_sell_orders(
+        self,
+        orders: Iterable[Tuple[Item, float]],
+        max_workers: int = 4,
+        max_retries: int = 2,
+        confirm: bool = True,
+    ) -> List[SellOrderResult]:
+        # Lists `(item, buyer_pays)` pairs concurrently (paced by the rate limiter),
+        # retrying the ones that failed for reasons that may go away (network
+        # errors, rate limiting, outages) but not the ones Steam refused to list.
+        # Then, if `confirm` is set, accepts the mobile confirmations of the
+        # listings that were just created, and only those.
+        def sell(order: Tuple[Item, float]) -> SellOrderResult:
+            result = SellOrderResult(*order)
+            start = time.perf_counter()
+            while result.attempts <= max_retries:
+                if result.attempts:
+                    time.sleep(2 ** (result.attempts - 1))
+                result.attempts += 1
+                try:
+                    response = self.create_sell_order(*order)
+                except self._network_errors as e:
+                    result.error = e
+                    continue
+                except Exception as e:
+                    result.error = e
+                    break
+                if not self._read_sell_order(result, response):
+                    break
+            result.elapsed = time.perf_counter() - start
+            return result
+
+        results = [result for _, result in run_concurrently(sell, orders, max_workers)]
+        to_confirm = {
+            str(r.item.assetid): r for r in results if r.requires_confirmation
+        }
+        if confirm and to_confirm:
+            self._confirm_sell_orders(to_confirm)
+
+        return results
+
+    @staticmethod
+    def _read_sell_order(result: SellOrderResult, response) -> bool:
+        # Fills `result` in from Steam's answer to a sell order, returns whether it's
+        # worth sending again. A "success" field is Steam's verdict (e.g. a price too
+        # low or an item that can't be sold), which another try won't change.
+        try:
+            response_json = decode_response(response)
+        except ValueError:
+            response_json = None
+        if response.status_code == 429 or not (
+            isinstance(response_json, dict) and "success" in response_json
+        ):
+            result.error = TransactionError(
+                f"Sell order failed with HTTP {response.status_code}"
+            )
+            return True
+
+        result.listed = bool(response_json["success"])
+        result.requires_confirmation = bool(
+            result.listed and response_json.get("requires_confirmation")
         )
-        listings_to_confirm = self._parse_listings(
-            response_json["listings_to_confirm"], MarketListingStatus.TO_CONFIRM
+        result.error = None
+        if not result.listed:
+            message = response_json.get("message") or "Steam refused the sell order"
+            result.error = TransactionError(message)
+        return False
+
+    def _confirm_sell_orders(self, to_confirm: Dict[str, SellOrderResult]) -> None:
+        listingid_to_assetid = self._listings_to_confirm(
+            self._fetch_my_listings_page(0), to_confirm
         )
+        confirmations = [
+            conf
+            for conf in self._steam.confirmator.fetch_confirmations()
+            if conf.creator_id in listingid_to_assetid
+        ]
+        accepted = self._steam.confirmator.send_confirmations(confirmations)
+        self._set_confirmed(to_confirm, listingid_to_assetid, confirmations, accepted)
 
-        if start + 100 < response_json["num_active_listings"]:
-            a, b, c = self.fetch_my_market_listings(start=start + 100)
-            listings += a
-            listings_on_hold += b
-            listings_to_confirm += c
+    @classmethod
+    def _listings_to_confirm(
+        cls, response_json: dict, to_confirm: Dict[str, SellOrderResult]
+    ) -> Dict[str, str]:
+        # Listing id -> asset id of the listings in `to_confirm`. Listings awaiting
+        # confirmation are on every page of mylistings, the first is enough.
+        return {
+            listing.listingid: str(listing.item.assetid)
+            for listing in cls._new_listings(response_json, set())
+            if listing.status is MarketListingStatus.TO_CONFIRM
+            and str(listing.item.assetid) in to_confirm
+        }
 
-        return listings, listings_on_hold, listings_to_confirm
+    @staticmethod
+    def _set_confirmed(
+        to_confirm: Dict[str, SellOrderResult],
+        listingid_to_assetid: Dict[str, str],
+        confirmations: List[Confirmation],
+        accepted: Dict[str, bool],
+    ) -> None:
+        for conf in confirmations:
+            result = to_confirm[listingid_to_assetid[conf.creator_id]]
+            result.confirmed = accepted[conf.id]
 
     @login_required
-    def create_sell_order(self, item: Item, buyer_pays: float) -> "requests.Response":
+    @instrumented("cancel_sell_order")
+    def cancel_sell_order(self, listing: MarketListing) -> "requests.Response":
+        return self._send(self._cancel_sell_order_request(listing))
+
+    @login_required
+    @instrumented("fetch_price_history")
+    @cached("fetch_price_history")
+    def fetch_price_history(self, appid: str, market_hash_name: str) -> dict:
+        response = self._send(self._price_history_request(appid, market_hash_name))
+
+        return decode_response(response)
+
+    @login_required
+    @instrumented("fetch_parsed_price_history")
+    def fetch_parsed_price_history(
+        self, appid: str, market_hash_name: str
+    ) -> PriceHistory:
+        return PriceHistory.from_json(self.fetch_price_history(appid, market_hash_name))
+
+    @instrumented("fetch_price")
+    @cached("fetch_price")
+    def fetch_price(
+        self,
+        appid: str,
+        market_hash_name: str,
+        currency: CountryCurrency = CountryCurrency.ARS,
+    ) -> Dict[str, float | None]:
+        response = self._send(self._price_request(appid, market_hash_name, currency))
+
+        return self._parse_price(decode_response(response))
+
+    def fetch_price_many(
+        self,
+        appid: str,
+        market_hash_names: Iterable[str],
+        currency: CountryCurrency = CountryCurrency.ARS,
+        max_workers: int = 8,
+    ) -> Iterator[Tuple[str, Dict[str, float | None] | Exception]]:
+        # Yields `(market_hash_name, price)` pairs as soon as each request finishes,
+        # `price` is the exception raised by `fetch_price` if that request failed.
+        def fetch(market_hash_name: str) -> Dict[str, float | None]:
+            return self.fetch_price(appid, market_hash_name, currency)
+
+        yield from run_concurrently(fetch, market_hash_names, max_workers)
+
+    @login_required
+    @instrumented("fetch_my_inventory")
+    def fetch_my_inventory(self, appid: str, contextid: str) -> Inventory:
+        return self.fetch_inventory(self._steam.steamid, appid, contextid)
+
+    @instrumented("fetch_inventory")
+    def fetch_inventory(self, steamid: str, appid: str, contextid: str) -> Inventory:
+        return Inventory(self.iter_inventory(steamid, appid, contextid))
+
+    @login_required
+    def iter_my_inventory(
+        self, appid: str, contextid: str, stream: bool = False
+    ) -> Iterator[Item]:
+        return self.iter_inventory(self._steam.steamid, appid, contextid, stream=stream)
+
+    def iter_inventory(
+        self,
+        steamid: str,
+        appid: str,
+        contextid: str,
+        count: int = 5000,
+        stream: bool = False,
+    ) -> Iterator[Item]:
+        # Steam paginates inventories, only one page is kept in memory at a time.
+        # With `stream`, pages are parsed as they download instead of being decoded
+        # whole: that takes a fraction of the memory for big pages, but more CPU
+        # time, since it can't use the JSON backend (e.g. orjson).
+        request = self._inventory_request(steamid, appid, contextid, count)
+        while True:
+            if stream:
+                items, last_assetid = self._fetch_inventory_page_streamed(request)
+            else:
+                items, last_assetid = self._fetch_inventory_page(request)
+            yield from items
+
+            if last_assetid is None:
+                return
+            request = self._next_inventory_request(request, last_assetid)
+
+    def _fetch_inventory_page(self, request: Request) -> Tuple[List[Item], str | None]:
+        response = self._send(request)
+        response.raise_for_status()  # e.g. a 403 for private inventories
+        return self._parse_inventory_page(self._inventory_page_json(response))
+
+    def _fetch_inventory_page_streamed(
+        self, request: Request
+    ) -> Tuple[List[Item], str | None]:
+        session = self._steam._session
+        with session.get(request.url, params=request.params, stream=True) as response:
+            response.raise_for_status()
+            chunks = response.iter_content(STREAM_CHUNK_SIZE)
+            members = iter_json_members(chunks, _INVENTORY_STREAM_KEYS)
+            return self._parse_inventory_members(members)
+
+    def _fetch_my_listings_page(self, start: int) -> dict:
+        response = self._send(self._my_listings_request(start))
+
+        return decode_response(response)
+
+    @staticmethod
+    def _my_listings_request(start: int) -> Request:
+        url = "https://steamcommunity.com/market/mylistings/"
+        return Request("GET", url, params={"count": 100, "norender": 1, "start": start})
+
+    def _sell_order_request(self, item: Item, buyer_pays: float) -> Request:
         url = "https://steamcommunity.com/market/sellitem/"
         headers = {
             "Referer": f"https://steamcommunity.com/profiles/{self._steam.steamid}/inventory/"
         }
         data = {
-            "sessionid": self._steam._sessionid,
+            "sessionid": self._steam.sessionid,
             "contextid": item.contextid,
             "assetid": item.assetid,
             "appid": item.appid,
             "price": int(round(buyer_pays / 1.15, 2) * STEAM_FACTOR),
             "amount": 1,  # used for stackable items
         }
-        response = self._steam._session.post(url, data=data, headers=headers)
+        return Request("POST", url, data=data, headers=headers)
 
-        return response
-
-    @login_required
-    def cancel_sell_order(self, listing: MarketListing) -> "requests.Response":
+    def _cancel_sell_order_request(self, listing: MarketListing) -> Request:
         url = f"https://steamcommunity.com/market/removelisting/{listing.listingid}"
-        data = {"sessionid": self._steam._sessionid}
+        data = {"sessionid": self._steam.sessionid}
         headers = {"Referer": "https://steamcommunity.com/market/"}
-        response = self._steam._session.post(url, data=data, headers=headers)
-
-        return response
+        return Request("POST", url, data=data, headers=headers)
 
-    @login_required
-    def fetch_price_history(self, appid: str, market_hash_name: str) -> dict:
+    @staticmethod
+    def _price_history_request(appid: str, market_hash_name: str) -> Request:
         url = "https://steamcommunity.com/market/pricehistory/"
         params = {"appid": appid, "market_hash_name": market_hash_name}
-        response = self._steam._session.get(url, params=params)
-
-        return response.json()
+        return Request("GET", url, params=params)
 
-    def fetch_price(
-        self,
-        appid: str,
-        market_hash_name: str,
-        currency: CountryCurrency = CountryCurrency.ARS,
-    ) -> Dict[str, float | None]:
+    @staticmethod
+    def _price_request(
+        appid: str, market_hash_name: str, currency: CountryCurrency
+    ) -> Request:
         url = "https://steamcommunity.com/market/priceoverview"
         params = {
             "currency": currency.value,
             "appid": appid,
             "market_hash_name": market_hash_name,
         }
-        response = self._steam._session.get(url, params=params)
+        return Request("GET", url, params=params)
+
+    @staticmethod
+    def _inventory_request(
+        steamid: str, appid: str, contextid: str, count: int
+    ) -> Request:
+        url = f"https://steamcommunity.com/inventory/{steamid}/{appid}/{contextid}"
+        return Request("GET", url, params={"l": "english", "count": count})
+
+    @staticmethod
+    def _next_inventory_request(request: Request, last_assetid: str) -> Request:
+        return request._replace(params=request.params | {"start_assetid": last_assetid})
+
+    @classmethod
+    def _new_listings(cls, response_json: dict, seen: set) -> Iterator[MarketListing]:
+        # Listings that are sold/created between two page requests shift the pages
+        # around, so the same listing can show up twice.
+        for listings in cls._parse_my_listings(response_json):
+            for listing in listings:
+                if listing.listingid not in seen:
+                    seen.add(listing.listingid)
+                    yield listing
 
+    @staticmethod
+    def _parse_price(response_json: dict) -> Dict[str, float | None]:
         # If Steam can't fetch a value then it won't put it in the response
         # We add them so the user can expect some level of consistency
-        response_json = response.json()
         if "lowest_price" in response_json:
             response_json["lowest_price"] = formatted_to_float(
                 response_json["lowest_price"]
@@ -106,35 +429,46 @@ class SteamMarket(PysawBase):
 
         return response_json
 
-    @login_required
-    def fetch_my_inventory(self, appid: str, contextid: str) -> Inventory:
-        return self.fetch_inventory(self._steam.steamid, appid, contextid)
-
-    def fetch_inventory(self, steamid: str, appid: str, contextid: str) -> Inventory:
-        url = f"https://steamcommunity.com/inventory/{steamid}/{appid}/{contextid}"
-        params = {"l": "english", "count": 5000}
-        response = self._steam._session.get(url, params=params)
-        response_json = response.json()
+    @staticmethod
+    def _parse_inventory_members(
+        members: Iterable[Tuple[str, Any]],
+    ) -> Tuple[List[Item], str | None]:
+        page = _InventoryPage()
+        for key, value in members:
+            page.add(key, value)
+        return page.finish()
 
-        description_to_mkth_map = {}
-        for desc in response_json["descriptions"]:
-            key = desc["classid"] + "_" + desc["instanceid"]
-            description_to_mkth_map[key] = desc["market_hash_name"]
+    @staticmethod
+    def _inventory_page_json(response: "requests.Response | httpx.Response") -> dict:
+        # Steam sometimes answers with a "null" body instead of an error status
+        response_json = decode_response(response)
+        if not isinstance(response_json, dict):
+            raise ValueError(f"Expected an inventory page, got {response.text[:100]!r}")
+        return response_json
 
-        inventory = Inventory()
-        for asset in response_json["assets"]:
-            key = asset["classid"] + "_" + asset["instanceid"]
-            item = Item(
-                appid=asset["appid"],
-                contextid=asset["contextid"],
-                assetid=asset["assetid"],
-                classid=asset["classid"],
-                instanceid=asset["instanceid"],
-                market_hash_name=description_to_mkth_map[key],
-            )
-            inventory.add_item(item)
+    @classmethod
+    def _parse_inventory_page(
+        cls, response_json: dict
+    ) -> Tuple[List[Item], str | None]:
+        members = (
+            (key, value)
+            for key, values in response_json.items()
+            for value in (values if key in _INVENTORY_STREAM_KEYS else (values,))
+        )
+        return cls._parse_inventory_members(members)
 
-        return inventory
+    @classmethod
+    def _parse_my_listings(cls, response_json: dict) -> Tuple[List[MarketListing]]:
+        listings = cls._parse_listings(
+            response_json["listings"], MarketListingStatus.ACTIVE
+        )
+        listings_on_hold = cls._parse_listings(
+            response_json["listings_on_hold"], MarketListingStatus.ON_HOLD
+        )
+        listings_to_confirm = cls._parse_listings(
+            response_json["listings_to_confirm"], MarketListingStatus.TO_CONFIRM
+        )
+        return listings, listings_on_hold, listings_to_confirm
 
     @staticmethod
     def _parse_listings(
@@ -162,3 +496,227 @@ class SteamMarket(PysawBase):
             listings.append(listing)
 
         return listings
+
+
+class AsyncSteamMarket(SteamMarket):
+    # Requests are built and parsed by `SteamMarket`, only sending them differs
+    _network_errors = httpx.HTTPError
+
+    @login_required
+    @instrumented("fetch_my_market_listings")
+    async def fetch_my_market_listings(
+        self, start: int = 0, max_workers: int = 1
+    ) -> Tuple[List[MarketListing]]:
+        listings, listings_on_hold, listings_to_confirm = [], [], []
+        by_status = {
+            MarketListingStatus.ACTIVE: listings,
+            MarketListingStatus.ON_HOLD: listings_on_hold,
+            MarketListingStatus.TO_CONFIRM: listings_to_confirm,
+        }
+        async for listing in self.iter_my_market_listings(start, max_workers):
+            by_status[listing.status].append(listing)
+
+        return listings, listings_on_hold, listings_to_confirm
+
+    @login_required
+    async def iter_my_market_listings(
+        self, start: int = 0, max_workers: int = 1
+    ) -> AsyncIterator[MarketListing]:
+        response_json = await self._fetch_my_listings_page(start)
+        seen = set()
+        for listing in self._new_listings(response_json, seen):
+            yield listing
+
+        if max_workers > 1:
+            starts = range(start + 100, response_json["num_active_listings"], 100)
+            pages = arun_concurrently(self._fetch_my_listings_page, starts, max_workers)
+            async for _, response_json in pages:
+                if isinstance(response_json, Exception):
+                    raise response_json
+                for listing in self._new_listings(response_json, seen):
+                    yield listing
+            return
+
+        while start + 100 < response_json["num_active_listings"]:
+            start += 100
+            response_json = await self._fetch_my_listings_page(start)
+            for listing in self._new_listings(response_json, seen):
+                yield listing
+
+    async def _fetch_my_listings_page(self, start: int) -> dict:
+        response = await self._send(self._my_listings_request(start))
+
+        return decode_response(response)
+
+    @login_required
+    @instrumented("create_sell_order")
+    async def create_sell_order(
+        self, item: Item, buyer_pays: float
+    ) -> "httpx.Response":
+        return await self._send(self._sell_order_request(item, buyer_pays))
+
+    @login_required
+    @instrumented("create_sell_orders")
+    async def create_sell_orders(
+        self,
+        orders: Iterable[Tuple[Item, float]],
+        max_workers: int = 4,
+        max_retries: int = 2,
+        confirm: bool = True,
+    ) -> List[SellOrderResult]:
+        async def sell(order: Tuple[Item, float]) -> SellOrderResult:
+            result = SellOrderResult(*order)
+            start = time.perf_counter()
+            while result.attempts <= max_retries:
+                if result.attempts:
+                    await asyncio.sleep(2 ** (result.attempts - 1))
+                result.attempts += 1
+                try:
+                    response = await self.create_sell_order(*order)
+                except self._network_errors as e:
+                    result.error = e
+                    continue
+                except Exception as e:
+                    result.error = e
+                    break
+                if not self._read_sell_order(result, response):
+                    break
+            result.elapsed = time.perf_counter() - start
+            return result
+
+        results = [
+            result async for _, result in arun_concurrently(sell, orders, max_workers)
+        ]
+        to_confirm = {
+            str(r.item.assetid): r for r in results if r.requires_confirmation
+        }
+        if confirm and to_confirm:
+            await self._confirm_sell_orders(to_confirm)
+
+        return results
+
+    async def _confirm_sell_orders(
+        self, to_confirm: Dict[str, SellOrderResult]
+    ) -> None:
+        listingid_to_assetid = self._listings_to_confirm(
+            await self._fetch_my_listings_page(0), to_confirm
+        )
+        confirmations = [
+            conf
+            for conf in await self._steam.confirmator.fetch_confirmations()
+            if conf.creator_id in listingid_to_assetid
+        ]
+        accepted = await self._steam.confirmator.send_confirmations(confirmations)
+        self._set_confirmed(to_confirm, listingid_to_assetid, confirmations, accepted)
+
+    @login_required
+    @instrumented("cancel_sell_order")
+    async def cancel_sell_order(self, listing: MarketListing) -> "httpx.Response":
+        return await self._send(self._cancel_sell_order_request(listing))
+
+    @login_required
+    @instrumented("fetch_price_history")
+    @cached("fetch_price_history")
+    async def fetch_price_history(self, appid: str, market_hash_name: str) -> dict:
+        response = await self._send(
+            self._price_history_request(appid, market_hash_name)
+        )
+
+        return decode_response(response)
+
+    @login_required
+    @instrumented("fetch_parsed_price_history")
+    async def fetch_parsed_price_history(
+        self, appid: str, market_hash_name: str
+    ) -> PriceHistory:
+        response_json = await self.fetch_price_history(appid, market_hash_name)
+        return PriceHistory.from_json(response_json)
+
+    @instrumented("fetch_price")
+    @cached("fetch_price")
+    async def fetch_price(
+        self,
+        appid: str,
+        market_hash_name: str,
+        currency: CountryCurrency = CountryCurrency.ARS,
+    ) -> Dict[str, float | None]:
+        response = await self._send(
+            self._price_request(appid, market_hash_name, currency)
+        )
+
+        return self._parse_price(decode_response(response))
+
+    async def fetch_price_many(
+        self,
+        appid: str,
+        market_hash_names: Iterable[str],
+        currency: CountryCurrency = CountryCurrency.ARS,
+        max_workers: int = 32,
+    ) -> AsyncIterator[Tuple[str, Dict[str, float | None] | Exception]]:
+        async def fetch(market_hash_name: str) -> Dict[str, float | None]:
+            return await self.fetch_price(appid, market_hash_name, currency)
+
+        async for result in arun_concurrently(fetch, market_hash_names, max_workers):
+            yield result
+
+    @login_required
+    @instrumented("fetch_my_inventory")
+    async def fetch_my_inventory(self, appid: str, contextid: str) -> Inventory:
+        return await self.fetch_inventory(self._steam.steamid, appid, contextid)
+
+    @instrumented("fetch_inventory")
+    async def fetch_inventory(
+        self, steamid: str, appid: str, contextid: str
+    ) -> Inventory:
+        inventory = Inventory()
+        async for item in self.iter_inventory(steamid, appid, contextid):
+            inventory.add_item(item)
+        return inventory
+
+    @login_required
+    def iter_my_inventory(
+        self, appid: str, contextid: str, stream: bool = False
+    ) -> AsyncIterator[Item]:
+        return self.iter_inventory(self._steam.steamid, appid, contextid, stream=stream)
+
+    async def iter_inventory(
+        self,
+        steamid: str,
+        appid: str,
+        contextid: str,
+        count: int = 5000,
+        stream: bool = False,
+    ) -> AsyncIterator[Item]:
+        request = self._inventory_request(steamid, appid, contextid, count)
+        while True:
+            if stream:
+                items, last_assetid = await self._fetch_inventory_page_streamed(request)
+            else:
+                items, last_assetid = await self._fetch_inventory_page(request)
+            for item in items:
+                yield item
+
+            if last_assetid is None:
+                return
+            request = self._next_inventory_request(request, last_assetid)
+
+    async def _fetch_inventory_page(
+        self, request: Request
+    ) -> Tuple[List[Item], str | None]:
+        response = await self._send(request)
+        response.raise_for_status()
+        return self._parse_inventory_page(self._inventory_page_json(response))
+
+    async def _fetch_inventory_page_streamed(
+        self, request: Request
+    ) -> Tuple[List[Item], str | None]:
+        session = self._steam._session
+        async with session.stream(
+            "GET", request.url, params=request.params
+        ) as response:
+            response.raise_for_status()
+            chunks = response.aiter_bytes(STREAM_CHUNK_SIZE)
+            page = _InventoryPage()
+            async for key, value in aiter_json_members(chunks, _INVENTORY_STREAM_KEYS):
+                page.add(key, value)
+            return page.finish()
@@ -0,0 +1,270 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+from urllib.parse import urlsplit
+
+from .constants import DEFAULT_LATENCY_BUCKETS
+
+_call = contextvars.ContextVar("pysaw_metrics_call", default=None)
+
+
+class _Call:
+    # The operation an `@instrumented` method is running, along with the time its
+    # requests spent on the network and waiting for the rate limiter
+    __slots__ = ("operation", "network_time", "wait_time")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.network_time = 0.0
+        self.wait_time = 0.0
+
+
+class _OperationStats:
+    __slots__ = (
+        "calls",
+        "requests",
+        "errors",
+        "retries",
+        "bytes",
+        "status_codes",
+        "buckets",
+        "latency_sum",
+        "network_time",
+        "wait_time",
+        "parse_time",
+    )
+
+    def __init__(self, n_buckets: int):
+        self.calls = 0
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.status_codes = {}
+        self.buckets = [0] * (n_buckets + 1)  # the last one is +Inf
+        self.latency_sum = 0.0
+        self.network_time = 0.0
+        self.wait_time = 0.0
+        self.parse_time = 0.0
+
+
+class Metrics:
+    # Per operation request metrics. An operation is the name given to an
+    # `@instrumented` method (e.g. "fetch_price"), requests made outside of one are
+    # grouped by their URL path (e.g. "mobileconf/getlist").
+    #
+    # Listeners are called with a dict describing every request as it finishes
+    # (from whatever thread made it), `snapshot()` and `to_prometheus()` export the
+    # totals.
+    def __init__(self, latency_buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        self._stats = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        self._listeners.remove(listener)
+
+    def record_request(
+        self,
+        method: str,
+        url: str,
+        status_code: int | None,
+        elapsed: float,
+        n_bytes: int,
+        retries: int,
+        wait_time: float,
+    ) -> None:
+        # `status_code` is None when the request failed without a response
+        call = _call.get()
+        if call is not None:
+            operation = call.operation
+        else:
+            parts = urlsplit(url)
+            operation = parts.path.strip("/") or parts.hostname
+
+        with self._lock:
+            # The requests of a call can come from several threads
+            if call is not None:
+                call.network_time += elapsed
+                call.wait_time += wait_time
+            stats = self._get_stats(operation)
+            stats.requests += 1
+            stats.retries += retries
+            stats.bytes += n_bytes
+            stats.latency_sum += elapsed
+            stats.network_time += elapsed
+            stats.wait_time += wait_time
+            stats.buckets[self._bucket_index(elapsed)] += 1
+            if status_code is None or status_code >= 400:
+                stats.errors += 1
+            if status_code is not None:
+                stats.status_codes[status_code] = (
+                    stats.status_codes.get(status_code, 0) + 1
+                )
+
+        if self._listeners:
+            event = {
+                "operation": operation,
+                "method": method,
+                "url": url,
+                "status_code": status_code,
+                "elapsed": elapsed,
+                "bytes": n_bytes,
+                "retries": retries,
+                "wait_time": wait_time,
+            }
+            for listener in self._listeners:
+                listener(event)
+
+    def record_call(self, call: _Call, elapsed: float) -> None:
+        # Whatever time of the call wasn't spent on requests went to parsing (and
+        # the rest of pysaw's bookkeeping). Concurrent requests can add up to more
+        # than the whole call, hence the `max`.
+        with self._lock:
+            stats = self._get_stats(call.operation)
+            stats.calls += 1
+            stats.parse_time += max(0.0, elapsed - call.network_time - call.wait_time)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                operation: {
+                    "calls": stats.calls,
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "bytes": stats.bytes,
+                    "status_codes": dict(stats.status_codes),
+                    "latency": {
+                        "buckets": dict(
+                            zip(self.latency_buckets + (float("inf"),), stats.buckets)
+                        ),
+                        "sum": stats.latency_sum,
+                        "count": stats.requests,
+                    },
+                    "network_time": stats.network_time,
+                    "wait_time": stats.wait_time,
+                    "parse_time": stats.parse_time,
+                }
+                for operation, stats in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def to_prometheus(self, prefix: str = "pysaw") -> str:
+        # Prometheus text exposition format. The histogram buckets in `snapshot()`
+        # are per bucket, Prometheus wants them cumulative.
+        counters = {
+            "calls_total": ("calls", "Calls to instrumented methods"),
+            "requests_total": ("requests", "Requests sent to Steam"),
+            "request_errors_total": ("errors", "Requests that failed or got a 4xx/5xx"),
+            "request_retries_total": ("retries", "Requests retried after a 429"),
+            "response_bytes_total": ("bytes", "Bytes of response bodies received"),
+            "network_seconds_total": ("network_time", "Time spent on requests"),
+            "wait_seconds_total": ("wait_time", "Time spent waiting on rate limits"),
+            "parse_seconds_total": ("parse_time", "Time spent outside of requests"),
+        }
+        snapshot = self.snapshot()
+        lines = []
+        for name, (key, description) in counters.items():
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for operation, stats in snapshot.items():
+                lines.append(f'{prefix}_{name}{{operation="{operation}"}} {stats[key]}')
+
+        lines.append(f"# HELP {prefix}_responses_total Responses by status code")
+        lines.append(f"# TYPE {prefix}_responses_total counter")
+        for operation, stats in snapshot.items():
+            for status_code, count in sorted(stats["status_codes"].items()):
+                lines.append(
+                    f'{prefix}_responses_total{{operation="{operation}",'
+                    f'code="{status_code}"}} {count}'
+                )
+
+        name = f"{prefix}_request_duration_seconds"
+        lines.append(f"# HELP {name} Request latency")
+        lines.append(f"# TYPE {name} histogram")
+        for operation, stats in snapshot.items():
+            total = 0
+            for le, count in stats["latency"]["buckets"].items():
+                total += count
+                le = "+Inf" if le == float("inf") else le
+                lines.append(
+                    f'{name}_bucket{{operation="{operation}",le="{le}"}} {total}'
+                )
+            lines.append(
+                f'{name}_sum{{operation="{operation}"}} {stats["latency"]["sum"]}'
+            )
+            lines.append(f'{name}_count{{operation="{operation}"}} {total}')
+
+        return "\n".join(lines) + "\n"
+
+    def _get_stats(self, operation: str) -> _OperationStats:
+        stats = self._stats.get(operation)
+        if stats is None:
+            stats = self._stats[operation] = _OperationStats(len(self.latency_buckets))
+        return stats
+
+    def _bucket_index(self, elapsed: float) -> int:
+        for i, le in enumerate(self.latency_buckets):
+            if elapsed <= le:
+                return i
+        return len(self.latency_buckets)
+
+
+def instrumented(operation: str):
+    # Attributes the requests made by a `PysawBase` (or `Steam`) method to
+    # `operation` in `steam.metrics`. Calls go straight through when the `Steam`
+    # instance doesn't have metrics. Requests are counted under the innermost
+    # instrumented call, so the ones `fetch_price_many` makes through `fetch_price`
+    # show up as "fetch_price".
+    def decorator(func):
+        def get_metrics(self) -> Metrics | None:
+            return getattr(self, "_steam", self).metrics
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                metrics = get_metrics(self)
+                if metrics is None:
+                    return await func(self, *args, **kwargs)
+
+                call = _Call(operation)
+                token = _call.set(call)
+                start = time.perf_counter()
+                try:
+                    return await func(self, *args, **kwargs)
+                finally:
+                    _call.reset(token)
+                    metrics.record_call(call, time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            metrics = get_metrics(self)
+            if metrics is None:
+                return func(self, *args, **kwargs)
+
+            call = _Call(operation)
+            token = _call.set(call)
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                _call.reset(token)
+                metrics.record_call(call, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
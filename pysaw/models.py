@@ -1,8 +1,9 @@
-from typing import Iterable, Iterator, TYPE_CHECKING
+import array
+import collections
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple, TYPE_CHECKING
 
 from .constants import MarketListingStatus
 
-
 if TYPE_CHECKING:
     import pysaw
 
@@ -43,6 +44,15 @@ class Item:
     # In order to uniquely identify an item, you need its AppID, its context ID, and
     # its asset ID. Once you have these three things, only then can you uniquely
     # identify it
+    __slots__ = (
+        "appid",
+        "contextid",
+        "assetid",
+        "classid",
+        "instanceid",
+        "market_hash_name",
+    )
+
     def __init__(
         self,
         appid: str = None,
@@ -68,49 +78,182 @@ class Item:
 
 
 class Inventory:
+    # Items are grouped by appid and market_hash_name, and indexed by the ids that
+    # uniquely identify them (appid, contextid and assetid) as well as by their
+    # classid + instanceid, so adding, removing and looking them up is O(1).
     def __init__(self, items: Iterable[Item] = None):
-        self._items = {}
+        self._items = {}  # str(appid) -> market_hash_name -> {key: item}
+        self._by_key = {}  # key -> item
+        self._by_class = {}  # classid_instanceid -> {key: item}
         if items is not None:
-            for item in items:
-                self.add_item(item)
+            self.add_items(items)
 
     def add_item(self, item: Item) -> None:
-        appid, mkth = item.appid, item.market_hash_name
+        key = self._key(item)
+        if key in self._by_key:
+            self.remove_item(self._by_key[key])
 
-        if appid not in self._items:
-            self._items[appid] = {}
-        if mkth not in self._items[appid]:
-            self._items[appid][mkth] = []
+        appid, mkth = str(item.appid), item.market_hash_name
+        self._items.setdefault(appid, {}).setdefault(mkth, {})[key] = item
+        self._by_class.setdefault(self._class_key(item), {})[key] = item
+        self._by_key[key] = item
 
-        self._items[appid][mkth].append(item)
+    def add_items(self, items: Iterable[Item]) -> None:
+        for item in items:
+            self.add_item(item)
 
     def remove_item(self, item: Item):
-        appid, mkth = item.appid, item.market_hash_name
-        self._items[appid][mkth].remove(item)
+        key = self._key(item)
+        if key not in self._by_key:
+            raise ValueError(f"{item!r} is not in the inventory")
+        item = self._by_key.pop(key)
+
+        appid, mkth = str(item.appid), item.market_hash_name
+        del self._items[appid][mkth][key]
         if not self._items[appid][mkth]:
             del self._items[appid][mkth]
+        if not self._items[appid]:
+            del self._items[appid]
+
+        class_key = self._class_key(item)
+        del self._by_class[class_key][key]
+        if not self._by_class[class_key]:
+            del self._by_class[class_key]
+
+    def get(self, appid: str, contextid: str, assetid: str) -> Item | None:
+        return self._by_key.get((str(appid), str(contextid), str(assetid)))
+
+    def get_by_class(self, classid: str, instanceid: str) -> List[Item]:
+        return list(self._by_class.get(f"{classid}_{instanceid}", {}).values())
+
+    def count_by_name(self, appid: str, market_hash_name: str) -> int:
+        return len(self._items.get(str(appid), {}).get(market_hash_name, {}))
 
     def without_duplicates(self) -> Iterator[Item]:
         for appid in self._items:
             for mkth in self._items[appid]:
-                yield self._items[appid][mkth][0]
+                yield next(iter(self._items[appid][mkth].values()))
+
+    def difference(self, other: "Inventory") -> "Inventory":
+        # Items in this inventory that aren't in `other`
+        return Inventory(item for item in self if item not in other)
+
+    def union(self, other: "Inventory") -> "Inventory":
+        inventory = Inventory(self)
+        inventory.add_items(other)
+        return inventory
+
+    def __sub__(self, other: "Inventory") -> "Inventory":
+        return self.difference(other)
+
+    def __or__(self, other: "Inventory") -> "Inventory":
+        return self.union(other)
+
+    def __contains__(self, item: Item) -> bool:
+        return self._key(item) in self._by_key
 
     def __iter__(self):
         for appid in self._items:
             for mkth in self._items[appid]:
-                yield from self._items[appid][mkth]
+                yield from self._items[appid][mkth].values()
 
     def __len__(self):
-        n = 0
-        for _ in self:
-            n += 1
-        return n
+        return len(self._by_key)
 
     def __repr__(self) -> str:
         return "%s(num_items=%d)" % (self.__class__.__name__, len(self))
 
+    @staticmethod
+    def _key(item: Item) -> Tuple[str, str, str]:
+        # Steam isn't consistent with the types of these ids (appid is usually an
+        # int), so we normalize them
+        return str(item.appid), str(item.contextid), str(item.assetid)
+
+    @staticmethod
+    def _class_key(item: Item) -> str:
+        return f"{item.classid}_{item.instanceid}"
+
+
+class InventoryFrame:
+    # Columnar representation of a (possibly huge) list of items, meant for bulk
+    # analytics rather than for handing items to the API. Ids are stored as
+    # unsigned 64 bit integers and every market_hash_name is kept once, so an item
+    # takes about 45 bytes (44 of columns plus its share of the names) instead of
+    # the several hundred of an `Item` and its strings.
+    # The columns support the buffer protocol, e.g. `numpy.frombuffer(frame.assetids,
+    # dtype=numpy.uint64)` gives a NumPy view without copying anything.
+    def __init__(self, items: Iterable[Item] = None):
+        self.appids = array.array("Q")
+        self.contextids = array.array("Q")
+        self.assetids = array.array("Q")
+        self.classids = array.array("Q")
+        self.instanceids = array.array("Q")
+        self.name_ids = array.array("I")
+        self.names = []  # name_id -> market_hash_name
+        self._name_to_id = {}
+        if items is not None:
+            for item in items:
+                self.append(item)
+
+    def append(self, item: Item) -> None:
+        name_id = self._name_to_id.get(item.market_hash_name)
+        if name_id is None:
+            name_id = self._name_to_id[item.market_hash_name] = len(self.names)
+            self.names.append(item.market_hash_name)
+
+        self.appids.append(int(item.appid))
+        self.contextids.append(int(item.contextid))
+        self.assetids.append(int(item.assetid))
+        self.classids.append(int(item.classid))
+        self.instanceids.append(int(item.instanceid))
+        self.name_ids.append(name_id)
+
+    def count_by_name(self) -> Dict[str, int]:
+        counts = collections.Counter(self.name_ids)
+        return {self.names[name_id]: n for name_id, n in counts.items()}
+
+    def indices_of(self, market_hash_name: str) -> List[int]:
+        name_id = self._name_to_id.get(market_hash_name)
+        return [i for i, n in enumerate(self.name_ids) if n == name_id]
+
+    def to_inventory(self) -> Inventory:
+        return Inventory(self)
+
+    def __getitem__(self, i: int) -> Item:
+        return Item(
+            appid=self.appids[i],
+            contextid=str(self.contextids[i]),
+            assetid=str(self.assetids[i]),
+            classid=str(self.classids[i]),
+            instanceid=str(self.instanceids[i]),
+            market_hash_name=self.names[self.name_ids[i]],
+        )
+
+    def __iter__(self) -> Iterator[Item]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __len__(self) -> int:
+        return len(self.assetids)
+
+    def __repr__(self) -> str:
+        return "%s(num_items=%d, num_names=%d)" % (
+            self.__class__.__name__,
+            len(self),
+            len(self.names),
+        )
+
 
 class MarketListing:
+    __slots__ = (
+        "listingid",
+        "time_created",
+        "status",
+        "item",
+        "you_receive",
+        "buyer_pays",
+    )
+
     def __init__(
         self,
         listingid: str,
@@ -136,6 +279,8 @@ class MarketListing:
 
 
 class Confirmation:
+    __slots__ = ("id", "creator_id", "nonce", "summary", "headline", "creation_time")
+
     def __init__(
         self,
         id: str,
@@ -160,6 +305,54 @@ class Confirmation:
         )
 
 
+class SellOrderResult:
+    # Outcome of every item handed to `SteamMarket.create_sell_orders`
+    __slots__ = (
+        "item",
+        "buyer_pays",
+        "listed",
+        "requires_confirmation",
+        "confirmed",
+        "attempts",
+        "elapsed",
+        "error",
+    )
+
+    def __init__(self, item: Item, buyer_pays: float):
+        self.item = item
+        self.buyer_pays = buyer_pays
+        self.listed = False
+        self.requires_confirmation = False
+        self.confirmed = False
+        self.attempts = 0
+        self.elapsed = 0.0  # seconds spent creating the sell order
+        self.error = None  # why it couldn't be listed, an exception
+
+    def __repr__(self) -> str:
+        return "%s(item=%r, listed=%s, confirmed=%s)" % (
+            self.__class__.__name__,
+            self.item,
+            self.listed,
+            self.confirmed,
+        )
+
+
+class Request(NamedTuple):
+    # A request to Steam, built the same way for `Steam` and `AsyncSteam` so that
+    # only sending it differs between them (see `Steam._send()`)
+    method: str
+    url: str
+    params: dict = None
+    data: dict = None
+    headers: dict = None
+    files: tuple = None
+    follow_redirects: bool = True
+
+
 class PysawBase:
     def __init__(self, steam: "pysaw.Steam"):
         self._steam = steam
+
+    def _send(self, request: Request):
+        # The response, or with an `AsyncSteam` an awaitable of it
+        return self._steam._send(request)
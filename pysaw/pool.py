@@ -0,0 +1,525 @@
+import asyncio
+import collections
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Tuple
+
+import httpx
+from requests.adapters import HTTPAdapter
+
+from .exceptions import LoginRequired
+from .metrics import Metrics
+from .ratelimit import RateLimiter
+from .session import BaseUrlAdapter, BaseUrlTransport
+from .steam import AsyncSteam, Steam
+from .utils import arun_concurrently, run_concurrently
+
+
+class _Account:
+    # An account of a pool along with what the scheduler knows about it
+    __slots__ = (
+        "steam",
+        "session_path",
+        "logged_in",
+        "in_flight",
+        "tasks",
+        "failures",
+        "consecutive_failures",
+        "busy_time",
+        "last_error",
+        "last_failure",
+        "last_used",
+    )
+
+    def __init__(self, steam: Steam, session_path: str = None):
+        self.steam = steam
+        self.session_path = session_path
+        self.logged_in = False
+        self.in_flight = 0
+        self.tasks = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.busy_time = 0.0
+        self.last_error = None
+        self.last_failure = 0.0
+        self.last_used = 0.0
+
+
+class SteamPool:
+    # Many accounts sharing a single connection pool and `RateLimiter`, so that
+    # together they stay within Steam's per IP limits. Every account in `accounts`
+    # is a dict with the "username", "password" and "steam_guard_path" of a `Steam`
+    # object and optionally a "session_path" for `login()`; `steam_kwargs` (e.g.
+    # `cache`, `time_sync_interval`) are passed to all of them.
+    #
+    # Work is given to the logged in account with the fewest tasks in flight, at
+    # most `max_tasks_per_account` at a time. An account whose last `max_failures`
+    # tasks failed only gets work again after `cooldown` seconds, unless every
+    # other account is busy.
+    def __init__(
+        self,
+        accounts: Iterable[dict],
+        rate_limiter: RateLimiter = None,
+        metrics: Metrics = None,
+        base_url: str = None,
+        max_tasks_per_account: int = 2,
+        max_failures: int = 3,
+        cooldown: float = 60,
+        **steam_kwargs,
+    ):
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.metrics = metrics
+        self.max_tasks_per_account = max_tasks_per_account
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self._accounts = {}
+        self._condition = self._new_condition()
+        self._executor = None
+        self._pending = collections.deque()
+        self._started = time.monotonic()
+
+        accounts = [dict(account) for account in accounts]
+        self._connections = self._new_connections(base_url, len(accounts))
+        for account in accounts:
+            session_path = account.pop("session_path", None)
+            steam = self._new_steam(account | steam_kwargs)
+            if steam._username in self._accounts:
+                raise ValueError(f"{steam._username!r} is in the pool twice")
+            self._accounts[steam._username] = _Account(steam, session_path)
+
+    def __enter__(self) -> "SteamPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def __getitem__(self, username: str) -> Steam:
+        return self._accounts[username].steam
+
+    @property
+    def usernames(self) -> List[str]:
+        return list(self._accounts)
+
+    @staticmethod
+    def _new_condition() -> threading.Condition:
+        return threading.Condition()
+
+    def _new_connections(self, base_url: str | None, n_accounts: int) -> HTTPAdapter:
+        pool_maxsize = max(10, n_accounts * self.max_tasks_per_account)
+        if base_url is not None:
+            return BaseUrlAdapter(base_url, pool_maxsize=pool_maxsize)
+        return HTTPAdapter(pool_maxsize=pool_maxsize)
+
+    def _new_steam(self, kwargs: dict) -> Steam:
+        steam = Steam(**kwargs, rate_limiter=self.rate_limiter, metrics=self.metrics)
+        # Only connections are shared, cookies stay in each account's session
+        steam._session.mount("https://", self._connections)
+        steam._session.mount("http://", self._connections)
+        return steam
+
+    def close(self) -> None:
+        self.stop_keep_alive()
+        with self._condition:
+            while self._pending:
+                self._pending.popleft()[0].cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for account in self._accounts.values():
+            account.steam._session.close()
+        self._connections.close()
+
+    def login(
+        self, session_dir: str = None, stagger: float = 1, max_workers: int = 4
+    ) -> Dict[str, Exception]:
+        # Logs every account in, starting at most one login every `stagger` seconds
+        # (0 to start them all at once) and running at most `max_workers` at a time.
+        # Sessions are saved to/reused from "<session_dir>/<username>.json" unless
+        # the account has its own "session_path". Returns the errors of the accounts
+        # that failed, those don't get any work.
+        next_start = [time.monotonic()]
+        lock = threading.Lock()
+
+        def login(account: _Account) -> None:
+            with lock:
+                start = max(next_start[0], time.monotonic())
+                next_start[0] = start + stagger
+            time.sleep(max(0.0, start - time.monotonic()))
+            account.steam.login(self._session_path(account, session_dir))
+
+        return self._logged_in(
+            run_concurrently(login, self._accounts.values(), max_workers)
+        )
+
+    def start_keep_alive(self, interval: float = 300, margin: float = 600) -> None:
+        # See `Steam.start_keep_alive()`
+        for account in self._accounts.values():
+            if account.logged_in:
+                account.steam.start_keep_alive(interval, margin)
+
+    def stop_keep_alive(self) -> None:
+        for account in self._accounts.values():
+            account.steam.stop_keep_alive()
+
+    def submit(
+        self, func: Callable[..., Any], *args, username: str = None, **kwargs
+    ) -> Future:
+        # Runs `func(steam, *args, **kwargs)` on a background thread with the first
+        # account that's free (or with `username`'s), e.g.
+        # `pool.submit(lambda steam: steam.market.fetch_my_market_listings())`
+        self._check_username(username)
+        if self._executor is None:
+            max_workers = len(self._accounts) * self.max_tasks_per_account
+            self._executor = ThreadPoolExecutor(max(1, max_workers))
+        future = Future()
+        # Tasks only reach the executor once they have an account, a task waiting
+        # for a busy account mustn't hold a thread the others could run on
+        task = (future, contextvars.copy_context(), func, args, kwargs, username)
+        with self._condition:
+            self._pending.append(task)
+            self._dispatch()
+        return future
+
+    def map(
+        self, func: Callable[[Steam, Any], Any], args: Iterable, max_workers: int = None
+    ) -> Iterator[Tuple[Any, Any]]:
+        # Yields `(arg, func(steam, arg))` pairs in the order they finish, each call
+        # made by whichever account is free. Like `utils.run_concurrently()`, errors
+        # are yielded in place of results.
+        max_workers = max_workers or len(self._accounts) * self.max_tasks_per_account
+        return run_concurrently(
+            lambda arg: self._run(func, (arg,), {}, None), args, max(1, max_workers)
+        )
+
+    def map_accounts(
+        self, func: Callable[[Steam], Any], max_workers: int = None
+    ) -> Iterator[Tuple[str, Any]]:
+        # Yields `(username, func(steam))` for every logged in account, e.g. to
+        # accept the pending confirmations of all of them
+        usernames = [u for u, account in self._accounts.items() if account.logged_in]
+        return run_concurrently(
+            lambda username: self._run(func, (), {}, username),
+            usernames,
+            max(1, max_workers or len(usernames)),
+        )
+
+    def stats(self) -> Dict[str, dict]:
+        # Health and throughput of every account
+        with self._condition:
+            return self._stats()
+
+    def _run(
+        self, func: Callable[..., Any], args: tuple, kwargs: dict, username: str
+    ) -> Any:
+        with self._condition:
+            account = self._pick(username)
+            while account is None:
+                self._condition.wait()
+                account = self._pick(username)
+
+        start = time.perf_counter()
+        error = None
+        try:
+            return func(account.steam, *args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            with self._condition:
+                self._finish(account, start, error)
+                # Not just one waiter, it could be waiting for another account
+                self._condition.notify_all()
+
+    def _dispatch(self) -> None:
+        # Hands the pending tasks that can run to the executor, in the order they
+        # were submitted. Must be called holding the pool's lock.
+        for task in list(self._pending):
+            future, context, func, args, kwargs, username = task
+            try:
+                account = self._pick(username)
+            except (LoginRequired, KeyError) as e:
+                self._pending.remove(task)
+                future.set_exception(e)
+                continue
+            if account is None:
+                continue
+            self._pending.remove(task)
+            if future.set_running_or_notify_cancel():
+                self._executor.submit(
+                    context.run, self._execute, future, account, func, args, kwargs
+                )
+            else:
+                account.in_flight -= 1
+
+    def _execute(
+        self,
+        future: Future,
+        account: _Account,
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+    ) -> None:
+        start = time.perf_counter()
+        error = None
+        try:
+            future.set_result(func(account.steam, *args, **kwargs))
+        except Exception as e:
+            error = e
+            future.set_exception(e)
+        finally:
+            with self._condition:
+                self._finish(account, start, error)
+                self._condition.notify_all()
+                self._dispatch()
+
+    def _check_username(self, username: str | None) -> None:
+        if username is not None and username not in self._accounts:
+            raise KeyError(f"{username!r} isn't one of the pool's accounts")
+
+    def _pick(self, username: str = None) -> _Account | None:
+        # The account the next task should run on, None if they are all busy. Must
+        # be called holding the pool's lock.
+        if username is not None:
+            candidates = [self._accounts[username]]
+        else:
+            candidates = self._accounts.values()
+        candidates = [account for account in candidates if account.logged_in]
+        if not candidates:
+            raise LoginRequired("None of the pool's accounts is logged in")
+
+        now = time.monotonic()
+        free = [
+            account
+            for account in candidates
+            if account.in_flight < self.max_tasks_per_account
+        ]
+        if not free:
+            return None
+
+        account = min(
+            free,
+            key=lambda account: (
+                not self._is_healthy(account, now),
+                account.in_flight,
+                account.last_used,
+            ),
+        )
+        account.in_flight += 1
+        account.last_used = now
+        return account
+
+    def _finish(self, account: _Account, start: float, error: Exception) -> None:
+        account.in_flight -= 1
+        account.tasks += 1
+        account.busy_time += time.perf_counter() - start
+        if error is None:
+            account.consecutive_failures = 0
+            return
+
+        account.failures += 1
+        account.consecutive_failures += 1
+        account.last_error = error
+        account.last_failure = time.monotonic()
+
+    def _is_healthy(self, account: _Account, now: float) -> bool:
+        return account.logged_in and (
+            account.consecutive_failures < self.max_failures
+            or now - account.last_failure >= self.cooldown
+        )
+
+    def _stats(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        elapsed = now - self._started
+        return {
+            username: {
+                "logged_in": account.logged_in,
+                "healthy": self._is_healthy(account, now),
+                "in_flight": account.in_flight,
+                "tasks": account.tasks,
+                "failures": account.failures,
+                "consecutive_failures": account.consecutive_failures,
+                "busy_time": account.busy_time,
+                "tasks_per_second": account.tasks / elapsed if elapsed else 0.0,
+                "last_error": (
+                    None if account.last_error is None else repr(account.last_error)
+                ),
+            }
+            for username, account in self._accounts.items()
+        }
+
+    def _logged_in(
+        self, results: Iterable[Tuple[_Account, Any]]
+    ) -> Dict[str, Exception]:
+        errors = {}
+        for account, result in results:
+            account.logged_in = not isinstance(result, Exception)
+            if not account.logged_in:
+                errors[account.steam._username] = result
+                account.last_error = result
+        return errors
+
+    @staticmethod
+    def _session_path(account: _Account, session_dir: str = None) -> str | None:
+        if account.session_path is not None or session_dir is None:
+            return account.session_path
+        return os.path.join(session_dir, f"{account.steam._username}.json")
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    # What the clients of an `AsyncSteamPool` get instead of the pool's transport.
+    # Closing one of them (e.g. with `AsyncSteam.aclose()`) leaves the connections
+    # of the others alone, only `AsyncSteamPool.aclose()` closes `transport`.
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.transport.handle_async_request(request)
+
+
+class AsyncSteamPool(SteamPool):
+    # `asyncio` version of `SteamPool`, the accounts are `AsyncSteam` objects that
+    # share one `httpx` transport, of at most `max_connections` connections
+    def __init__(
+        self,
+        accounts: Iterable[dict],
+        rate_limiter: RateLimiter = None,
+        metrics: Metrics = None,
+        base_url: str = None,
+        max_tasks_per_account: int = 2,
+        max_failures: int = 3,
+        cooldown: float = 60,
+        max_connections: int = 100,
+        **steam_kwargs,
+    ):
+        self.max_connections = max_connections
+        super().__init__(
+            accounts,
+            rate_limiter,
+            metrics,
+            base_url,
+            max_tasks_per_account,
+            max_failures,
+            cooldown,
+            **steam_kwargs,
+        )
+
+    async def __aenter__(self) -> "AsyncSteamPool":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def __enter__(self) -> "AsyncSteamPool":
+        raise TypeError("Use `async with` with an AsyncSteamPool")
+
+    def __exit__(self, *exc_info) -> None:
+        raise TypeError("Use `async with` with an AsyncSteamPool")
+
+    def close(self) -> None:
+        raise TypeError("An AsyncSteamPool is closed with `await pool.aclose()`")
+
+    async def aclose(self) -> None:
+        # `AsyncSteam.aclose()` also stops the account's keep-alive task
+        for account in self._accounts.values():
+            await account.steam.aclose()
+        await self._connections.aclose()
+
+    @staticmethod
+    def _new_condition() -> asyncio.Condition:
+        return asyncio.Condition()
+
+    def _new_connections(
+        self, base_url: str | None, n_accounts: int
+    ) -> httpx.AsyncBaseTransport:
+        limits = httpx.Limits(max_connections=self.max_connections)
+        if base_url is not None:
+            return BaseUrlTransport(base_url, limits=limits)
+        return httpx.AsyncHTTPTransport(limits=limits)
+
+    def _new_steam(self, kwargs: dict) -> AsyncSteam:
+        return AsyncSteam(
+            **kwargs,
+            rate_limiter=self.rate_limiter,
+            metrics=self.metrics,
+            transport=_SharedTransport(self._connections),
+        )
+
+    async def login(
+        self, session_dir: str = None, stagger: float = 1, max_workers: int = 4
+    ) -> Dict[str, Exception]:
+        next_start = time.monotonic()
+
+        async def login(account: _Account) -> None:
+            nonlocal next_start
+            start = max(next_start, time.monotonic())
+            next_start = start + stagger
+            await asyncio.sleep(max(0.0, start - time.monotonic()))
+            await account.steam.login(self._session_path(account, session_dir))
+
+        results = arun_concurrently(login, self._accounts.values(), max_workers)
+        return self._logged_in([pair async for pair in results])
+
+    async def stop_keep_alive(self) -> None:
+        for account in self._accounts.values():
+            await account.steam.stop_keep_alive()
+
+    def submit(
+        self, func: Callable[..., Any], *args, username: str = None, **kwargs
+    ) -> asyncio.Task:
+        # `func` returns an awaitable, e.g.
+        # `lambda steam: steam.market.fetch_my_market_listings()`
+        self._check_username(username)
+        return asyncio.ensure_future(self._run(func, args, kwargs, username))
+
+    def map(
+        self,
+        func: Callable[[AsyncSteam, Any], Any],
+        args: Iterable,
+        max_workers: int = None,
+    ) -> AsyncIterator[Tuple[Any, Any]]:
+        max_workers = max_workers or len(self._accounts) * self.max_tasks_per_account
+        return arun_concurrently(
+            lambda arg: self._run(func, (arg,), {}, None), args, max(1, max_workers)
+        )
+
+    def map_accounts(
+        self, func: Callable[[AsyncSteam], Any], max_workers: int = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        usernames = [u for u, account in self._accounts.items() if account.logged_in]
+        return arun_concurrently(
+            lambda username: self._run(func, (), {}, username),
+            usernames,
+            max(1, max_workers or len(usernames)),
+        )
+
+    def stats(self) -> Dict[str, dict]:
+        # No lock needed, the event loop doesn't switch tasks while building them
+        return self._stats()
+
+    async def _run(
+        self, func: Callable[..., Any], args: tuple, kwargs: dict, username: str
+    ) -> Any:
+        async with self._condition:
+            account = self._pick(username)
+            while account is None:
+                await self._condition.wait()
+                account = self._pick(username)
+
+        start = time.perf_counter()
+        error = None
+        try:
+            return await func(account.steam, *args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            async with self._condition:
+                self._finish(account, start, error)
+                # Not just one waiter, it could be waiting for another account
+                self._condition.notify_all()
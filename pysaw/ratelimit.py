@@ -0,0 +1,125 @@
+import email.utils
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Tuple
+from urllib.parse import urlsplit
+
+
+
+class RateLimiter:
+    # Paces requests per endpoint using one token bucket per rule. `limits` maps a
+    # "host/path" prefix to `(requests_per_second, burst)`, the longest prefix
+    # matching a request wins. Requests that don't match any rule aren't paced, but
+    # they still back off when their host answers with a 429. Without `limits`
+    # nothing is paced, pass `DEFAULT_RATE_LIMITS` for the endpoints Steam throttles.
+    #
+    # Buckets are stored as a "theoretical arrival time" (GCRA), a single float per
+    # bucket, which makes it cheap to share them across threads and, when
+    # `state_path` is given, across processes through a SQLite file.
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[float, int]] = None,
+        state_path: str = None,
+        max_backoff: float = 300,
+    ):
+        limits = {} if limits is None else limits
+        self.limits = dict(sorted(limits.items(), key=lambda kv: -len(kv[0])))
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._penalized = set()
+        self._db = None
+        if state_path is not None:
+            self._db = sqlite3.connect(
+                state_path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(key TEXT PRIMARY KEY, tat REAL NOT NULL, strikes INTEGER NOT NULL)"
+            )
+
+    def reserve(self, url: str) -> float:
+        # Takes a slot from the bucket `url` belongs to and returns how many seconds
+        # the caller has to wait before sending the request.
+        key, interval, tolerance = self._rule(url)
+
+        def take(now: float, tat: float, strikes: int) -> Tuple[float, int, float]:
+            tat = max(tat, now)
+            return tat + interval, strikes, max(0.0, tat - tolerance - now)
+
+        return self._update(key, take)
+
+    def penalize(self, url: str, retry_after: float = None) -> float:
+        # Called after a 429, blocks the whole bucket for `retry_after` seconds or,
+        # if Steam didn't say, for an exponentially growing amount of time.
+        key, interval, tolerance = self._rule(url)
+
+        def block(now: float, tat: float, strikes: int) -> Tuple[float, int, float]:
+            wait = retry_after
+            if wait is None:
+                wait = min(self.max_backoff, max(interval, 1.0) * 2**strikes)
+            return max(tat, now + wait + tolerance), strikes + 1, wait
+
+        with self._lock:
+            self._penalized.add(key)
+        return self._update(key, block)
+
+    def reward(self, url: str) -> None:
+        # Called after a successful request, resets the backoff of its bucket
+        key, _, _ = self._rule(url)
+        with self._lock:
+            if key not in self._penalized:
+                return
+            self._penalized.discard(key)
+        self._update(key, lambda now, tat, strikes: (tat, 0, None))
+
+    def _rule(self, url: str) -> Tuple[str, float, float]:
+        parts = urlsplit(url)
+        target = parts.hostname + parts.path
+        for prefix, (rate, burst) in self.limits.items():
+            if target.startswith(prefix):
+                interval = 1 / rate
+                return prefix, interval, (burst - 1) * interval
+        return parts.hostname, 0.0, 0.0
+
+    def _update(self, key: str, func: Callable) -> float:
+        with self._lock:
+            if self._db is None:
+                tat, strikes = self._buckets.get(key, (0.0, 0))
+                tat, strikes, result = func(time.time(), tat, strikes)
+                self._buckets[key] = (tat, strikes)
+                return result
+
+            # BEGIN IMMEDIATE takes the write lock right away so other processes
+            # can't read the bucket until we are done updating it
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT tat, strikes FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tat, strikes = row or (0.0, 0)
+                tat, strikes, result = func(time.time(), tat, strikes)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                    (key, tat, strikes),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return result
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    # Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(
+            0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        )
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,254 @@
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import Metrics
+from .ratelimit import RateLimiter, parse_retry_after
+
+
+class Session(requests.Session):
+    # `requests.Session` that goes through a `RateLimiter` before every request and
+    # retries (up to `max_retries` times) the ones Steam answers with a 429. Every
+    # request, retries included, is recorded in `metrics` when there is one. With
+    # `base_url`, requests are sent there instead of to Steam (see `BaseUrlAdapter`).
+    # While `paused()`, requests from other threads wait (up to `pause_timeout`
+    # seconds) for the pausing thread to finish, e.g. refreshing the login cookies.
+    def __init__(
+        self,
+        rate_limiter: RateLimiter = None,
+        max_retries: int = 3,
+        metrics: Metrics = None,
+        base_url: str = None,
+        pause_timeout: float = 30,
+    ):
+        super().__init__()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.metrics = metrics
+        self.pause_timeout = pause_timeout
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._paused_by = None
+        if base_url is not None:
+            adapter = BaseUrlAdapter(base_url)
+            self.mount("https://", adapter)
+            self.mount("http://", adapter)
+
+    @contextlib.contextmanager
+    def paused(self):
+        self._paused_by = threading.get_ident()
+        self._resumed.clear()
+        try:
+            yield
+        finally:
+            self._paused_by = None
+            self._resumed.set()
+
+    def request(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        wait_time = 0.0
+        if self._paused_by not in (None, threading.get_ident()):
+            self._resumed.wait(self.pause_timeout)
+            wait_time += time.perf_counter() - start
+        for attempt in range(self.max_retries + 1):
+            delay = self.rate_limiter.reserve(url)
+            if delay:
+                time.sleep(delay)
+                wait_time += delay
+
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except requests.RequestException:
+                self._record(method, url, None, start, wait_time, attempt)
+                raise
+            if response.status_code != 429:
+                self.rate_limiter.reward(url)
+                self._record(method, url, response, start, wait_time, attempt)
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            self.rate_limiter.penalize(url, retry_after)
+            if attempt < self.max_retries:
+                response.close()
+
+        self._record(method, url, response, start, wait_time, attempt)
+        return response
+
+    def _record(
+        self,
+        method: str,
+        url: str,
+        response: requests.Response | None,
+        start: float,
+        wait_time: float,
+        retries: int,
+    ) -> None:
+        if self.metrics is None:
+            return
+
+        status_code = n_bytes = None
+        if response is not None:
+            status_code = response.status_code
+            # Don't read the body of streamed responses
+            if response._content_consumed:
+                n_bytes = len(response.content)
+            else:
+                n_bytes = int(response.headers.get("Content-Length", 0))
+        elapsed = time.perf_counter() - start - wait_time
+        self.metrics.record_request(
+            method, url, status_code, elapsed, n_bytes or 0, retries, wait_time
+        )
+
+
+class AsyncSession(httpx.AsyncClient):
+    # `asyncio` version of `Session`. Hooks into `send()` rather than `request()` so
+    # that streamed requests are paced too. `paused()` holds back the requests of
+    # every task but the one that paused it (and the tasks it starts meanwhile).
+    def __init__(
+        self,
+        rate_limiter: RateLimiter = None,
+        max_retries: int = 3,
+        metrics: Metrics = None,
+        pause_timeout: float = 30,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.metrics = metrics
+        self.pause_timeout = pause_timeout
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._paused_by = None
+        self._pause_owner = contextvars.ContextVar("pause_owner", default=None)
+
+    @contextlib.contextmanager
+    def paused(self):
+        # A context variable rather than the current task, tasks started with e.g.
+        # `asyncio.gather()` while paused inherit it
+        owner = object()
+        reset_token = self._pause_owner.set(owner)
+        self._paused_by = owner
+        self._resumed.clear()
+        try:
+            yield
+        finally:
+            self._paused_by = None
+            self._resumed.set()
+            self._pause_owner.reset(reset_token)
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        url = str(request.url)
+        start = time.perf_counter()
+        wait_time = 0.0
+        if self._paused_by not in (None, self._pause_owner.get()):
+            try:
+                await asyncio.wait_for(self._resumed.wait(), self.pause_timeout)
+            except asyncio.TimeoutError:
+                pass
+            wait_time += time.perf_counter() - start
+        for attempt in range(self.max_retries + 1):
+            delay = self.rate_limiter.reserve(url)
+            if delay:
+                await asyncio.sleep(delay)
+                wait_time += delay
+
+            try:
+                response = await super().send(request, **kwargs)
+            except httpx.HTTPError:
+                self._record(request, None, start, wait_time, attempt)
+                raise
+            if response.status_code != 429:
+                self.rate_limiter.reward(url)
+                self._record(request, response, start, wait_time, attempt)
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            self.rate_limiter.penalize(url, retry_after)
+            if attempt < self.max_retries:
+                await response.aclose()
+
+        self._record(request, response, start, wait_time, attempt)
+        return response
+
+    def _record(
+        self,
+        request: httpx.Request,
+        response: httpx.Response | None,
+        start: float,
+        wait_time: float,
+        retries: int,
+    ) -> None:
+        if self.metrics is None:
+            return
+
+        status_code = n_bytes = None
+        if response is not None:
+            status_code = response.status_code
+            try:
+                n_bytes = len(response.content)
+            except httpx.ResponseNotRead:
+                n_bytes = int(response.headers.get("Content-Length", 0))
+        elapsed = time.perf_counter() - start - wait_time
+        self.metrics.record_request(
+            request.method,
+            str(request.url),
+            status_code,
+            elapsed,
+            n_bytes or 0,
+            retries,
+            wait_time,
+        )
+
+
+class BaseUrlAdapter(HTTPAdapter):
+    # Sends every request to `base_url` (e.g. a `pysaw.standin.StandIn`) keeping its
+    # path and query, and its original host in the Host header. The session still
+    # sees the original URL, so cookies are stored and sent for Steam's domains as
+    # usual.
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        parts = urlsplit(request.url)
+        redirected = request.copy()
+        redirected.url = urlunsplit(
+            (self.scheme, self.netloc, parts.path, parts.query, parts.fragment)
+        )
+        redirected.headers["Host"] = parts.netloc
+        response = super().send(redirected, **kwargs)
+        response.request = request
+        response.url = request.url
+        return response
+
+
+class BaseUrlTransport(httpx.AsyncHTTPTransport):
+    # `httpx` version of `BaseUrlAdapter`, the Host header is already set by the
+    # client from the original URL
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = httpx.URL(base_url)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        redirected = httpx.Request(
+            request.method,
+            request.url.copy_with(
+                scheme=self.base_url.scheme,
+                host=self.base_url.host,
+                port=self.base_url.port,
+            ),
+            headers=request.headers,
+            stream=request.stream,
+            extensions=request.extensions,
+        )
+        return await super().handle_async_request(redirected)
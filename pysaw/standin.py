@@ -0,0 +1,810 @@
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+import zlib
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import rsa
+
+from .constants import STEAM_FACTOR
+
+# What route handlers return: status code, body (dumped as JSON unless it's a str
+# or bytes) and extra headers
+Reply = Tuple[int, Any, Dict[str, str]]
+
+_MONTHS = "Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split()
+
+
+class Faults:
+    # What can go wrong with a request, probabilities are per request. `prefixes`
+    # limits the faults to some "host/path" prefixes (like the ones `RateLimiter`
+    # uses), by default every request can fail.
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: float = 0.0,
+        retry_after: float = 1.0,
+        error: float = 0.0,
+        malformed: float = 0.0,
+        prefixes: Tuple[str, ...] = (),
+    ):
+        self.latency = latency  # seconds added to every request
+        self.jitter = jitter  # up to this many extra seconds, uniformly distributed
+        self.rate_limit = rate_limit  # 429 with a Retry-After header
+        self.retry_after = retry_after
+        self.error = error  # 500, 502 or 503 with an HTML body
+        self.malformed = malformed  # 200 whose JSON body is cut in half
+        self.prefixes = prefixes
+
+    def applies_to(self, host_path: str) -> bool:
+        return not self.prefixes or host_path.startswith(self.prefixes)
+
+
+class _Request:
+    __slots__ = ("method", "host", "path", "query", "form", "cookies", "body")
+
+    def __init__(self, handler: BaseHTTPRequestHandler, body: bytes):
+        parts = urlsplit(handler.path)
+        self.method = handler.command
+        self.host = (handler.headers.get("Host") or "").split(":")[0]
+        self.path = parts.path
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.body = body
+        self.form = {}
+        if "x-www-form-urlencoded" in handler.headers.get("Content-Type", ""):
+            self.form = parse_qs(body.decode())
+        cookies = SimpleCookie(handler.headers.get("Cookie", ""))
+        self.cookies = {name: morsel.value for name, morsel in cookies.items()}
+
+    def arg(self, name: str, default: str = None) -> str | None:
+        # Query string or form field
+        if name in self.query:
+            return self.query[name]
+        return self.form.get(name, [default])[-1]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients hanging up mid-response is normal (e.g. a streamed inventory read
+        # only as far as needed), only other errors are worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StandIn:
+    # Local stand-in for the parts of Steam pysaw talks to, meant for load testing
+    # against `Steam(base_url=standin.base_url)` without touching Steam. Requests are
+    # routed by their Host header and path; the responses have the same shape as
+    # Steam's, filled with deterministic (seeded) data. Any username, password and
+    # 2FA code log in.
+    #
+    # `faults` can be changed while the server runs, e.g. to start answering 429s
+    # halfway through a test.
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        faults: Faults = None,
+        inventory_size: int = 1000,
+        listings: int = 250,
+        search_size: int = 1000,
+        wallet_balance: float = 100.0,
+        access_token_lifetime: float = 24 * 60 * 60,
+        seed: int = 0,
+    ):
+        self.faults = faults or Faults()
+        self.access_token_lifetime = access_token_lifetime
+        self.inventory_size = inventory_size
+        self.search_size = search_size
+        self.seed = seed
+        self.hits = {}  # "host/path" -> requests received
+        self._lock = threading.RLock()
+        self._rng = random.Random(seed)
+        self._rsa_public, self._rsa_private = rsa.newkeys(512)
+        self._auth_sessions = {}  # client_id -> steamid
+        self._tokens = {}  # access token -> (steamid, expires_at)
+        self._refresh_tokens = {}  # refresh token -> steamid
+        self._wallets = {}  # steamid -> cents
+        self._carts = {}  # steamid -> packages in the cart
+        self._listings = {}  # steamid -> {listingid: listing}
+        self._confirmations = {}  # steamid -> {id: confirmation}
+        self._n_listings = listings
+        self._wallet_balance = round(wallet_balance * STEAM_FACTOR)
+        self._routes = self._make_routes()
+        self._server = _Server((host, port), self._make_handler())
+        self._thread = None
+
+    def expire_sessions(self) -> None:
+        # Every access token (and so every logged in cookie) stops working, refresh
+        # tokens still do
+        with self._lock:
+            self._tokens.clear()
+
+    def revoke_refresh_tokens(self) -> None:
+        # Only a full login gets a working session after this
+        with self._lock:
+            self._refresh_tokens.clear()
+            self._tokens.clear()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandIn":
+        # Serves from a background thread
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StandIn":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _make_handler(self) -> type:
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep connections alive
+
+            def do_GET(self) -> None:
+                standin._handle(self)
+
+            do_POST = do_HEAD = do_GET
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
+
+    def _make_routes(self) -> List[Tuple[re.Pattern, Callable]]:
+        # Patterns are matched against "host/path"
+        routes = {
+            # Login
+            r"api\.steampowered\.com/IAuthenticationService/GetPasswordRSAPublicKey/v1": self._rsa_key,
+            r"api\.steampowered\.com/IAuthenticationService/BeginAuthSessionViaCredentials/v1": self._begin_auth_session,
+            r"api\.steampowered\.com/IAuthenticationService/UpdateAuthSessionWithSteamGuardCode/v1": self._update_auth_session,
+            r"api\.steampowered\.com/IAuthenticationService/PollAuthSessionStatus/v1": self._poll_auth_session,
+            r"api\.steampowered\.com/IAuthenticationService/GenerateAccessTokenForApp/v1/?": self._generate_access_token,
+            r"login\.steampowered\.com/jwt/finalizelogin": self._finalize_login,
+            r"([a-z.]+)/login/settoken": self._set_token,
+            r"api\.steampowered\.com/ITwoFactorService/QueryTime/v1/?": self._query_time,
+            r"steamcommunity\.com/actions/EmoticonData": self._emoticon_data,
+            # Market
+            r"steamcommunity\.com/inventory/(\d+)/(\d+)/(\d+)": self._inventory,
+            r"steamcommunity\.com/market/mylistings/?": self._my_listings,
+            r"steamcommunity\.com/market/priceoverview/?": self._price_overview,
+            r"steamcommunity\.com/market/pricehistory/?": self._price_history,
+            r"steamcommunity\.com/market/sellitem/?": self._sell_item,
+            r"steamcommunity\.com/market/removelisting/(\d+)": self._remove_listing,
+            r"steamcommunity\.com/mobileconf/getlist": self._confirmation_list,
+            r"steamcommunity\.com/mobileconf/(?:multi)?ajaxop": self._confirmation_op,
+            # Store
+            r"steamcommunity\.com/my/ajaxgetbadgeinfo/(\d+)": self._badge_info,
+            r"store\.steampowered\.com/api/appdetails/?": self._app_details,
+            r"store\.steampowered\.com/search/results/?": self._search,
+            r"store\.steampowered\.com/dynamicstore/userdata/?": self._user_data,
+            r"store\.steampowered\.com/account/?": self._account,
+            r"api\.steampowered\.com/IAccountCartService/AddItemsToCart/v1": self._add_to_cart,
+            r"checkout\.steampowered\.com/checkout/inittransaction/?": self._init_transaction,
+            r"checkout\.steampowered\.com/checkout/getfinalprice/?": self._final_price,
+            r"checkout\.steampowered\.com/checkout/finalizetransaction/?": self._finalize_transaction,
+        }
+        return [(re.compile(pattern), handler) for pattern, handler in routes.items()]
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        length = int(handler.headers.get("Content-Length", 0))
+        request = _Request(handler, handler.rfile.read(length) if length else b"")
+        host_path = request.host + request.path
+        with self._lock:
+            self.hits[host_path] = self.hits.get(host_path, 0) + 1
+
+        status, body, headers = self._reply(request, host_path)
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+            headers.setdefault("Content-Type", "application/json; charset=utf-8")
+        if isinstance(body, str):
+            body = body.encode()
+            headers.setdefault("Content-Type", "text/html; charset=utf-8")
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            for value in value if isinstance(value, list) else [value]:
+                handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if request.method != "HEAD":
+            handler.wfile.write(body)
+
+    def _reply(self, request: _Request, host_path: str) -> Reply:
+        faults = self.faults
+        if faults.applies_to(host_path):
+            delay = faults.latency + random.uniform(0, faults.jitter)
+            if delay:
+                time.sleep(delay)
+            roll = random.random()
+            if roll < faults.rate_limit:
+                # Like Steam, whole seconds, which is all `parse_retry_after()` takes
+                return 429, "", {"Retry-After": str(math.ceil(faults.retry_after))}
+            roll -= faults.rate_limit
+            if roll < faults.error:
+                status = random.choice([500, 502, 503])
+                return status, "<html><body>Error</body></html>", {}
+            roll -= faults.error
+            malformed = roll < faults.malformed
+        else:
+            malformed = False
+
+        for pattern, route in self._routes:
+            match = pattern.fullmatch(host_path)
+            if match is not None:
+                break
+        else:
+            return 404, "<html><body>Not Found</body></html>", {}
+
+        status, body, headers = route(request, *match.groups())
+        if malformed and not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+            body = body[: len(body) // 2]
+            headers["Content-Type"] = "application/json; charset=utf-8"
+        return status, body, headers
+
+    def _steamid(self, request: _Request) -> str | None:
+        # Logged in requests carry a "steamid||access_token" cookie
+        cookie = request.cookies.get("steamLoginSecure", "")
+        steamid, _, token = cookie.partition("%7C%7C")
+        return steamid if self._token_owner(token) == steamid else None
+
+    def _token_owner(self, access_token: str) -> str | None:
+        steamid, expires_at = self._tokens.get(access_token, (None, 0))
+        return steamid if expires_at > time.time() else None
+
+    def _new_token(self, steamid: str, lifetime: float) -> str:
+        # Steam's tokens are JWTs, clients read when they expire from the payload
+        def encode(part: dict) -> str:
+            return (
+                base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+            )
+
+        expires_at = int(time.time() + lifetime)
+        header = {"typ": "JWT", "alg": "EdDSA"}
+        payload = {"iss": "steam", "sub": steamid, "exp": expires_at}
+        payload["jti"] = secrets.token_hex(8)
+        signature = base64.urlsafe_b64encode(secrets.token_bytes(64)).decode()
+        return f"{encode(header)}.{encode(payload)}.{signature.rstrip('=')}"
+
+    def _new_access_token(self, steamid: str) -> str:
+        token = self._new_token(steamid, self.access_token_lifetime)
+        with self._lock:
+            self._tokens[token] = (steamid, time.time() + self.access_token_lifetime)
+        return token
+
+    # Login
+
+    def _rsa_key(self, request: _Request) -> Reply:
+        response = {
+            "publickey_mod": format(self._rsa_public.n, "x"),
+            "publickey_exp": format(self._rsa_public.e, "x"),
+            "timestamp": str(int(time.time() * 1_000_000)),
+        }
+        return 200, {"response": response}, {}
+
+    def _begin_auth_session(self, request: _Request) -> Reply:
+        encrypted = base64.b64decode(request.arg("encrypted_password", ""))
+        try:
+            rsa.decrypt(encrypted, self._rsa_private)
+        except rsa.DecryptionError:
+            return 200, {"response": {}}, {"X-eresult": "5"}
+
+        username = request.arg("account_name", "")
+        steamid = str(76561197960265728 + zlib.crc32(username.encode()))
+        client_id = str(self._rng.getrandbits(63))
+        with self._lock:
+            self._auth_sessions[client_id] = steamid
+        response = {
+            "client_id": client_id,
+            "request_id": base64.b64encode(secrets.token_bytes(16)).decode(),
+            "interval": 5,
+            "allowed_confirmations": [{"confirmation_type": 3}],
+            "steamid": steamid,
+        }
+        return 200, {"response": response}, {}
+
+    def _update_auth_session(self, request: _Request) -> Reply:
+        return 200, {"response": {}}, {}
+
+    def _poll_auth_session(self, request: _Request) -> Reply:
+        steamid = self._auth_sessions.get(request.arg("client_id"))
+        if steamid is None:
+            return 200, {"response": {}}, {"X-eresult": "9"}
+
+        refresh_token = self._new_token(steamid, 200 * 24 * 60 * 60)
+        with self._lock:
+            self._refresh_tokens[refresh_token] = steamid
+        response = {
+            "refresh_token": refresh_token,
+            "access_token": self._new_access_token(steamid),
+            "had_remote_interaction": False,
+            "account_name": steamid,
+        }
+        return 200, {"response": response}, {}
+
+    def _finalize_login(self, request: _Request) -> Reply:
+        steamid = self._refresh_tokens.get(request.arg("nonce"))
+        if steamid is None:
+            return 200, {"success": False, "error": 3}, {}
+
+        hosts = (
+            "steamcommunity.com",
+            "help.steampowered.com",
+            "store.steampowered.com",
+            "checkout.steampowered.com",
+        )
+        transfer_info = [
+            {
+                "url": f"https://{host}/login/settoken",
+                "params": {
+                    "nonce": self._new_access_token(steamid),
+                    "auth": secrets.token_hex(16),
+                },
+            }
+            for host in hosts
+        ]
+        return 200, {"steamID": steamid, "transfer_info": transfer_info}, {}
+
+    def _set_token(self, request: _Request, host: str) -> Reply:
+        access_token = request.arg("nonce", "")
+        steamid = request.arg("steamID", "")
+        if self._token_owner(access_token) != steamid:
+            return 200, {"result": 8}, {}
+
+        cookies = [f"steamLoginSecure={steamid}%7C%7C{access_token}; Path=/; HttpOnly"]
+        if host == "help.steampowered.com":
+            cookies.append(f"sessionid={secrets.token_hex(12)}; Path=/")
+        return 200, {"result": 1}, {"Set-Cookie": cookies}
+
+    def _generate_access_token(self, request: _Request) -> Reply:
+        steamid = self._refresh_tokens.get(request.arg("refresh_token"))
+        if steamid is None or steamid != request.arg("steamid"):
+            return 401, "", {"X-eresult": "15"}
+        return 200, {"response": {"access_token": self._new_access_token(steamid)}}, {}
+
+    def _query_time(self, request: _Request) -> Reply:
+        response = {
+            "server_time": str(int(time.time())),
+            "skew_tolerance_seconds": "60",
+            "large_time_jink": "86400",
+        }
+        return 200, {"response": response}, {}
+
+    def _emoticon_data(self, request: _Request) -> Reply:
+        return (200 if self._steamid(request) else 401), "", {}
+
+    # Market
+
+    def _inventory(
+        self, request: _Request, steamid: str, appid: str, contextid: str
+    ) -> Reply:
+        count = int(request.arg("count", 5000))
+        start_assetid = int(request.arg("start_assetid", 0))
+        rng = random.Random(f"{self.seed}-{steamid}-{appid}-{contextid}")
+        n_classes = max(1, self.inventory_size // 20)
+        classes = [str(rng.randrange(10**9, 10**10)) for _ in range(n_classes)]
+
+        first = start_assetid - 30_000_000_000 + 1 if start_assetid else 0
+        last = min(self.inventory_size, first + count)
+        assets = []
+        descriptions = {}
+        for i in range(first, last):
+            classid = classes[(i * 7919) % n_classes]
+            assets.append(
+                {
+                    "appid": int(appid),
+                    "contextid": contextid,
+                    "assetid": str(30_000_000_000 + i),
+                    "classid": classid,
+                    "instanceid": "0",
+                    "amount": "1",
+                }
+            )
+            descriptions[classid] = {
+                "appid": int(appid),
+                "classid": classid,
+                "instanceid": "0",
+                "market_hash_name": f"Item {classid}",
+                "marketable": 1,
+                "tradable": 1,
+            }
+
+        response = {"success": 1, "total_inventory_count": self.inventory_size}
+        if assets:
+            response["assets"] = assets
+            response["descriptions"] = list(descriptions.values())
+        if last < self.inventory_size:
+            response["more_items"] = 1
+            response["last_assetid"] = assets[-1]["assetid"]
+        return 200, response, {}
+
+    def _account_listings(self, steamid: str) -> Dict[str, dict]:
+        with self._lock:
+            if steamid not in self._listings:
+                self._listings[steamid] = {}
+                self._confirmations[steamid] = {}
+                for i in range(self._n_listings):
+                    self._new_listing(steamid, "730", "2", str(40_000_000_000 + i), 2)
+            return self._listings[steamid]
+
+    def _new_listing(
+        self, steamid: str, appid: str, contextid: str, assetid: str, status: int
+    ) -> dict:
+        # Status 2 is active, 17 waiting for a confirmation
+        price = self._rng.randrange(3, 100_000)
+        listing = {
+            "listingid": str(self._rng.getrandbits(62)),
+            "time_created": int(time.time()),
+            "asset": {
+                "appid": int(appid),
+                "contextid": contextid,
+                "id": assetid,
+                "classid": str(zlib.crc32(assetid.encode())),
+                "instanceid": "0",
+                "amount": "1",
+                "market_hash_name": f"Item {assetid}",
+            },
+            "price": price,
+            "fee": max(2, price // 10),
+            "status": status,
+        }
+        self._listings[steamid][listing["listingid"]] = listing
+        return listing
+
+    def _my_listings(self, request: _Request) -> Reply:
+        steamid = self._steamid(request)
+        if steamid is None:
+            return 200, None, {}
+
+        listings = self._account_listings(steamid)
+        start = int(request.arg("start", 0))
+        count = int(request.arg("count", 100))
+        with self._lock:
+            active = [l for l in listings.values() if l["status"] == 2]
+            to_confirm = [l for l in listings.values() if l["status"] == 17]
+        response = {
+            "success": True,
+            "pagesize": count,
+            "total_count": len(active),
+            "start": start,
+            "num_active_listings": len(active),
+            "listings": active[start : start + count],
+            "listings_on_hold": [],
+            "listings_to_confirm": to_confirm,
+            "buy_orders": [],
+        }
+        return 200, response, {}
+
+    def _price_overview(self, request: _Request) -> Reply:
+        name = request.arg("market_hash_name", "")
+        rng = random.Random(f"{self.seed}-{name}")
+        lowest = rng.randrange(3, 100_000)
+        response = {"success": True, "lowest_price": f"${lowest / STEAM_FACTOR:,.2f}"}
+        if rng.random() < 0.9:
+            median = lowest + rng.randrange(0, lowest // 10 + 1)
+            response["volume"] = f"{rng.randrange(1, 10_000):,}"
+            response["median_price"] = f"${median / STEAM_FACTOR:,.2f}"
+        return 200, response, {}
+
+    def _price_history(self, request: _Request) -> Reply:
+        if self._steamid(request) is None:
+            return 400, [], {}
+
+        # The last 30 days, one point per hour
+        name = request.arg("market_hash_name", "")
+        rng = random.Random(f"{self.seed}-{name}")
+        price = rng.uniform(0.03, 1000)
+        now = int(time.time()) // 3600 * 3600
+        prices = []
+        for hour in range(now - 30 * 24 * 3600, now, 3600):
+            t = time.gmtime(hour)
+            date = (
+                f"{_MONTHS[t.tm_mon - 1]} {t.tm_mday:02} {t.tm_year} {t.tm_hour:02}: +0"
+            )
+            price = max(0.03, price * rng.uniform(0.97, 1.03))
+            prices.append([date, round(price, 3), str(rng.randrange(1, 500))])
+        return 200, {"success": True, "price_prefix": "$", "prices": prices}, {}
+
+    def _sell_item(self, request: _Request) -> Reply:
+        steamid = self._steamid(request)
+        if steamid is None or not request.arg("sessionid"):
+            return 400, {"success": False}, {}
+        if int(request.arg("price", 0)) < 1:
+            message = "The price entered plus fees must be at least $0.03."
+            return 502, {"success": False, "message": message}, {}
+
+        self._account_listings(steamid)
+        with self._lock:
+            listing = self._new_listing(
+                steamid,
+                request.arg("appid"),
+                request.arg("contextid"),
+                request.arg("assetid"),
+                17,
+            )
+            confirmation = {
+                "type": 3,
+                "id": str(self._rng.getrandbits(62)),
+                "creator_id": listing["listingid"],
+                "nonce": str(self._rng.getrandbits(62)),
+                "creation_time": listing["time_created"],
+                "headline": listing["asset"]["market_hash_name"],
+                "summary": [f"${listing['price'] / STEAM_FACTOR:,.2f}"],
+            }
+            self._confirmations[steamid][confirmation["id"]] = confirmation
+        return 200, {"success": True, "requires_confirmation": 1}, {}
+
+    def _remove_listing(self, request: _Request, listingid: str) -> Reply:
+        steamid = self._steamid(request)
+        if steamid is None:
+            return 400, [], {}
+        with self._lock:
+            self._account_listings(steamid).pop(listingid, None)
+        return 200, [], {}
+
+    def _confirmation_list(self, request: _Request) -> Reply:
+        steamid = self._steamid(request)
+        if steamid is None:
+            return 200, {"success": False, "needauth": True}, {}
+        self._account_listings(steamid)
+        with self._lock:
+            conf = list(self._confirmations[steamid].values())
+        return 200, {"success": True, "conf": conf}, {}
+
+    def _confirmation_op(self, request: _Request) -> Reply:
+        steamid = self._steamid(request)
+        if steamid is None:
+            return 200, {"success": False}, {}
+
+        ids = request.form.get("cid[]", [request.arg("cid")])
+        allow = request.arg("op") == "allow"
+        self._account_listings(steamid)
+        with self._lock:
+            listings = self._listings[steamid]
+            for confirmationid in ids:
+                confirmation = self._confirmations[steamid].pop(confirmationid, None)
+                if confirmation is None:
+                    continue
+                listing = listings[confirmation["creator_id"]]
+                if allow:
+                    listing["status"] = 2
+                else:
+                    del listings[listing["listingid"]]
+        return 200, {"success": True}, {}
+
+    # Store
+
+    def _badge_info(self, request: _Request, appid: str) -> Reply:
+        if self._steamid(request) is None:
+            return 200, "<html><body>Sign In</body></html>", {}
+        if int(appid) % 3 == 0:
+            return 200, {"eresult": 1}, {}
+
+        cards = [{"markethash": f"{appid}-Card {i}"} for i in range(1, 7)]
+        return 200, {"eresult": 1, "badgedata": {"rgCards": cards}}, {}
+
+    @staticmethod
+    def _app_price(appid: int) -> int | None:
+        # Every 10th app is free, prices are in cents
+        if appid % 10 == 0:
+            return None
+        return 99 + zlib.crc32(str(appid).encode()) % 6000
+
+    def _app_details(self, request: _Request) -> Reply:
+        appids = request.arg("appids", "").split(",")
+        if request.arg("filters") == "price_overview":
+            if len(appids) > 500:
+                return 400, None, {}
+
+            response = {}
+            for appid in appids:
+                price = self._app_price(int(appid))
+                if price is None:
+                    response[appid] = {"success": True, "data": []}
+                    continue
+                discount = zlib.crc32(appid.encode()) % 4 * 25
+                final = price * (100 - discount) // 100
+                response[appid] = {
+                    "success": True,
+                    "data": {
+                        "price_overview": {
+                            "currency": "USD",
+                            "initial": price,
+                            "final": final,
+                            "discount_percent": discount,
+                            "initial_formatted": f"${price / STEAM_FACTOR:.2f}",
+                            "final_formatted": f"${final / STEAM_FACTOR:.2f}",
+                        }
+                    },
+                }
+            return 200, response, {}
+
+        # Full details are only returned for a single app
+        if len(appids) != 1:
+            return 400, None, {}
+        appid = appids[0]
+        data = {"type": "game", "name": f"Game {appid}", "steam_appid": int(appid)}
+        data["packages"] = [int(appid) * 10 + 1]
+        return 200, {appid: {"success": True, "data": data}}, {}
+
+    def _search(self, request: _Request) -> Reply:
+        start = int(request.arg("start", 0))
+        count = min(100, int(request.arg("count", 50)))
+        items = []
+        for i in range(start, min(start + count, self.search_size)):
+            appid = 10 + i * 10
+            items.append(
+                {
+                    "name": f"Game {appid}",
+                    "logo": f"https://shared.akamai.steamstatic.com/store_item_assets/steam/apps/{appid}/capsule_sm_120.jpg?t=1700000000",
+                }
+            )
+        return 200, {"desc": "", "items": items, "total_count": self.search_size}, {}
+
+    def _user_data(self, request: _Request) -> Reply:
+        steamid = self._steamid(request)
+        if steamid is None:
+            return 200, {"rgOwnedApps": []}, {}
+        rng = random.Random(f"{self.seed}-{steamid}")
+        owned = sorted(rng.sample(range(10, 100_000, 10), 100))
+        return 200, {"rgOwnedApps": owned}, {}
+
+    def _wallet(self, steamid: str) -> int:
+        return self._wallets.setdefault(steamid, self._wallet_balance)
+
+    def _account(self, request: _Request) -> Reply:
+        steamid = self._steamid(request)
+        if steamid is None:
+            return 302, "", {"Location": "https://store.steampowered.com/login/"}
+
+        with self._lock:
+            balance = self._wallet(steamid) / STEAM_FACTOR
+        html = (
+            '<html><body><div class="accountRow accountBalance">'
+            f'<div class="accountData price">${balance:,.2f}</div>'
+            "</div></body></html>"
+        )
+        return 200, html, {}
+
+    def _add_to_cart(self, request: _Request) -> Reply:
+        # The packages come in a protobuf, only the number of them matters here
+        steamid = self._token_owner(request.arg("access_token"))
+        if steamid is None:
+            return 401, "", {}
+
+        match = re.search(
+            rb'name="input_protobuf_encoded"\r\n\r\n([^\r]+)', request.body
+        )
+        message = base64.b64decode(match.group(1)) if match else b""
+        with self._lock:
+            self._carts[steamid] = self._carts.get(steamid, 0) + _count_items(message)
+        return 200, {"response": {}}, {}
+
+    def _init_transaction(self, request: _Request) -> Reply:
+        if self._steamid(request) is None:
+            return 200, {"success": 2}, {}
+        return 200, {"success": 1, "transid": str(self._rng.getrandbits(62))}, {}
+
+    def _cart_total(self, steamid: str) -> int:
+        return 999 * self._carts.get(steamid, 0)
+
+    def _final_price(self, request: _Request) -> Reply:
+        steamid = self._steamid(request)
+        if steamid is None:
+            return 200, {"success": 2}, {}
+        with self._lock:
+            total = self._cart_total(steamid)
+        return 200, {"success": 1, "base": total, "tax": 0, "total": total}, {}
+
+    def _finalize_transaction(self, request: _Request) -> Reply:
+        steamid = self._steamid(request)
+        if steamid is None:
+            return 200, {"success": 2}, {}
+        with self._lock:
+            total = self._cart_total(steamid)
+            if total > self._wallet(steamid):
+                return 200, {"success": 2}, {}
+            self._wallets[steamid] -= total
+            self._carts.pop(steamid, None)
+        return 200, {"success": 22}, {}
+
+
+def _count_items(message: bytes) -> int:
+    # Number of `items` (field 2) in a CAccountCart_AddItemsToCart_Request
+    def varint(i: int) -> Tuple[int, int]:
+        value = shift = 0
+        while True:
+            byte = message[i]
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            i += 1
+            if not byte & 0x80:
+                return value, i
+
+    count = i = 0
+    while i < len(message):
+        tag, i = varint(i)
+        if tag & 7 == 0:
+            _, i = varint(i)
+        else:  # length delimited, the only other wire type in this message
+            length, i = varint(i)
+            i += length
+        count += tag >> 3 == 2
+    return count
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m pysaw.standin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="429 probability")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--error", type=float, default=0.0, help="5xx probability")
+    parser.add_argument(
+        "--malformed", type=float, default=0.0, help="bad JSON probability"
+    )
+    parser.add_argument("--inventory-size", type=int, default=1000)
+    parser.add_argument("--listings", type=int, default=250)
+    parser.add_argument("--search-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    faults = Faults(
+        args.latency,
+        args.jitter,
+        args.rate_limit,
+        args.retry_after,
+        args.error,
+        args.malformed,
+    )
+    standin = StandIn(
+        args.host,
+        args.port,
+        faults,
+        args.inventory_size,
+        args.listings,
+        args.search_size,
+        seed=args.seed,
+    )
+    print(f"Serving on {standin.base_url}")
+    try:
+        standin.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
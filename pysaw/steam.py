@@ -1,3 +1,10 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+
+import httpx
 import requests
 from bs4 import BeautifulSoup
 
@@ -6,29 +13,147 @@ from . import market
 from . import login
 from . import store
 from . import confirmation
+from . import session
+from .cache import ResponseCache
+from .metrics import Metrics, instrumented
+from .models import Request
+from .ratelimit import RateLimiter
 from .utils import formatted_to_float, login_required
 
+_WALLET_BALANCE_RE = re.compile(rb'class="accountData price"[^>]*>([^<]+)<')
+
+logger = logging.getLogger(__name__)
+
 
 class Steam:
+    # What the components are built from, `AsyncSteam` swaps in the async versions
+    _login_executor_class = login.LoginExecutor
+    _guard_class = guard.SteamGuard
+    _store_class = store.Store
+    _market_class = market.SteamMarket
+    _confirmator_class = confirmation.ConfirmationExecutor
+    _lock_class = threading.Lock
+
     def __init__(
-        self, username: str = None, password: str = None, steam_guard_path: str = None
+        self,
+        username: str = None,
+        password: str = None,
+        steam_guard_path: str = None,
+        rate_limiter: RateLimiter = None,
+        cache: ResponseCache = None,
+        time_sync_interval: float = None,
+        metrics: Metrics = None,
+        base_url: str = None,
     ):
+        # `base_url` sends every request there instead of to Steam, e.g. to a local
+        # `pysaw.standin.StandIn`
+        self._session = session.Session(
+            rate_limiter, metrics=metrics, base_url=base_url
+        )
+        self._keep_alive_stop = threading.Event()
+        self._init(
+            username, password, steam_guard_path, cache, time_sync_interval, metrics
+        )
+
+    def _init(
+        self,
+        username: str,
+        password: str,
+        steam_guard_path: str,
+        cache: ResponseCache,
+        time_sync_interval: float,
+        metrics: Metrics,
+    ) -> None:
+        # Everything but the session, which each subclass builds its own way
         self._username = username
         self._password = password
-        self._session = requests.Session()
+        self.cache = cache
+        self.metrics = metrics
         self._steamid = ""
         self._sessionid = ""
+        self._wallet_balance = None
+        self._session_path = None
         self._was_login_executed = False
-        self._login_exec = login.LoginExecutor(self)
+        self._login_exec = self._login_executor_class(self)
+        self._refresh_lock = self._lock_class()
+        self._keep_alive = None
+
+        self.guard = self._guard_class(self, steam_guard_path, time_sync_interval)
+        self.store = self._store_class(self)
+        self.market = self._market_class(self)
+        self.confirmator = self._confirmator_class(self)
 
-        self.guard = guard.SteamGuard(self, steam_guard_path)
-        self.store = store.Store(self)
-        self.market = market.SteamMarket(self)
-        self.confirmator = confirmation.ConfirmationExecutor(self)
+    def login(self, session_path: str = None) -> None:
+        # With `session_path`, the session saved there by a previous login is reused
+        # as long as Steam still accepts it, or renewed with its refresh token once it
+        # doesn't. Otherwise a full login is done and its session is saved for next
+        # time.
+        self._wallet_balance = None
+        self._session_path = session_path
+        if session_path is not None and self._login_exec.load_session(session_path):
+            self._was_login_executed = True
+            if self.is_session_alive():
+                return
+            if self._login_exec.refresh():
+                self._login_exec.save_session(session_path)
+                return
+            self._was_login_executed = False
+            self._session.cookies.clear()
+            self._steamid = ""
 
-    def login(self) -> None:
         self._login_exec.login()
         self._was_login_executed = True
+        if session_path is not None:
+            self._login_exec.save_session(session_path)
+
+    @login_required
+    def refresh_session(self) -> None:
+        # Renews the login cookies with the refresh token, which is much cheaper than
+        # `login()` and doesn't use a steam guard code. Requests from other threads
+        # wait until it's done. Falls back to a full login if Steam rejects the
+        # refresh token.
+        with self._refresh_lock, self._session.paused():
+            if not self._login_exec.refresh():
+                self._session.cookies.clear()
+                self._steamid = ""
+                self._login_exec.login()
+            if self._session_path is not None:
+                self._login_exec.save_session(self._session_path)
+
+    @login_required
+    def start_keep_alive(self, interval: float = 300, margin: float = 600) -> None:
+        # Checks the session every `interval` seconds on a background thread and
+        # refreshes it once it's `margin` seconds from expiring (or, if we can't tell
+        # when it expires, once Steam stops accepting it)
+        if self._keep_alive is not None and self._keep_alive.is_alive():
+            return
+
+        self._keep_alive_stop.clear()
+        self._keep_alive = threading.Thread(
+            target=self._keep_session_alive, args=(interval, margin), daemon=True
+        )
+        self._keep_alive.start()
+
+    def stop_keep_alive(self) -> None:
+        self._keep_alive_stop.set()
+        if self._keep_alive is not None:
+            self._keep_alive.join()
+            self._keep_alive = None
+
+    def _keep_session_alive(self, interval: float, margin: float) -> None:
+        while not self._keep_alive_stop.wait(interval):
+            try:
+                if self._session_expires_within(margin):
+                    self.refresh_session()
+            except Exception:
+                # Whatever went wrong, the thread must live on to try again
+                logger.exception("Couldn't keep %s's session alive", self._username)
+
+    def _session_expires_within(self, margin: float) -> bool:
+        expiry = self._login_exec.session_expiry()
+        if expiry is None:
+            return not self.is_session_alive()
+        return expiry - time.time() < margin
 
     @property
     @login_required
@@ -49,18 +174,204 @@ class Steam:
         return self._steamid
 
     @login_required
-    def fetch_wallet_balance(self) -> float:
-        url = "https://store.steampowered.com/account/"
-        response = self._session.get(url)
+    @instrumented("fetch_wallet_balance")
+    def fetch_wallet_balance(self, refresh: bool = False) -> float:
+        # Steam is only asked the first time (or with `refresh`), after that the
+        # balance is kept up to date locally through `adjust_wallet_balance()`
+        if self._wallet_balance is None or refresh:
+            response = self._send(self._wallet_balance_request())
+            self._wallet_balance = self._parse_wallet_balance(response.content)
+
+        return self._wallet_balance
+
+    def adjust_wallet_balance(self, delta: float) -> None:
+        # E.g. `-total` after a purchase or `listing.you_receive` after a sale. Does
+        # nothing if the balance hasn't been fetched yet.
+        if self._wallet_balance is not None:
+            self._wallet_balance = round(self._wallet_balance + delta, 2)
+
+    @login_required
+    @instrumented("is_session_alive")
+    def is_session_alive(self) -> bool:
+        response = self._send(self._session_alive_request())
+
+        return response.status_code == 200  # 401 if logged out
+
+    def _send(self, request: Request) -> "requests.Response":
+        return self._session.request(
+            request.method,
+            request.url,
+            params=request.params,
+            data=request.data,
+            headers=request.headers,
+            files=request.files,
+            allow_redirects=request.follow_redirects,
+        )
+
+    @staticmethod
+    def _wallet_balance_request() -> Request:
+        return Request("GET", "https://store.steampowered.com/account/")
+
+    @staticmethod
+    def _session_alive_request() -> Request:
+        return Request(
+            "HEAD",
+            "https://steamcommunity.com/actions/EmoticonData",
+            headers={"Connection": ""},
+            follow_redirects=False,
+        )
+
+    @staticmethod
+    def _parse_wallet_balance(html: bytes) -> float:
+        # A regex finds the balance without parsing the whole page, BeautifulSoup is
+        # only a fallback in case Steam changes its markup
+        match = _WALLET_BALANCE_RE.search(html)
+        if match is not None:
+            return formatted_to_float(match.group(1).decode())
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = BeautifulSoup(html, "html.parser")
         balance_formatted = soup.find("div", class_="accountData price").text
 
         return formatted_to_float(balance_formatted)
 
+
+class AsyncSteam(Steam):
+    # Same interface as `Steam` but every method that goes through the network is a
+    # coroutine. All the requests share a single `httpx.AsyncClient`, so its
+    # connection pool is what limits how many requests can be in flight at once.
+    _login_executor_class = login.AsyncLoginExecutor
+    _guard_class = guard.AsyncSteamGuard
+    _store_class = store.AsyncStore
+    _market_class = market.AsyncSteamMarket
+    _confirmator_class = confirmation.AsyncConfirmationExecutor
+    _lock_class = asyncio.Lock
+
+    def __init__(
+        self,
+        username: str = None,
+        password: str = None,
+        steam_guard_path: str = None,
+        rate_limiter: RateLimiter = None,
+        cache: ResponseCache = None,
+        time_sync_interval: float = None,
+        max_connections: int = 100,
+        metrics: Metrics = None,
+        base_url: str = None,
+        transport: httpx.AsyncBaseTransport = None,
+    ):
+        # A `transport` (and its connection pool) can be shared between clients,
+        # `max_connections` and `base_url` are then up to whoever created it
+        limits = httpx.Limits(max_connections=max_connections)
+        if transport is None and base_url is not None:
+            transport = session.BaseUrlTransport(base_url, limits=limits)
+        self._session = session.AsyncSession(
+            rate_limiter,
+            metrics=metrics,
+            follow_redirects=True,
+            limits=limits,
+            transport=transport,
+        )
+        self._init(
+            username, password, steam_guard_path, cache, time_sync_interval, metrics
+        )
+
+    async def __aenter__(self) -> "AsyncSteam":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.stop_keep_alive()
+        await self._session.aclose()
+
+    async def login(self, session_path: str = None) -> None:
+        self._wallet_balance = None
+        self._session_path = session_path
+        if session_path is not None and self._login_exec.load_session(session_path):
+            self._was_login_executed = True
+            if await self.is_session_alive():
+                return
+            if await self._login_exec.refresh():
+                self._login_exec.save_session(session_path)
+                return
+            self._was_login_executed = False
+            self._session.cookies.clear()
+            self._steamid = ""
+
+        await self._login_exec.login()
+        self._was_login_executed = True
+        if session_path is not None:
+            self._login_exec.save_session(session_path)
+
     @login_required
-    def is_session_alive(self) -> bool:
-        url = "https://steamcommunity.com/actions/EmoticonData"
-        response = self._session.head(url, headers={"Connection": ""})
+    async def refresh_session(self) -> None:
+        async with self._refresh_lock:
+            with self._session.paused():
+                if not await self._login_exec.refresh():
+                    self._session.cookies.clear()
+                    self._steamid = ""
+                    await self._login_exec.login()
+                if self._session_path is not None:
+                    self._login_exec.save_session(self._session_path)
+
+    @login_required
+    def start_keep_alive(self, interval: float = 300, margin: float = 600) -> None:
+        # Same as `Steam.start_keep_alive()` but on a task of the running event loop
+        if self._keep_alive is not None and not self._keep_alive.done():
+            return
+
+        self._keep_alive = asyncio.get_running_loop().create_task(
+            self._keep_session_alive(interval, margin)
+        )
+
+    async def stop_keep_alive(self) -> None:
+        if self._keep_alive is not None:
+            self._keep_alive.cancel()
+            try:
+                await self._keep_alive
+            except asyncio.CancelledError:
+                pass
+            self._keep_alive = None
+
+    async def _keep_session_alive(self, interval: float, margin: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self._session_expires_within(margin):
+                    await self.refresh_session()
+            except Exception:
+                logger.exception("Couldn't keep %s's session alive", self._username)
+
+    async def _session_expires_within(self, margin: float) -> bool:
+        expiry = self._login_exec.session_expiry()
+        if expiry is None:
+            return not await self.is_session_alive()
+        return expiry - time.time() < margin
+
+    @login_required
+    @instrumented("fetch_wallet_balance")
+    async def fetch_wallet_balance(self, refresh: bool = False) -> float:
+        if self._wallet_balance is None or refresh:
+            response = await self._send(self._wallet_balance_request())
+            self._wallet_balance = self._parse_wallet_balance(response.content)
+
+        return self._wallet_balance
+
+    @login_required
+    @instrumented("is_session_alive")
+    async def is_session_alive(self) -> bool:
+        response = await self._send(self._session_alive_request())
 
         return response.status_code == 200  # 401 if logged out
+
+    async def _send(self, request: Request) -> "httpx.Response":
+        return await self._session.request(
+            request.method,
+            request.url,
+            params=request.params,
+            data=request.data,
+            headers=request.headers,
+            files=request.files,
+            follow_redirects=request.follow_redirects,
+        )
@@ -1,9 +1,25 @@
 import re
 import json
+import asyncio
 import base64
-from typing import List, Dict, TYPE_CHECKING
-
-from .utils import login_required, n_elements_per_call, encode_varint
+import functools
+import random
+import time
+from typing import AsyncIterator, Iterable, Iterator, List, Dict, Tuple, TYPE_CHECKING
+
+import httpx
+import requests
+
+from .cache import cached
+from .metrics import instrumented
+from .utils import (
+    login_required,
+    n_elements_per_call,
+    ProtobufWriter,
+    run_concurrently,
+    arun_concurrently,
+    decode_response,
+)
 from .exceptions import TransactionError, NotEnoughFunds
 from .constants import (
     StoreSort,
@@ -11,141 +27,212 @@ from .constants import (
     FeaturesFilter,
     CountryCode,
     STEAM_FACTOR,
+    MAX_APPDETAILS_CHUNK_SIZE,
 )
-from .models import PysawBase
+from .models import PysawBase, Request
 
 if TYPE_CHECKING:
-    import requests
+    import pysaw
 
 
 class Store(PysawBase):
-    @login_required
-    def fetch_owned_apps(self) -> List[str]:
-        url = "https://store.steampowered.com/dynamicstore/userdata/"
-        response = self._steam._session.get(url)
+    # What a failed connection raises, appdetails requests that hit it are retried
+    _network_errors = requests.RequestException
 
-        return list(map(str, response.json()["rgOwnedApps"]))
+    def __init__(self, steam: "pysaw.Steam"):
+        super().__init__(steam)
+        # How many apps `fetch_app_price_many` asks for per request
+        self.chunk_size = MAX_APPDETAILS_CHUNK_SIZE
 
     @login_required
-    def fetch_app_trading_cards(self, appid: str) -> List[str]:
-        url = f"https://steamcommunity.com/my/ajaxgetbadgeinfo/{appid}"
-        response = self._steam._session.get(url)
-        try:
-            response_json = response.json()
-        except json.JSONDecodeError:
-            return self.fetch_app_trading_cards(appid)
+    @instrumented("fetch_owned_apps")
+    def fetch_owned_apps(self) -> List[str]:
+        response = self._send(self._owned_apps_request())
 
-        if response_json == {"eresult": 1}:  # game doesn't have trading cards
-            return []
+        return list(map(str, decode_response(response)["rgOwnedApps"]))
 
-        market_hash_names = []
-        for tc in response_json["badgedata"]["rgCards"]:
-            market_hash_names.append(tc["markethash"])
+    @login_required
+    @instrumented("fetch_app_trading_cards")
+    @cached("fetch_app_trading_cards", ignore=("max_retries",))
+    def fetch_app_trading_cards(self, appid: str, max_retries: int = 5) -> List[str]:
+        request = self._trading_cards_request(appid)
+        for attempt in range(max_retries + 1):
+            response = self._send(request)
+            try:
+                response_json = decode_response(response)
+            except json.JSONDecodeError:
+                # Every now and then Steam answers with an HTML page, try again
+                if attempt == max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                continue
 
-        return market_hash_names
+            return self._parse_trading_cards(response_json)
 
+    @login_required
+    @instrumented("fetch_app_trading_cards_many")
+    def fetch_app_trading_cards_many(
+        self, appids: Iterable[str], max_workers: int = 8
+    ) -> Dict[str, List[str] | Exception]:
+        # Trading cards of every app (an empty list for apps without them), or the
+        # exception raised while fetching them. Results go through `steam.cache`
+        # like `fetch_app_trading_cards`, so apps already seen aren't requested again.
+        return dict(run_concurrently(self.fetch_app_trading_cards, appids, max_workers))
+
+    @instrumented("fetch_app_price")
     def fetch_app_price(self, appid: str) -> Dict[str, int]:
         return self.fetch_app_price_many([appid])[appid]
 
+    @instrumented("fetch_app_price_many")
+    @cached("fetch_app_price_many", ignore=("max_workers",))
     def fetch_app_price_many(
-        self, appids: List[str], cc: CountryCode = CountryCode.ARGENTINA
+        self,
+        appids: Iterable[str],
+        cc: CountryCode = CountryCode.ARGENTINA,
+        max_workers: int = 4,
     ) -> Dict[str, Dict[str, int]]:
-        url = "https://store.steampowered.com/api/appdetails/"
-        prices = {}
-
         # There's no limit on how many apps we can request at once, but from
         # personal experience Steam seems to struggle (i.e. returns an error)
-        # for anything above 500.
-        for id in n_elements_per_call(appids, n=500):
-            params = {
-                "filters": "price_overview",
-                "appids": ",".join(id),
-                "cc": cc.value,
-            }
-            response = self._steam._session.get(url, params=params)
-            prices |= self._parse_prices(response.json())
+        # for anything above 500. Chunks Steam rejects are split in half and retried,
+        # and the size of the next chunks adapts to how often that happens. Outages
+        # (429s, 5xx, connection errors) are retried as they are and raised if they
+        # last, so no prices are returned (nor cached) for the apps they hit.
+        chunks = [list(ids) for ids in n_elements_per_call(appids, n=self.chunk_size)]
+        fetch = functools.partial(self._fetch_app_price_chunk, cc=cc)
+        prices = {}
+        for _, chunk_prices in run_concurrently(fetch, chunks, max_workers):
+            if isinstance(chunk_prices, Exception):
+                raise chunk_prices
+            prices |= chunk_prices
 
         return prices
 
+    def _fetch_app_price_chunk(
+        self, appids: List[str], cc: CountryCode, adapt: bool = True
+    ) -> Dict[str, Dict[str, int]]:
+        # Only the chunks `fetch_app_price_many()` makes (`adapt`) change the chunk
+        # size, not the halves of a rejected one
+        prices = self._request_app_prices(appids, cc)
+        if adapt:
+            self.chunk_size = self._next_chunk_size(
+                self.chunk_size, len(appids), prices is None
+            )
+        if prices is not None:
+            return prices
+        if len(appids) == 1:
+            return {appids[0]: {}}
+
+        half = len(appids) // 2
+        first = self._fetch_app_price_chunk(appids[:half], cc, adapt=False)
+        second = self._fetch_app_price_chunk(appids[half:], cc, adapt=False)
+        return first | second
+
+    def _request_app_prices(
+        self, appids: List[str], cc: CountryCode, max_retries: int = 3
+    ) -> Dict[str, Dict[str, int]] | None:
+        # None if appdetails rejects the request, which it does with a 4xx or a
+        # "null" body when it can't handle it (too many apps, some invalid appid)
+        request = self._app_prices_request(appids, cc)
+        for attempt in range(max_retries + 1):
+            try:
+                response = self._send(request)
+                response_json = self._read_app_prices(response)
+            except (self._network_errors, ValueError):
+                if attempt == max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                continue
+
+            if response_json is None:
+                return None
+            return self._parse_prices(response_json)
+
+    @classmethod
+    def _read_app_prices(cls, response: "requests.Response") -> dict | None:
+        if cls._is_outage(response.status_code):
+            response.raise_for_status()
+        if response.status_code != 200:
+            return None
+        return decode_response(response)
+
+    @instrumented("fetch_app_packages")
+    @cached("fetch_app_packages")
     def fetch_app_packages(self, appid: str) -> List[int]:
         # Not sure if this rule always applies, but when you have a game, the package
         # at index 0 is usually the game itself, while the rest of the packages are
         # stuff like "game + game soundtrack"
-        params = {"appids": appid}
-        url = "https://store.steampowered.com/api/appdetails"
-        response = self._steam._session.get(url, params=params)
+        response = self._send(self._app_packages_request(appid))
+
+        return decode_response(response)[appid]["data"]["packages"]
 
-        return response.json()[appid]["data"]["packages"]
+    @instrumented("fetch_app_packages_many")
+    def fetch_app_packages_many(
+        self, appids: Iterable[str], max_workers: int = 8
+    ) -> Dict[str, List[int] | Exception]:
+        # appdetails only accepts several appids at once when filtering by
+        # price_overview, so the packages are fetched concurrently (and cached)
+        # one app at a time.
+        return dict(run_concurrently(self.fetch_app_packages, appids, max_workers))
 
     @login_required
-    def add_to_cart(self, appid: str) -> None:
-        url = "https://api.steampowered.com/IAccountCartService/AddItemsToCart/v1"
-        params = {
-            "access_token": self._steam._login_exec.access_token,
-            "spoof_steamid": "",
-        }
+    @instrumented("add_to_cart")
+    def add_to_cart(self, appid: str, cc: CountryCode = CountryCode.ARGENTINA) -> None:
+        self.add_to_cart_many([appid], cc)
 
-        # Hacky way to create the protobuf message expected by Steam
-        # https://github.com/SteamDatabase/Protobufs/blob/6bf6fa0550f26cbaa329de2a576d2f61ee9172bd/webui/service_accountcart.proto#L34
-        subid = self.fetch_app_packages(appid)[0]
-        b64_protobuf = base64.b64encode(
-            b"\x0a\x02\x41\x52\x12\x04\x08" + encode_varint(subid)
-        )
-        files = (("input_protobuf_encoded", (None, b64_protobuf)),)
-        self._steam._session.post(url, params=params, files=files)
+    @login_required
+    @instrumented("add_to_cart_many")
+    def add_to_cart_many(
+        self, appids: Iterable[str], cc: CountryCode = CountryCode.ARGENTINA
+    ) -> None:
+        appids = list(appids)
+        packages = self.fetch_app_packages_many(appids)
+        self._send(self._add_to_cart_request(self._subids(appids, packages), cc))
 
     @login_required
+    @instrumented("purchase_cart")
     def purchase_cart(self) -> None:
         response_init = self._init_transaction()
-        if response_init.json()["success"] != 1:
+        if decode_response(response_init)["success"] != 1:
             raise TransactionError("Error when initializing the transaction")
 
-        transid = response_init.json()["transid"]
+        transid = decode_response(response_init)["transid"]
         response_info = self._info_transaction(transid)
-        self._assert_enough_funds_to_purchase_cart(response_info)
+        total = self._assert_enough_funds_to_purchase_cart(response_info)
 
         response_finalize = self._finalize_transaction(transid)
-        if response_finalize.json()["success"] != 22:  # https://steamerrors.com/22
+        # https://steamerrors.com/22
+        if decode_response(response_finalize)["success"] != 22:
             raise TransactionError("Error when finalizing the transaction")
+        self._steam.adjust_wallet_balance(-total)
 
     @login_required
     def _init_transaction(self) -> "requests.Response":
-        url = "https://checkout.steampowered.com/checkout/inittransaction/"
-        data = {
-            "PaymentMethod": "steamaccount",
-            "sessionid": self._steam._sessionid,
-            "bUseAccountCart": 1,
-            "gidShoppingCart": -1,
-            "sessionid": self._steam.sessionid,
-        }
-        response = self._steam._session.post(url, data=data)
-
-        return response
+        return self._send(self._init_transaction_request())
 
     @login_required
     def _info_transaction(self, transid: str) -> "requests.Response":
-        url = f"https://checkout.steampowered.com/checkout/getfinalprice/?transid={transid}"
-        response = self._steam._session.get(url)
-
-        return response
+        return self._send(self._info_transaction_request(transid))
 
     @login_required
     def _finalize_transaction(self, transid: str) -> "requests.Response":
-        url = "https://checkout.steampowered.com/checkout/finalizetransaction/"
-        data = {"transid": transid}
-        response = self._steam._session.post(url, data=data)
-
-        return response
+        return self._send(self._finalize_transaction_request(transid))
 
     @login_required
     def _assert_enough_funds_to_purchase_cart(
         self, response_info: "requests.Response"
-    ) -> None:
-        total = response_info.json()["total"] / STEAM_FACTOR
+    ) -> float:
+        # Checks against the locally kept balance, which could be outdated (e.g. if
+        # the wallet was funded meanwhile), so Steam is asked before giving up.
+        # Returns the total of the cart.
+        total = decode_response(response_info)["total"] / STEAM_FACTOR
         funds = self._steam.fetch_wallet_balance()
+        if total > funds:
+            funds = self._steam.fetch_wallet_balance(refresh=True)
         if total > funds:
             raise NotEnoughFunds(f"Have: {funds}, need: {total}")
+        return total
 
+    @instrumented("search")
     def search(
         self,
         term: str = "",
@@ -158,41 +245,198 @@ class Store(PysawBase):
         cc: CountryCode = CountryCode.ARGENTINA,
         ignore_preferences: bool = True,
         extract_all: bool = False,
+        max_workers: int = 1,
     ) -> Dict[str, Dict[str, str]]:
-        count = 100 if extract_all else count
-        app_types = app_types or []
-        features = features or []
+        if extract_all:
+            return dict(
+                self.iter_search(
+                    term,
+                    start,
+                    maxprice,
+                    sort_by,
+                    app_types,
+                    features,
+                    cc,
+                    ignore_preferences,
+                    max_workers,
+                )
+            )
 
+        params = self._search_params(
+            term, maxprice, sort_by, app_types, features, cc, ignore_preferences
+        )
+        return self._parse_search(self._fetch_search_page(params, start, count))
+
+    def iter_search(
+        self,
+        term: str = "",
+        start: int = 0,
+        maxprice: int = None,
+        sort_by: StoreSort = StoreSort.RELEVANCE,
+        app_types: List[AppTypeFilter] = None,
+        features: List[FeaturesFilter] = None,
+        cc: CountryCode = CountryCode.ARGENTINA,
+        ignore_preferences: bool = True,
+        max_workers: int = 1,
+    ) -> Iterator[Tuple[str, Dict[str, str]]]:
+        # Yields `(appid, app)` pairs from every page of results. With `max_workers`
+        # > 1, the first page's "total_count" is used to request the rest of the
+        # pages concurrently (yielded in the order they arrive).
+        params = self._search_params(
+            term, maxprice, sort_by, app_types, features, cc, ignore_preferences
+        )
+        response_json = self._fetch_search_page(params, start)
+        yield from self._parse_search(response_json).items()
+
+        total_count = response_json.get("total_count")
+        if max_workers > 1 and total_count is not None:
+            fetch = functools.partial(self._fetch_search_page, params)
+            starts = range(start + 100, total_count, 100)
+            for _, response_json in run_concurrently(fetch, starts, max_workers):
+                if isinstance(response_json, Exception):
+                    raise response_json
+                yield from self._parse_search(response_json).items()
+            return
+
+        while response_json["items"]:
+            start += 100
+            response_json = self._fetch_search_page(params, start)
+            yield from self._parse_search(response_json).items()
+
+    def _fetch_search_page(self, params: dict, start: int, count: int = 100) -> dict:
+        response = self._send(self._search_page_request(params, start, count))
+
+        return decode_response(response)
+
+    @staticmethod
+    def _owned_apps_request() -> Request:
+        return Request("GET", "https://store.steampowered.com/dynamicstore/userdata/")
+
+    @staticmethod
+    def _trading_cards_request(appid: str) -> Request:
+        return Request("GET", f"https://steamcommunity.com/my/ajaxgetbadgeinfo/{appid}")
+
+    @staticmethod
+    def _app_prices_request(appids: List[str], cc: CountryCode) -> Request:
+        url = "https://store.steampowered.com/api/appdetails/"
+        return Request("GET", url, params=Store._app_prices_params(appids, cc))
+
+    @staticmethod
+    def _app_packages_request(appid: str) -> Request:
+        url = "https://store.steampowered.com/api/appdetails"
+        return Request("GET", url, params={"appids": appid})
+
+    def _add_to_cart_request(self, subids: List[int], cc: CountryCode) -> Request:
+        url = "https://api.steampowered.com/IAccountCartService/AddItemsToCart/v1"
+        params = {
+            "access_token": self._steam._login_exec.access_token,
+            "spoof_steamid": "",
+        }
+        files = (("input_protobuf_encoded", (None, self._cart_protobuf(subids, cc))),)
+        return Request("POST", url, params=params, files=files)
+
+    def _init_transaction_request(self) -> Request:
+        url = "https://checkout.steampowered.com/checkout/inittransaction/"
+        data = {
+            "PaymentMethod": "steamaccount",
+            "sessionid": self._steam.sessionid,
+            "bUseAccountCart": 1,
+            "gidShoppingCart": -1,
+        }
+        return Request("POST", url, data=data)
+
+    @staticmethod
+    def _info_transaction_request(transid: str) -> Request:
+        url = f"https://checkout.steampowered.com/checkout/getfinalprice/?transid={transid}"
+        return Request("GET", url)
+
+    @staticmethod
+    def _finalize_transaction_request(transid: str) -> Request:
+        url = "https://checkout.steampowered.com/checkout/finalizetransaction/"
+        return Request("POST", url, data={"transid": transid})
+
+    @staticmethod
+    def _search_page_request(params: dict, start: int, count: int) -> Request:
+        url = "https://store.steampowered.com/search/results/"
+        return Request("GET", url, params=params | {"start": start, "count": count})
+
+    @staticmethod
+    def _subids(
+        appids: List[str], packages: Dict[str, List[int] | Exception]
+    ) -> List[int]:
+        # The first package of every app, which is usually the game itself
+        subids = []
+        for appid in appids:
+            if isinstance(packages[appid], Exception):
+                raise packages[appid]
+            subids.append(packages[appid][0])
+        return subids
+
+    @staticmethod
+    def _search_params(
+        term: str,
+        maxprice: int | None,
+        sort_by: StoreSort,
+        app_types: List[AppTypeFilter] | None,
+        features: List[FeaturesFilter] | None,
+        cc: CountryCode,
+        ignore_preferences: bool,
+    ) -> dict:
         params = {
             "term": term,
-            "count": count,
-            "start": start,
             "maxprice": maxprice,
             "sort_by": sort_by.value,
-            "category1": ",".join(map(str, app_types)),
-            "category2": ",".join(map(str, features)),
+            "category1": ",".join(map(str, app_types or [])),
+            "category2": ",".join(map(str, features or [])),
             "cc": cc.value,
             "ignore_preferences": int(ignore_preferences),
             "json": 1,
         }
-        url = "https://store.steampowered.com/search/results/"
-        response = self._steam._session.get(url, params=params)
-        apps = self._parse_search(response.json())
-
-        if apps and extract_all:
-            return apps | self.search(
-                term=term,
-                count=count,
-                start=start + count,
-                maxprice=maxprice,
-                sort_by=sort_by,
-                app_types=app_types,
-                features=features,
-                cc=cc,
-                ignore_preferences=ignore_preferences,
-                extract_all=True,
-            )
-        return apps
+        # `requests` skips parameters set to None, `httpx` doesn't
+        return {k: v for k, v in params.items() if v is not None}
+
+    @staticmethod
+    def _cart_protobuf(subids: List[int], cc: CountryCode) -> bytes:
+        # CAccountCart_AddItemsToCart_Request, one ItemToAdd per package
+        # https://github.com/SteamDatabase/Protobufs/blob/6bf6fa0550f26cbaa329de2a576d2f61ee9172bd/webui/service_accountcart.proto#L34
+        request = ProtobufWriter().string(1, cc.value.upper())  # user_country
+        for subid in subids:
+            request.message(2, ProtobufWriter().varint(1, subid))  # items.packageid
+        return base64.b64encode(request.getvalue())
+
+    @staticmethod
+    def _app_prices_params(appids: List[str], cc: CountryCode) -> dict:
+        return {"filters": "price_overview", "appids": ",".join(appids), "cc": cc.value}
+
+    @staticmethod
+    def _is_outage(status_code: int) -> bool:
+        # Errors that say nothing about the request itself, worth retrying as is
+        return status_code == 429 or status_code >= 500
+
+    @staticmethod
+    def _next_chunk_size(chunk_size: int, n_appids: int, rejected: bool) -> int:
+        # Halve the chunk Steam rejected, grow back slowly while it rejects none.
+        # Concurrent chunks rejected together only shrink it once.
+        if rejected:
+            return max(1, min(chunk_size, n_appids // 2))
+        return min(MAX_APPDETAILS_CHUNK_SIZE, chunk_size + chunk_size // 4 + 1)
+
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        # Exponential backoff with full jitter, so that concurrent retries don't all
+        # hit Steam at the same time
+        return random.uniform(0, min(30, 0.5 * 2**attempt))
+
+    @staticmethod
+    def _parse_trading_cards(response_json: dict) -> List[str]:
+        if response_json == {"eresult": 1}:  # game doesn't have trading cards
+            return []
+
+        market_hash_names = []
+        for tc in response_json["badgedata"]["rgCards"]:
+            market_hash_names.append(tc["markethash"])
+
+        return market_hash_names
 
     @staticmethod
     def _parse_search(response_json: dict) -> Dict[str, Dict[str, str]]:
@@ -209,20 +453,271 @@ class Store(PysawBase):
 
     @staticmethod
     def _parse_prices(response_json: dict) -> Dict[str, Dict[str, int]]:
-        prices = {}
-        for appid in response_json:
-            if not response_json[appid]["success"] or not response_json[appid]["data"]:
-                # The game isn't available for your region / the game doesn't have a
-                # price yet / the game is free.
-                # Unfortunately we have no way of knowing which is which based on the
-                # response ¯\_(ツ)_/¯.
-                prices[appid] = {}
+        return {
+            appid: Store._parse_app_price(app) for appid, app in response_json.items()
+        }
+
+    @staticmethod
+    def _parse_app_price(app: dict) -> Dict[str, int]:
+        if not app["success"] or not app["data"]:
+            # The game isn't available for your region / the game doesn't have a
+            # price yet / the game is free.
+            # Unfortunately we have no way of knowing which is which based on the
+            # response ¯\_(ツ)_/¯.
+            return {}
+        price_overview = app["data"]["price_overview"]
+        return {
+            "initial_price": price_overview["initial"] / STEAM_FACTOR,
+            "final_price": price_overview["final"] / STEAM_FACTOR,
+            "discount_percent": price_overview["discount_percent"],
+        }
+
+
+class AsyncStore(Store):
+    # Requests are built and parsed by `Store`, only sending them differs
+    _network_errors = httpx.HTTPError
+
+    @login_required
+    @instrumented("fetch_owned_apps")
+    async def fetch_owned_apps(self) -> List[str]:
+        response = await self._send(self._owned_apps_request())
+
+        return list(map(str, decode_response(response)["rgOwnedApps"]))
+
+    @login_required
+    @instrumented("fetch_app_trading_cards")
+    @cached("fetch_app_trading_cards", ignore=("max_retries",))
+    async def fetch_app_trading_cards(
+        self, appid: str, max_retries: int = 5
+    ) -> List[str]:
+        request = self._trading_cards_request(appid)
+        for attempt in range(max_retries + 1):
+            response = await self._send(request)
+            try:
+                response_json = decode_response(response)
+            except json.JSONDecodeError:
+                if attempt == max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt))
                 continue
-            price_overview = response_json[appid]["data"]["price_overview"]
-            prices[appid] = {
-                "initial_price": price_overview["initial"] / STEAM_FACTOR,
-                "final_price": price_overview["final"] / STEAM_FACTOR,
-                "discount_percent": price_overview["discount_percent"],
-            }
+
+            return self._parse_trading_cards(response_json)
+
+    @login_required
+    @instrumented("fetch_app_trading_cards_many")
+    async def fetch_app_trading_cards_many(
+        self, appids: Iterable[str], max_workers: int = 32
+    ) -> Dict[str, List[str] | Exception]:
+        results = arun_concurrently(self.fetch_app_trading_cards, appids, max_workers)
+        return {appid: cards async for appid, cards in results}
+
+    @instrumented("fetch_app_price")
+    async def fetch_app_price(self, appid: str) -> Dict[str, int]:
+        return (await self.fetch_app_price_many([appid]))[appid]
+
+    @instrumented("fetch_app_price_many")
+    @cached("fetch_app_price_many", ignore=("max_workers",))
+    async def fetch_app_price_many(
+        self,
+        appids: Iterable[str],
+        cc: CountryCode = CountryCode.ARGENTINA,
+        max_workers: int = 16,
+    ) -> Dict[str, Dict[str, int]]:
+        chunks = [list(ids) for ids in n_elements_per_call(appids, n=self.chunk_size)]
+        fetch = functools.partial(self._fetch_app_price_chunk, cc=cc)
+        prices = {}
+        async for _, chunk_prices in arun_concurrently(fetch, chunks, max_workers):
+            if isinstance(chunk_prices, Exception):
+                raise chunk_prices
+            prices |= chunk_prices
 
         return prices
+
+    async def _fetch_app_price_chunk(
+        self, appids: List[str], cc: CountryCode, adapt: bool = True
+    ) -> Dict[str, Dict[str, int]]:
+        prices = await self._request_app_prices(appids, cc)
+        if adapt:
+            self.chunk_size = self._next_chunk_size(
+                self.chunk_size, len(appids), prices is None
+            )
+        if prices is not None:
+            return prices
+        if len(appids) == 1:
+            return {appids[0]: {}}
+
+        half = len(appids) // 2
+        first, second = await asyncio.gather(
+            self._fetch_app_price_chunk(appids[:half], cc, adapt=False),
+            self._fetch_app_price_chunk(appids[half:], cc, adapt=False),
+        )
+        return first | second
+
+    async def _request_app_prices(
+        self, appids: List[str], cc: CountryCode, max_retries: int = 3
+    ) -> Dict[str, Dict[str, int]] | None:
+        request = self._app_prices_request(appids, cc)
+        for attempt in range(max_retries + 1):
+            try:
+                response = await self._send(request)
+                response_json = self._read_app_prices(response)
+            except (self._network_errors, ValueError):
+                if attempt == max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt))
+                continue
+
+            if response_json is None:
+                return None
+            return self._parse_prices(response_json)
+
+    @instrumented("fetch_app_packages")
+    @cached("fetch_app_packages")
+    async def fetch_app_packages(self, appid: str) -> List[int]:
+        response = await self._send(self._app_packages_request(appid))
+
+        return decode_response(response)[appid]["data"]["packages"]
+
+    @instrumented("fetch_app_packages_many")
+    async def fetch_app_packages_many(
+        self, appids: Iterable[str], max_workers: int = 32
+    ) -> Dict[str, List[int] | Exception]:
+        results = arun_concurrently(self.fetch_app_packages, appids, max_workers)
+        return {appid: packages async for appid, packages in results}
+
+    @login_required
+    @instrumented("add_to_cart")
+    async def add_to_cart(
+        self, appid: str, cc: CountryCode = CountryCode.ARGENTINA
+    ) -> None:
+        await self.add_to_cart_many([appid], cc)
+
+    @login_required
+    @instrumented("add_to_cart_many")
+    async def add_to_cart_many(
+        self, appids: Iterable[str], cc: CountryCode = CountryCode.ARGENTINA
+    ) -> None:
+        appids = list(appids)
+        packages = await self.fetch_app_packages_many(appids)
+        await self._send(self._add_to_cart_request(self._subids(appids, packages), cc))
+
+    @login_required
+    @instrumented("purchase_cart")
+    async def purchase_cart(self) -> None:
+        response_init = await self._init_transaction()
+        if decode_response(response_init)["success"] != 1:
+            raise TransactionError("Error when initializing the transaction")
+
+        transid = decode_response(response_init)["transid"]
+        response_info = await self._info_transaction(transid)
+        total = await self._assert_enough_funds_to_purchase_cart(response_info)
+
+        response_finalize = await self._finalize_transaction(transid)
+        # https://steamerrors.com/22
+        if decode_response(response_finalize)["success"] != 22:
+            raise TransactionError("Error when finalizing the transaction")
+        self._steam.adjust_wallet_balance(-total)
+
+    @login_required
+    async def _init_transaction(self) -> "httpx.Response":
+        return await self._send(self._init_transaction_request())
+
+    @login_required
+    async def _info_transaction(self, transid: str) -> "httpx.Response":
+        return await self._send(self._info_transaction_request(transid))
+
+    @login_required
+    async def _finalize_transaction(self, transid: str) -> "httpx.Response":
+        return await self._send(self._finalize_transaction_request(transid))
+
+    @login_required
+    async def _assert_enough_funds_to_purchase_cart(
+        self, response_info: "httpx.Response"
+    ) -> float:
+        total = decode_response(response_info)["total"] / STEAM_FACTOR
+        funds = await self._steam.fetch_wallet_balance()
+        if total > funds:
+            funds = await self._steam.fetch_wallet_balance(refresh=True)
+        if total > funds:
+            raise NotEnoughFunds(f"Have: {funds}, need: {total}")
+        return total
+
+    @instrumented("search")
+    async def search(
+        self,
+        term: str = "",
+        count: int = 100,
+        start: int = 0,
+        maxprice: int = None,
+        sort_by: StoreSort = StoreSort.RELEVANCE,
+        app_types: List[AppTypeFilter] = None,
+        features: List[FeaturesFilter] = None,
+        cc: CountryCode = CountryCode.ARGENTINA,
+        ignore_preferences: bool = True,
+        extract_all: bool = False,
+        max_workers: int = 1,
+    ) -> Dict[str, Dict[str, str]]:
+        if extract_all:
+            apps = {}
+            async for appid, app in self.iter_search(
+                term,
+                start,
+                maxprice,
+                sort_by,
+                app_types,
+                features,
+                cc,
+                ignore_preferences,
+                max_workers,
+            ):
+                apps[appid] = app
+            return apps
+
+        params = self._search_params(
+            term, maxprice, sort_by, app_types, features, cc, ignore_preferences
+        )
+        response_json = await self._fetch_search_page(params, start, count)
+        return self._parse_search(response_json)
+
+    async def iter_search(
+        self,
+        term: str = "",
+        start: int = 0,
+        maxprice: int = None,
+        sort_by: StoreSort = StoreSort.RELEVANCE,
+        app_types: List[AppTypeFilter] = None,
+        features: List[FeaturesFilter] = None,
+        cc: CountryCode = CountryCode.ARGENTINA,
+        ignore_preferences: bool = True,
+        max_workers: int = 1,
+    ) -> AsyncIterator[Tuple[str, Dict[str, str]]]:
+        params = self._search_params(
+            term, maxprice, sort_by, app_types, features, cc, ignore_preferences
+        )
+        response_json = await self._fetch_search_page(params, start)
+        for item in self._parse_search(response_json).items():
+            yield item
+
+        total_count = response_json.get("total_count")
+        if max_workers > 1 and total_count is not None:
+            fetch = functools.partial(self._fetch_search_page, params)
+            starts = range(start + 100, total_count, 100)
+            async for _, response_json in arun_concurrently(fetch, starts, max_workers):
+                if isinstance(response_json, Exception):
+                    raise response_json
+                for item in self._parse_search(response_json).items():
+                    yield item
+            return
+
+        while response_json["items"]:
+            start += 100
+            response_json = await self._fetch_search_page(params, start)
+            for item in self._parse_search(response_json).items():
+                yield item
+
+    async def _fetch_search_page(
+        self, params: dict, start: int, count: int = 100
+    ) -> dict:
+        response = await self._send(self._search_page_request(params, start, count))
+
+        return decode_response(response)
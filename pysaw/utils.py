@@ -1,6 +1,38 @@
+import asyncio
+import codecs
+import contextvars
+import itertools
+import json
+import re
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    TYPE_CHECKING,
+)
+
+try:
+    import orjson
+except ImportError:  # optional, the standard library is used without it
+    orjson = None
+
 from .exceptions import LoginRequired
 from .constants import STEAM_FACTOR
 
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+# Responses are read in chunks of this size when they are parsed incrementally
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 def formatted_to_float(price_formatted: str) -> float:
     # "$389,20" -> 389,20"
@@ -20,6 +52,63 @@ def n_elements_per_call(iterable, n):
         yield buffer
 
 
+def run_concurrently(
+    func: Callable[[Any], Any], args: Iterable, max_workers: int
+) -> Iterator[Tuple[Any, Any]]:
+    # Yields `(arg, func(arg))` pairs in the order they finish, never having more
+    # than `max_workers` calls in flight. `args` is consumed lazily so it can be a
+    # generator of any size. If a call raises, the exception is yielded in place of
+    # its result so a single failure doesn't abort the whole batch. Calls run in a
+    # copy of the caller's context, like tasks do, so context variables (e.g. the
+    # current `@instrumented` operation or `ResponseCache.bypass()`) carry over.
+    args = iter(args)
+    executor = ThreadPoolExecutor(max_workers)
+
+    def submit(arg: Any) -> Future:
+        return executor.submit(contextvars.copy_context().run, func, arg)
+
+    try:
+        pending = {submit(a): a for a in itertools.islice(args, max_workers)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                arg = pending.pop(future)
+                for next_arg in itertools.islice(args, 1):
+                    pending[submit(next_arg)] = next_arg
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                yield arg, result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def arun_concurrently(
+    func: Callable[[Any], Awaitable], args: Iterable, max_workers: int
+) -> AsyncIterator[Tuple[Any, Any]]:
+    # `asyncio` version of `run_concurrently`
+    args = iter(args)
+    pending = {
+        asyncio.ensure_future(func(a)): a for a in itertools.islice(args, max_workers)
+    }
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                arg = pending.pop(task)
+                for next_arg in itertools.islice(args, 1):
+                    pending[asyncio.ensure_future(func(next_arg))] = next_arg
+                try:
+                    result = task.result()
+                except Exception as e:
+                    result = e
+                yield arg, result
+    finally:
+        for task in pending:
+            task.cancel()
+
+
 def encode_varint(value: int) -> bytes:
     # Varint encoding used by protobuf
     # https://carlmastrangelo.com/blog/lets-make-a-varint
@@ -39,6 +128,39 @@ def encode_varint(value: int) -> bytes:
     return bytes(encoded_bytes)
 
 
+class ProtobufWriter:
+    # Minimal protobuf encoder, just enough to build the messages Steam's web APIs
+    # expect. Fields are written in the order the methods are called, repeated
+    # fields are written by calling the same method once per element.
+    # https://protobuf.dev/programming-guides/encoding/
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def varint(self, field: int, value: int) -> "ProtobufWriter":
+        # Negative numbers are encoded as their 64 bit two's complement
+        self._tag(field, 0)
+        self._buffer += encode_varint(value & 0xFFFFFFFFFFFFFFFF)
+        return self
+
+    def bytes(self, field: int, value: bytes) -> "ProtobufWriter":
+        self._tag(field, 2)
+        self._buffer += encode_varint(len(value))
+        self._buffer += value
+        return self
+
+    def string(self, field: int, value: str) -> "ProtobufWriter":
+        return self.bytes(field, value.encode("utf-8"))
+
+    def message(self, field: int, message: "ProtobufWriter") -> "ProtobufWriter":
+        return self.bytes(field, message.getvalue())
+
+    def getvalue(self) -> bytes:
+        return bytes(self._buffer)
+
+    def _tag(self, field: int, wire_type: int) -> None:
+        self._buffer += encode_varint(field << 3 | wire_type)
+
+
 def login_required(func):
     def func_wrapper(self, *args, **kwargs):
         try:
@@ -52,3 +174,237 @@ def login_required(func):
         return func(self, *args, **kwargs)
 
     return func_wrapper
+
+
+def _stdlib_dumps(value: Any) -> str:
+    return json.dumps(value)
+
+
+def _orjson_dumps(value: Any) -> str:
+    return orjson.dumps(value).decode()
+
+
+# Every response (and cache entry) goes through these, see `set_json_backend()`
+json_loads: Callable[[str | bytes], Any] = json.loads
+json_dumps: Callable[[Any], str] = _stdlib_dumps
+if orjson is not None:
+    json_loads, json_dumps = orjson.loads, _orjson_dumps
+
+
+def set_json_backend(
+    loads: Callable[[str | bytes], Any], dumps: Callable[[Any], str]
+) -> None:
+    # Replaces the JSON functions used by pysaw. `loads` must take str and bytes and
+    # raise a `json.JSONDecodeError` (or a subclass) on invalid documents, `dumps`
+    # must return a str. orjson is used by default when it's installed.
+    global json_loads, json_dumps
+    json_loads, json_dumps = loads, dumps
+
+
+def decode_response(response: "requests.Response | httpx.Response") -> Any:
+    # Like `response.json()`, but through the configured backend
+    return json_loads(response.content)
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# What's left of a number whose end we haven't seen yet, e.g. the "." of "2."
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+_DECODER = json.JSONDecoder()
+
+(
+    _START,
+    _FIRST_KEY,
+    _KEY,
+    _COLON,
+    _VALUE,
+    _AFTER_VALUE,
+    _FIRST_ELEMENT,
+    _ELEMENT,
+    _AFTER_ELEMENT,
+    _DONE,
+) = range(10)
+
+
+class JsonStream:
+    # Incremental parser for a JSON object that arrives in chunks. `feed()` returns
+    # the top level `(key, value)` pairs completed so far, except for the arrays
+    # under `stream_keys`, which come out one `(key, element)` pair per element.
+    # That way only one element of those arrays is ever decoded at a time, e.g.
+    # `JsonStream(("assets",))` over `{"assets": [a, b], "more_items": 1}` gives
+    # `("assets", a)`, `("assets", b)` and `("more_items", 1)`.
+    #
+    # Values are decoded with `json.JSONDecoder.raw_decode()` once they are whole,
+    # so a single value (outside of `stream_keys`) is still kept in memory in full.
+    def __init__(self, stream_keys: Iterable[str] = ()):
+        self.stream_keys = frozenset(stream_keys)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = _START
+        self._key = None
+        self._closed = False
+
+    def feed(self, data: bytes) -> List[Tuple[str, Any]]:
+        self._buffer = self._buffer[self._pos :] + self._utf8.decode(data)
+        self._pos = 0
+        members = []
+        while self._step(members):
+            pass
+        return members
+
+    def close(self) -> List[Tuple[str, Any]]:
+        # Returns the last pairs, raises a `json.JSONDecodeError` if the document
+        # is incomplete
+        self._closed = True
+        self._utf8.decode(b"", final=True)  # raises on a truncated character
+        members = self.feed(b"")
+        if self._state != _DONE:
+            raise json.JSONDecodeError(
+                "Unexpected end of data", self._buffer, self._pos
+            )
+        return members
+
+    def _decode(self, pos: int) -> Tuple[Any, int] | None:
+        # None if the value at `pos` isn't whole yet
+        try:
+            value, end = _DECODER.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if self._closed:
+                raise
+            return None
+        if self._may_continue(self._buffer, end):
+            return None
+        return value, end
+
+    def _may_continue(self, buffer: str, end: int) -> bool:
+        # A value followed by nothing but number characters up to the end of the
+        # buffer could be a number cut by the chunk boundary (e.g. "-2500" + ".0")
+        if self._closed:
+            return False
+        return end == len(buffer) or _NUMBER_TAIL.match(buffer, end).end() == len(
+            buffer
+        )
+
+    def _step(self, members: List[Tuple[str, Any]]) -> bool:
+        # Consumes one token, returns False when more data is needed
+        if self._state in (_FIRST_ELEMENT, _ELEMENT, _AFTER_ELEMENT):
+            return self._step_elements(members)
+
+        buffer = self._buffer
+        pos = _WHITESPACE.match(buffer, self._pos).end()
+        self._pos = pos
+        if pos == len(buffer):
+            return False
+
+        char = buffer[pos]
+        state = self._state
+        if state == _START and char == "{":
+            self._state = _FIRST_KEY
+        elif state == _START:
+            # e.g. the "null" some endpoints answer with instead of an error
+            decoded = self._decode(pos)
+            if decoded is None:
+                return False
+            raise json.JSONDecodeError(
+                f"Expected a JSON object, got {json.dumps(decoded[0])}", buffer, pos
+            )
+        elif state == _FIRST_KEY and char == "}":
+            self._state = _DONE
+        elif state in (_FIRST_KEY, _KEY) and char == '"':
+            decoded = self._decode(pos)
+            if decoded is None:
+                return False
+            self._key, pos = decoded
+            self._state = _COLON
+            self._pos = pos
+            return True
+        elif state == _COLON and char == ":":
+            self._state = _VALUE
+        elif state == _VALUE and char == "[" and self._key in self.stream_keys:
+            self._state = _FIRST_ELEMENT
+        elif state == _VALUE:
+            decoded = self._decode(pos)
+            if decoded is None:
+                return False
+            value, pos = decoded
+            members.append((self._key, value))
+            self._state = _AFTER_VALUE
+            self._pos = pos
+            return True
+        elif state == _AFTER_VALUE and char == ",":
+            self._state = _KEY
+        elif state == _AFTER_VALUE and char == "}":
+            self._state = _DONE
+        else:
+            raise json.JSONDecodeError(f"Unexpected {char!r}", buffer, pos)
+
+        self._pos = pos + 1
+        return True
+
+    def _step_elements(self, members: List[Tuple[str, Any]]) -> bool:
+        # Same as `_step()` for the elements of a streamed array, which is where
+        # almost all of the tokens are, in a tighter loop
+        buffer = self._buffer
+        length = len(buffer)
+        pos = self._pos
+        state = self._state
+        key = self._key
+        while True:
+            if pos < length and buffer[pos] in " \t\n\r":
+                pos = _WHITESPACE.match(buffer, pos).end()
+            if pos == length:
+                break
+
+            char = buffer[pos]
+            if char == "]":
+                if state == _ELEMENT:  # right after a ","
+                    raise json.JSONDecodeError(f"Unexpected {char!r}", buffer, pos)
+                self._state = _AFTER_VALUE
+                self._pos = pos + 1
+                return True
+            if state == _AFTER_ELEMENT:
+                if char != ",":
+                    raise json.JSONDecodeError(f"Unexpected {char!r}", buffer, pos)
+                state = _ELEMENT
+                pos += 1
+                continue
+
+            try:
+                value, end = _DECODER.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if self._closed:
+                    raise
+                break
+            # `_may_continue()` only matters at the end of the buffer, skip it otherwise
+            if end == length or buffer[end] in _NUMBER_CHARS:
+                if self._may_continue(buffer, end):
+                    break
+            members.append((key, value))
+            state = _AFTER_ELEMENT
+            pos = end
+
+        self._pos = pos
+        self._state = state
+        return False
+
+
+def iter_json_members(
+    chunks: Iterable[bytes], stream_keys: Iterable[str] = ()
+) -> Iterator[Tuple[str, Any]]:
+    # `JsonStream` over e.g. `response.iter_content(STREAM_CHUNK_SIZE)`
+    stream = JsonStream(stream_keys)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
+
+
+async def aiter_json_members(
+    chunks: AsyncIterable[bytes], stream_keys: Iterable[str] = ()
+) -> AsyncIterator[Tuple[str, Any]]:
+    stream = JsonStream(stream_keys)
+    async for chunk in chunks:
+        for member in stream.feed(chunk):
+            yield member
+    for member in stream.close():
+        yield member
@@ -0,0 +1,46 @@
+import base64
+import json
+
+import pytest
+
+import pysaw
+from pysaw.standin import StandIn
+
+
+@pytest.fixture(scope="session")
+def standin():
+    with StandIn() as standin:
+        yield standin
+
+
+@pytest.fixture
+def make_steam(standin):
+    # Anonymous `Steam` clients talking to the stand-in, without pacing
+    def make_steam(**kwargs) -> pysaw.Steam:
+        kwargs.setdefault("rate_limiter", pysaw.RateLimiter({}))
+        return pysaw.Steam(base_url=standin.base_url, **kwargs)
+
+    return make_steam
+
+
+@pytest.fixture
+def guard_path(tmp_path):
+    path = tmp_path / "steam_guard.json"
+    secrets = {
+        "shared_secret": base64.b64encode(b"s" * 20).decode(),
+        "identity_secret": base64.b64encode(b"i" * 20).decode(),
+    }
+    path.write_text(json.dumps(secrets))
+    return str(path)
+
+
+@pytest.fixture
+def logged_in_steam(make_steam, guard_path):
+    def logged_in_steam(**kwargs) -> pysaw.Steam:
+        steam = make_steam(
+            username="pysaw", password="hunter2", steam_guard_path=guard_path, **kwargs
+        )
+        steam.login()
+        return steam
+
+    return logged_in_steam
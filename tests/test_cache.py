@@ -0,0 +1,94 @@
+import pysaw
+from pysaw import cache
+
+
+def test_equivalent_calls_share_a_key(make_steam, standin):
+    steam = make_steam(cache=pysaw.ResponseCache())
+    steam.market.fetch_price("730", "AK-47")
+    hits = standin.hits.get("steamcommunity.com/market/priceoverview", 0)
+
+    steam.market.fetch_price("730", "AK-47", pysaw.CountryCurrency.ARS)
+    steam.market.fetch_price("730", market_hash_name="AK-47")
+    steam.market.fetch_price(
+        appid="730", market_hash_name="AK-47", currency=pysaw.CountryCurrency.ARS
+    )
+    assert standin.hits.get("steamcommunity.com/market/priceoverview", 0) == hits
+    assert steam.cache.stats()["hits"]["fetch_price"] == 3
+
+
+def test_invalidate_finds_the_entry_of_a_call(make_steam, standin):
+    steam = make_steam(cache=pysaw.ResponseCache())
+    url = "steamcommunity.com/market/priceoverview"
+
+    for invalidate in (
+        lambda: steam.cache.invalidate("fetch_price", "730", "AK-47"),
+        lambda: steam.cache.invalidate(
+            "fetch_price", appid="730", market_hash_name="AK-47"
+        ),
+    ):
+        steam.market.fetch_price("730", "AK-47")
+        hits = standin.hits[url]
+        invalidate()
+        steam.market.fetch_price("730", "AK-47")
+        assert standin.hits[url] == hits + 1
+
+
+def test_keys_ignore_how_appids_are_passed_and_max_workers(make_steam, standin):
+    steam = make_steam(cache=pysaw.ResponseCache())
+    url = "store.steampowered.com/api/appdetails/"
+    prices = steam.store.fetch_app_price_many(["100", "101"], max_workers=1)
+    hits = standin.hits[url]
+
+    assert steam.store.fetch_app_price_many(iter(["100", "101"])) == prices
+    assert steam.store.fetch_app_price_many(("100", "101"), max_workers=8) == prices
+    assert standin.hits[url] == hits
+    (key,) = [k for k in steam.cache._entries if k.startswith("fetch_app_price_many")]
+    assert "max_workers" not in key and "generator" not in key
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    response_cache = pysaw.ResponseCache({"fetch_price": 10})
+    response_cache.set("fetch_price", "key", {"lowest_price": 1.5})
+    assert response_cache.get("fetch_price", "key") == (True, {"lowest_price": 1.5})
+
+    now = cache.time.time()
+    monkeypatch.setattr(cache.time, "time", lambda: now + 11)
+    assert response_cache.get("fetch_price", "key") == (False, None)
+
+
+def test_hits_are_copies():
+    response_cache = pysaw.ResponseCache({"fetch_price": 10})
+    response_cache.set("fetch_price", "key", {"lowest_price": 1.5})
+    _, value = response_cache.get("fetch_price", "key")
+    value["lowest_price"] = 0
+    assert response_cache.get("fetch_price", "key") == (True, {"lowest_price": 1.5})
+
+
+def test_least_recently_used_entries_are_evicted_first():
+    response_cache = pysaw.ResponseCache({"e": 10}, max_entries=2)
+    response_cache.set("e", "a", 1)
+    response_cache.set("e", "b", 2)
+    response_cache.get("e", "a")
+    response_cache.set("e", "c", 3)
+    assert response_cache.get("e", "b") == (False, None)
+    assert response_cache.get("e", "a") == (True, 1)
+    assert response_cache.get("e", "c") == (True, 3)
+
+
+def test_entries_are_evicted_past_max_bytes():
+    # Values are kept as JSON, '"abcd"' is 6 bytes
+    response_cache = pysaw.ResponseCache({"e": 10}, max_bytes=12)
+    for key in ("a", "b", "c"):
+        response_cache.set("e", key, "abcd")
+    assert response_cache.stats()["entries"] == 2
+    assert response_cache.stats()["bytes"] == 12
+    assert response_cache.get("e", "a") == (False, None)
+
+
+def test_entries_outlive_the_process(tmp_path):
+    path = str(tmp_path / "cache.db")
+    pysaw.ResponseCache({"e": 10}, path=path).set("e", "e:key", [1, 2])
+    assert pysaw.ResponseCache({"e": 10}, path=path).get("e", "e:key") == (True, [1, 2])
+
+    pysaw.ResponseCache({"e": 10}, path=path).invalidate("e")
+    assert pysaw.ResponseCache({"e": 10}, path=path).get("e", "e:key") == (False, None)
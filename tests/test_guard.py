@@ -0,0 +1,33 @@
+import base64
+import json
+
+import pytest
+
+
+@pytest.fixture
+def guard(make_steam, tmp_path):
+    # The shared secret is RFC 4226's test secret, so the code of the first 30
+    # seconds comes from its HOTP value for counter 0 (1284755224)
+    path = tmp_path / "steam_guard.json"
+    secrets = {
+        "shared_secret": base64.b64encode(b"12345678901234567890").decode(),
+        "identity_secret": base64.b64encode(b"abcdefghijabcdefghij").decode(),
+    }
+    path.write_text(json.dumps(secrets))
+    return make_steam(steam_guard_path=str(path)).guard
+
+
+def test_one_time_codes(guard):
+    assert guard.generate_one_time_code(0) == "GG5F5"
+    assert guard.generate_one_time_code(1_700_000_000) == "R87JJ"
+    # 1_700_000_010 is the first second of the next 30 seconds window
+    assert guard.generate_one_time_code(1_700_000_010) == "5MWGC"
+    assert guard.generate_one_time_code(1_700_000_039) == "5MWGC"
+    assert guard.generate_one_time_code(1_700_000_009) == "R87JJ"
+
+
+def test_confirmation_keys(guard):
+    key = guard.generate_confirmation_key("conf", 1_700_000_000)
+    assert key == "kGfUVRMTn/acEDguo/l990X8s3A="
+    key = guard.generate_confirmation_key("allow", 1_700_000_000)
+    assert key == "usuDmniFmeHSqN/XZtucdJulFGE="
@@ -0,0 +1,121 @@
+import numpy as np
+
+import pysaw
+
+
+def history(*points) -> pysaw.PriceHistory:
+    # (hour on Jul 02 2014, price, volume) points
+    return pysaw.PriceHistory.from_json(
+        {
+            "prices": [
+                [f"Jul 02 2014 {hour:02}: +0", price, str(volume)]
+                for hour, price, volume in points
+            ]
+        }
+    )
+
+
+def test_update_only_rewrites_from_the_last_stored_point(tmp_path):
+    store = pysaw.PriceHistoryStore(str(tmp_path / "history.db"))
+    assert store.update("730", "AK-47", history((1, 1.0, 5), (2, 2.0, 5))) == 2
+
+    # The last stored hour was partial, it's replaced along with the new ones
+    updated = history((1, 9.0, 9), (2, 2.5, 7), (3, 3.0, 1))
+    assert store.update("730", "AK-47", updated) == 2
+    loaded = store.load("730", "AK-47")
+    assert loaded.prices.tolist() == [1.0, 2.5, 3.0]
+    assert loaded.volumes.tolist() == [5, 7, 1]
+
+
+def test_load_many_filters_by_item_and_time(tmp_path):
+    store = pysaw.PriceHistoryStore(str(tmp_path / "history.db"))
+    store.update("730", "AK-47", history((1, 1.0, 1), (2, 2.0, 1), (3, 3.0, 1)))
+    store.update("730", "AWP", history((1, 4.0, 1)))
+    store.update("570", "AK-47", history((2, 5.0, 1)))
+
+    loaded = store.load_many(
+        "730", ["AK-47", "AWP", "M4A4"], start="2014-07-02T02", end="2014-07-02T03"
+    )
+    assert loaded["AK-47"].prices.tolist() == [2.0]
+    assert len(loaded["AWP"]) == len(loaded["M4A4"]) == 0
+    assert loaded["AK-47"].timestamps[0] == np.datetime64("2014-07-02T02")
+
+
+def test_refresh_many_returns_the_errors_of_each_item(
+    make_steam, logged_in_steam, tmp_path
+):
+    store = pysaw.PriceHistoryStore(str(tmp_path / "history.db"))
+    names = [f"Item {i}" for i in range(4)]
+
+    market = logged_in_steam().market
+    written = store.refresh_many(market, "730", names, max_workers=2)
+    assert all(n == len(store.load("730", name)) > 0 for name, n in written.items())
+
+    written = store.refresh_many(make_steam().market, "730", names, max_workers=2)
+    assert all(isinstance(e, pysaw.LoginRequired) for e in written.values())
+
+
+def series() -> pysaw.PriceHistory:
+    return pysaw.PriceHistory(
+        np.array(
+            [
+                "2014-07-02T01",
+                "2014-07-02T05",
+                "2014-07-03T00",
+                "2014-07-03T10",
+                "2014-07-05T00",
+            ],
+            dtype="datetime64[h]",
+        ),
+        np.array([1.0, 3.0, 2.0, 4.0, 5.0]),
+        np.array([1, 3, 0, 0, 2]),
+    )
+
+
+def test_resample_weights_prices_by_volume():
+    daily = series().resample("D")
+    # Jul 4 has no points, so no bucket. Jul 3 sold nothing, its price is the mean.
+    assert (
+        daily.timestamps.tolist()
+        == np.array(
+            ["2014-07-02T00", "2014-07-03T00", "2014-07-05T00"], dtype="datetime64[h]"
+        ).tolist()
+    )
+    assert daily.prices.tolist() == [(1 * 1 + 3 * 3) / 4, (2 + 4) / 2, 5.0]
+    assert daily.volumes.tolist() == [4, 0, 2]
+
+
+def test_resample_single_point_and_empty_histories():
+    single = series().between(end="2014-07-02T02").resample("D")
+    assert single.timestamps.tolist() == [np.datetime64("2014-07-02T00")]
+    assert single.prices.tolist() == [1.0]
+    assert single.volumes.tolist() == [1]
+
+    assert len(series().between(start="2015-01-01").resample("D")) == 0
+
+
+def test_vwap():
+    assert series().vwap() == (1 * 1 + 3 * 3 + 5 * 2) / 6
+    # Nothing sold, or no points at all
+    assert np.isnan(series().between("2014-07-03", "2014-07-04").vwap())
+    assert np.isnan(series().between(start="2015-01-01").vwap())
+
+
+def test_rolling_windows():
+    # Prices are 1, 3, 2, 4, 5
+    assert series().rolling_median(3).tolist() == [2.0, 3.0, 4.0]
+    assert series().rolling_median(5).tolist() == [3.0]
+    assert series().rolling_median(1).tolist() == [1.0, 3.0, 2.0, 4.0, 5.0]
+
+    lower, upper = series().percentile_bands(3)
+    np.testing.assert_allclose(lower, [1.2, 2.2, 2.4])
+    np.testing.assert_allclose(upper, [2.8, 3.8, 4.8])
+    lower, upper = series().percentile_bands(3, q=(0, 100))
+    assert lower.tolist() == [1.0, 2.0, 2.0]
+    assert upper.tolist() == [3.0, 4.0, 5.0]
+
+
+def test_windows_larger_than_the_history_are_empty():
+    assert series().rolling_median(6).tolist() == []
+    lower, upper = series().percentile_bands(6)
+    assert lower.tolist() == upper.tolist() == []
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from pysaw.utils import iter_json_members
+
+
+def split(raw: bytes, *cuts: int) -> list:
+    bounds = [0, *cuts, len(raw)]
+    return [raw[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_every_chunk_boundary():
+    doc = {"arr": [-2500.0, 1, 1e-7, "a,b]", None, {"x": [True]}], "n": 12.5, "s": ""}
+    raw = json.dumps(doc).encode()
+    expected = [("arr", value) for value in doc["arr"]] + [("n", 12.5), ("s", "")]
+    for cut in range(1, len(raw)):
+        assert list(iter_json_members(split(raw, cut), ("arr",))) == expected
+
+
+def test_number_cut_after_dot_or_exponent():
+    chunks = [b'{"arr": [-2500.', b"0, 1e", b'2], "n": 3.', b"5}"]
+    members = list(iter_json_members(chunks, ("arr",)))
+    assert members == [("arr", -2500.0), ("arr", 100.0), ("n", 3.5)]
+
+
+@pytest.mark.parametrize(
+    "raw", [b'{"a": 1,}', b'{"arr": [1,]}', b'{"arr": [,1]}', b'{"a": 1', b"[]"]
+)
+def test_invalid_documents(raw):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_members([raw], ("arr",)))
+
+
+def test_top_level_null():
+    with pytest.raises(json.JSONDecodeError, match="Expected a JSON object, got null"):
+        list(iter_json_members([b"nu", b"ll"]))
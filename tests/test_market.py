@@ -0,0 +1,41 @@
+from pysaw.exceptions import TransactionError
+from pysaw.models import Item
+from pysaw.standin import Faults
+
+MY_LISTINGS = "steamcommunity.com/market/mylistings/"
+SELL_ITEM = "steamcommunity.com/market/sellitem/"
+
+
+def test_sell_orders_are_confirmed_with_one_listings_page(standin, logged_in_steam):
+    steam = logged_in_steam()
+    items = [Item("730", "2", str(50_000_000_000 + i), "1", "0") for i in range(3)]
+    pages = standin.hits.get(MY_LISTINGS, 0)
+
+    results = steam.market.create_sell_orders([(item, 1.15) for item in items])
+
+    assert [r.listed and r.confirmed for r in results] == [True] * 3
+    assert all(r.error is None and r.attempts == 1 for r in results)
+    assert standin.hits[MY_LISTINGS] == pages + 1
+
+
+def test_rejected_sell_orders_are_not_retried(logged_in_steam):
+    steam = logged_in_steam()
+    item = Item("730", "2", "60000000000", "1", "0")
+
+    (result,) = steam.market.create_sell_orders([(item, 0.0)], max_retries=2)
+
+    assert not result.listed and result.attempts == 1
+    assert isinstance(result.error, TransactionError)
+    assert "at least" in str(result.error)
+
+
+def test_failed_sell_orders_are_retried(standin, logged_in_steam, monkeypatch):
+    steam = logged_in_steam()
+    item = Item("730", "2", "60000000001", "1", "0")
+    monkeypatch.setattr(standin, "faults", Faults(error=1.0, prefixes=(SELL_ITEM,)))
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+
+    (result,) = steam.market.create_sell_orders([(item, 1.15)], max_retries=2)
+
+    assert not result.listed and result.attempts == 3
+    assert isinstance(result.error, TransactionError)
@@ -0,0 +1,27 @@
+import pysaw
+
+
+def test_concurrent_requests_count_under_the_operation(make_steam):
+    metrics = pysaw.Metrics()
+    steam = make_steam(metrics=metrics)
+    steam.store.chunk_size = 10
+
+    appids = [str(appid) for appid in range(1, 51)]
+    steam.store.fetch_app_price_many(appids, max_workers=4)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["fetch_app_price_many"]["calls"] == 1
+    assert snapshot["fetch_app_price_many"]["requests"] == 5
+    assert "api/appdetails" not in snapshot
+
+
+def test_workers_see_the_callers_cache_bypass(make_steam, standin):
+    steam = make_steam(cache=pysaw.ResponseCache())
+    url = "steamcommunity.com/market/priceoverview"
+    names = [f"Item {i}" for i in range(8)]
+    list(steam.market.fetch_price_many("730", names, max_workers=4))
+    hits = standin.hits[url]
+
+    with steam.cache.bypass():
+        list(steam.market.fetch_price_many("730", names, max_workers=4))
+    assert standin.hits[url] == hits + 8
@@ -0,0 +1,18 @@
+from pysaw.models import Inventory, Item
+
+
+def test_inventory_normalizes_appids():
+    inventory = Inventory(
+        [
+            Item(730, 2, "1", market_hash_name="AK-47 | Redline"),
+            Item("730", "2", "2", market_hash_name="AK-47 | Redline"),
+        ]
+    )
+
+    assert inventory.count_by_name(730, "AK-47 | Redline") == 2
+    assert inventory.count_by_name("730", "AK-47 | Redline") == 2
+    assert inventory.get("730", 2, 1) is not None
+
+    inventory.remove_item(Item("730", "2", "1", market_hash_name="AK-47 | Redline"))
+    assert inventory.count_by_name(730, "AK-47 | Redline") == 1
+    assert len(list(inventory.without_duplicates())) == 1
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+import pytest
+
+import pysaw
+
+
+def accounts(guard_path):
+    return [
+        {"username": username, "password": "hunter2", "steam_guard_path": guard_path}
+        for username in ("alice", "bob")
+    ]
+
+
+def test_waiting_for_a_busy_account_doesnt_block_the_others(standin, guard_path):
+    release = threading.Event()
+    with pysaw.SteamPool(
+        accounts(guard_path),
+        rate_limiter=pysaw.RateLimiter({}),
+        base_url=standin.base_url,
+        max_tasks_per_account=1,
+    ) as pool:
+        assert pool.login(stagger=0) == {}
+        busy = pool.submit(lambda steam: release.wait(5), username="alice")
+        pinned = pool.submit(lambda steam: steam._username, username="alice")
+        free = pool.submit(lambda steam: steam._username)
+
+        assert free.result(timeout=2) == "bob"
+        assert not pinned.done()
+        release.set()
+        assert busy.result(timeout=2)
+        assert pinned.result(timeout=2) == "alice"
+
+
+def test_async_pool_wakes_every_waiter(standin, guard_path):
+    async def main():
+        done = {"alice": asyncio.Event(), "bob": asyncio.Event()}
+
+        async def wait(steam):
+            await done[steam._username].wait()
+
+        async def username(steam):
+            return steam._username
+
+        async def alive(steam):
+            return await steam.is_session_alive()
+
+        async with pysaw.AsyncSteamPool(
+            accounts(guard_path),
+            rate_limiter=pysaw.RateLimiter({}),
+            base_url=standin.base_url,
+            max_tasks_per_account=1,
+        ) as pool:
+            assert await pool.login(stagger=0) == {}
+            alice = pool.submit(wait, username="alice")
+            bob = pool.submit(wait, username="bob")
+            await asyncio.sleep(0)
+            pinned = pool.submit(username, username="alice")
+            await asyncio.sleep(0)
+            free = pool.submit(username)
+            await asyncio.sleep(0)
+
+            # bob finishing must wake the unpinned task, not just the first waiter
+            done["bob"].set()
+            assert await asyncio.wait_for(free, 2) == "bob"
+            assert not pinned.done()
+            done["alice"].set()
+            await asyncio.gather(alice, bob)
+            assert await pinned == "alice"
+
+            # Closing one account leaves the connections the others use open
+            await pool["alice"].aclose()
+            assert await pool.submit(alive, username="bob")
+
+    asyncio.run(main())
+
+
+def test_unknown_usernames_dont_block_the_pool(standin, guard_path):
+    with pysaw.SteamPool(
+        accounts(guard_path),
+        rate_limiter=pysaw.RateLimiter({}),
+        base_url=standin.base_url,
+    ) as pool:
+        assert pool.login(stagger=0) == {}
+        with pytest.raises(KeyError):
+            pool.submit(lambda steam: None, username="typo")
+        assert pool.submit(lambda steam: steam._username).result(timeout=2)
+
+
+def test_duplicate_usernames_are_rejected(guard_path):
+    with pytest.raises(ValueError):
+        pysaw.SteamPool(accounts(guard_path) * 2)
+
+
+def test_async_pool_is_closed_asynchronously(guard_path):
+    async def main():
+        pool = pysaw.AsyncSteamPool(accounts(guard_path))
+        with pytest.raises(TypeError):
+            with pool:
+                pass
+        with pytest.raises(TypeError):
+            pool.close()
+        await pool.aclose()
+
+    asyncio.run(main())
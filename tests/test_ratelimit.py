@@ -0,0 +1,81 @@
+import email.utils
+
+import pytest
+
+import pysaw
+from pysaw import ratelimit
+from pysaw.ratelimit import parse_retry_after
+
+PRICE = "https://steamcommunity.com/market/priceoverview?appid=730"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(ratelimit.time, "time", lambda: now[0])
+    return now
+
+
+def test_burst_then_one_request_per_interval(clock):
+    limiter = pysaw.RateLimiter({"steamcommunity.com/market/": (1, 3)})
+    assert [limiter.reserve(PRICE) for _ in range(5)] == [0, 0, 0, 1, 2]
+
+
+def test_buckets_refill_over_time(clock):
+    limiter = pysaw.RateLimiter({"steamcommunity.com/market/": (2, 2)})
+    assert [limiter.reserve(PRICE) for _ in range(3)] == [0, 0, 0.5]
+
+    # The third request went out at +0.5s, a slot frees up every 0.5s after it
+    clock[0] += 1.5
+    assert [limiter.reserve(PRICE) for _ in range(3)] == [0, 0, 0.5]
+
+
+def test_unpaced_by_default_and_longest_prefix_wins(clock):
+    assert [pysaw.RateLimiter().reserve(PRICE) for _ in range(10)] == [0] * 10
+
+    limiter = pysaw.RateLimiter(
+        {"steamcommunity.com/": (1, 1), "steamcommunity.com/market/": (1, 2)}
+    )
+    assert [limiter.reserve(PRICE) for _ in range(3)] == [0, 0, 1]
+    assert limiter.reserve("https://steamcommunity.com/inventory/1/730/2") == 0
+
+
+def test_penalize_honours_retry_after(clock):
+    limiter = pysaw.RateLimiter({"steamcommunity.com/market/": (1, 3)})
+    assert limiter.penalize(PRICE, retry_after=10) == 10
+    assert limiter.reserve(PRICE) == 10
+
+
+def test_penalize_backs_off_exponentially_until_rewarded(clock):
+    limiter = pysaw.RateLimiter({"steamcommunity.com/market/": (1, 1)}, max_backoff=3)
+    assert [limiter.penalize(PRICE) for _ in range(4)] == [1, 2, 3, 3]
+
+    limiter.reward(PRICE)
+    assert limiter.penalize(PRICE) == 1
+
+
+def test_hosts_without_rules_still_back_off(clock):
+    limiter = pysaw.RateLimiter()
+    limiter.penalize(PRICE, retry_after=5)
+    assert limiter.reserve("https://steamcommunity.com/inventory/1/730/2") == 5
+    assert limiter.reserve("https://store.steampowered.com/search/results/") == 0
+
+
+def test_processes_share_buckets_through_state_path(clock, tmp_path):
+    path = str(tmp_path / "ratelimit.sqlite3")
+    limits = {"steamcommunity.com/market/": (1, 2)}
+    first = pysaw.RateLimiter(limits, state_path=path)
+    second = pysaw.RateLimiter(limits, state_path=path)
+    waits = [limiter.reserve(PRICE) for limiter in (first, second, first)]
+    assert waits == [0, 0, 1]
+
+
+def test_parse_retry_after(clock):
+    assert parse_retry_after("120") == 120
+    in_30s = email.utils.formatdate(clock[0] + 30, usegmt=True)
+    assert parse_retry_after(in_30s) == 30
+    an_hour_ago = email.utils.formatdate(clock[0] - 3600, usegmt=True)
+    assert parse_retry_after(an_hour_ago) == 0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
@@ -0,0 +1,15 @@
+import requests
+
+from pysaw.ratelimit import parse_retry_after
+from pysaw.standin import Faults, StandIn
+
+
+def test_rate_limit_sends_a_retry_after_the_client_understands():
+    with StandIn(faults=Faults(rate_limit=1.0, retry_after=0.5)) as standin:
+        response = requests.get(
+            standin.base_url + "/market/priceoverview",
+            headers={"Host": "steamcommunity.com"},
+        )
+
+    assert response.status_code == 429
+    assert parse_retry_after(response.headers["Retry-After"]) == 1.0
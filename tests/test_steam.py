@@ -0,0 +1,74 @@
+import threading
+
+import pysaw
+from pysaw.standin import StandIn
+
+BEGIN_AUTH = (
+    "api.steampowered.com/IAuthenticationService/BeginAuthSessionViaCredentials/v1"
+)
+
+
+def test_saved_session_is_refreshed_before_logging_in_again(guard_path, tmp_path):
+    session_path = str(tmp_path / "session.json")
+    with StandIn() as standin:
+
+        def login() -> pysaw.Steam:
+            steam = pysaw.Steam(
+                "pysaw",
+                "hunter2",
+                guard_path,
+                rate_limiter=pysaw.RateLimiter({}),
+                base_url=standin.base_url,
+            )
+            steam.login(session_path)
+            assert steam.is_session_alive()
+            return steam
+
+        login()
+        assert standin.hits[BEGIN_AUTH] == 1
+
+        standin.expire_sessions()
+        login()
+        assert standin.hits[BEGIN_AUTH] == 1
+
+        standin.revoke_refresh_tokens()
+        login()
+        assert standin.hits[BEGIN_AUTH] == 2
+
+
+def test_keep_alive_survives_unexpected_errors(logged_in_steam, monkeypatch):
+    steam = logged_in_steam()
+    checked = threading.Semaphore(0)
+
+    def expires_within(margin):
+        checked.release()
+        raise RuntimeError("Not a network error")
+
+    monkeypatch.setattr(steam, "_session_expires_within", expires_within)
+    steam.start_keep_alive(interval=0.01)
+    try:
+        assert checked.acquire(timeout=2) and checked.acquire(timeout=2)
+        assert steam._keep_alive.is_alive()
+    finally:
+        steam.stop_keep_alive()
+
+
+def test_unusable_saved_session_falls_back_to_a_full_login(
+    make_steam, guard_path, tmp_path
+):
+    session_path = tmp_path / "session.json"
+    for content in ('{"steamid": "1"}', "[]", '{"cookies": 1}', "null"):
+        session_path.write_text(content)
+        steam = make_steam(
+            username="pysaw", password="hunter2", steam_guard_path=guard_path
+        )
+        steam.login(str(session_path))
+        assert steam.is_session_alive()
+
+
+def test_saved_sessions_are_private(logged_in_steam, tmp_path):
+    path = tmp_path / "session.json"
+    path.write_text("{}")
+    path.chmod(0o644)
+    logged_in_steam()._login_exec.save_session(str(path))
+    assert path.stat().st_mode & 0o777 == 0o600
@@ -0,0 +1,122 @@
+import base64
+import json
+
+import pytest
+
+import pysaw
+from pysaw.standin import Faults
+from pysaw.store import Store
+from pysaw.utils import ProtobufWriter
+
+BADGE_INFO = "steamcommunity.com/my/ajaxgetbadgeinfo/"
+
+
+def test_trading_cards_retry_html_answers_a_bounded_number_of_times(
+    logged_in_steam, standin, monkeypatch
+):
+    steam = logged_in_steam()
+    monkeypatch.setattr(steam.store, "_retry_delay", lambda attempt: 0)
+    monkeypatch.setattr(standin, "faults", Faults(malformed=1, prefixes=(BADGE_INFO,)))
+
+    hits = standin.hits.get(BADGE_INFO + "201", 0)
+    with pytest.raises(json.JSONDecodeError):
+        steam.store.fetch_app_trading_cards("201", max_retries=2)
+    assert standin.hits[BADGE_INFO + "201"] == hits + 3
+
+
+def test_trading_cards_recover_after_a_retry(logged_in_steam, standin, monkeypatch):
+    steam = logged_in_steam()
+    monkeypatch.setattr(standin, "faults", Faults(malformed=1, prefixes=(BADGE_INFO,)))
+
+    def heal(attempt: int) -> float:
+        standin.faults = Faults()
+        return 0
+
+    monkeypatch.setattr(steam.store, "_retry_delay", heal)
+    hits = standin.hits.get(BADGE_INFO + "202", 0)
+    cards = steam.store.fetch_app_trading_cards("202")
+    assert cards == [f"202-Card {i}" for i in range(1, 7)]
+    assert standin.hits[BADGE_INFO + "202"] == hits + 2
+
+
+def test_trading_cards_many_returns_the_errors_of_each_app(
+    logged_in_steam, standin, monkeypatch
+):
+    steam = logged_in_steam()
+    monkeypatch.setattr(steam.store, "_retry_delay", lambda attempt: 0)
+    faults = Faults(malformed=1, prefixes=(BADGE_INFO + "204",))
+    monkeypatch.setattr(standin, "faults", faults)
+
+    cards = steam.store.fetch_app_trading_cards_many(
+        ["204", "205", "207"], max_workers=3
+    )
+    assert isinstance(cards["204"], json.JSONDecodeError)
+    assert cards["205"] == [f"205-Card {i}" for i in range(1, 7)]
+    assert cards["207"] == []  # no trading cards
+
+
+@pytest.mark.parametrize(
+    "subid, item",
+    [
+        (5, b"\x12\x02\x08\x05"),
+        (300, b"\x12\x03\x08\xac\x02"),
+        (20000, b"\x12\x04\x08\xa0\x9c\x01"),
+        (3000000, b"\x12\x05\x08\xc0\x8d\xb7\x01"),
+    ],
+)
+def test_cart_protobuf_item_lengths_follow_the_subid(subid, item):
+    # user_country "AR", then one ItemToAdd whose length depends on the varint
+    expected = b"\x0a\x02AR" + item
+    cc = pysaw.CountryCode.ARGENTINA
+    assert base64.b64decode(Store._cart_protobuf([subid], cc)) == expected
+
+
+def test_protobuf_writer_encodes_every_field_type():
+    message = (
+        ProtobufWriter()
+        .varint(1, 0)
+        .varint(16, 1)  # two byte tag
+        .varint(2, -1)  # 64 bit two's complement
+        .string(3, "ñ")
+        .bytes(4, b"")
+        .message(5, ProtobufWriter().varint(1, 150))
+    )
+    assert message.getvalue() == (
+        b"\x08\x00"
+        + b"\x80\x01\x01"
+        + b"\x10"
+        + b"\xff" * 9
+        + b"\x01"
+        + b"\x1a\x02\xc3\xb1"
+        + b"\x22\x00"
+        + b"\x2a\x03\x08\x96\x01"
+    )
+
+
+def test_add_to_cart_many_adds_the_first_package_of_every_app(logged_in_steam):
+    steam = logged_in_steam()
+    appids = ["100", "101", "102"]
+    assert steam.store.fetch_app_packages_many(appids) == {
+        "100": [1001],
+        "101": [1011],
+        "102": [1021],
+    }
+
+    balance = steam.fetch_wallet_balance(refresh=True)
+    steam.store.add_to_cart_many(appids)
+    steam.store.purchase_cart()  # the stand-in charges 9.99 per package
+    assert steam.fetch_wallet_balance(refresh=True) == pytest.approx(balance - 29.97)
+
+
+def test_search_extract_all_fetches_pages_concurrently(make_steam, standin):
+    steam = make_steam()
+    url = "store.steampowered.com/search/results/"
+    hits = standin.hits.get(url, 0)
+    sequential = steam.store.search(extract_all=True)
+    # The sequential walk also asks for the empty page after the last one
+    assert standin.hits[url] == hits + standin.search_size // 100 + 1
+
+    hits = standin.hits[url]
+    assert steam.store.search(extract_all=True, max_workers=4) == sequential
+    assert standin.hits[url] == hits + standin.search_size // 100
+    assert len(sequential) == standin.search_size